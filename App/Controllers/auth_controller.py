@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from App.Services.auth_services import AuthService
 from App.Utils.db_sessions import get_db
 from pydantic import BaseModel
+from typing import Optional
 from App.Utils.auth_utils import oauth2_scheme,decode_access_token
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -17,7 +18,27 @@ class UserLogin(BaseModel):
     email: str
     password: str
 
-@router.post("/register")
+class RegisteredUser(BaseModel):
+    id: int
+    name: str
+    last_name: str
+    email: str
+
+class RegisterResponse(BaseModel):
+    message: str
+    user: RegisteredUser
+
+class LoginResponse(BaseModel):
+    access_token: str
+    token_type: str
+    user_id: int
+    email: str
+
+class TokenDebugResponse(BaseModel):
+    received_token: str
+    payload: Optional[dict] = None
+
+@router.post("/register", response_model=RegisterResponse)
 def register(user: UserRegister, db: Session = Depends(get_db)):
     auth_service = AuthService(db)
     try: 
@@ -31,7 +52,7 @@ def register(user: UserRegister, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-@router.post("/login")
+@router.post("/login", response_model=LoginResponse)
 def login(user: UserLogin, db: Session = Depends(get_db)):
     auth_service = AuthService(db)
     try:
@@ -45,7 +66,7 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-@router.get("/me")
+@router.get("/me", response_model=TokenDebugResponse)
 def debug_token(token: str = Depends(oauth2_scheme)):
     payload = decode_access_token(token)
     return {"received_token": token, "payload": payload}
\ No newline at end of file
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
-from App.Utils.db_sessions import get_db
+from App.Utils.db_sessions import get_async_db
 from App.Utils.auth_utils import get_current_user
 from App.Utils.open_ai import OpenAIClient
-from App.Services.chat_services import ChatService
-from App.Services.document_services import DocumentService
+from App.Services.chat_services import AsyncChatService
+from App.Services.chat_persistence_services import ChatPersistenceService
+from App.Services.chat_archive_services import AsyncChatArchiveService
+from App.Services.document_services import AsyncDocumentService
+from App.Utils.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,32 +33,25 @@ class HistoryResponse(BaseModel):
 async def send_message(
     document_id: int,
     request: MessageRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     try:
         user_id = current_user["id"]
-        chat_service = ChatService(db)
-        document_service = DocumentService(db)
+        persistence = ChatPersistenceService(db)
 
-        document = document_service.get_document(document_id)
-        if not document:
+        context = await persistence.get_context(user_id, document_id, history_limit=10)
+        if not context:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
-
-        history_entries = chat_service.get_chat_history(user_id, document_id, limit=10)
-        chat_history = []
-        for entry in reversed(history_entries):
-            chat_history.append({"role": "user", "content": entry.message})
-            chat_history.append({"role": "assistant", "content": entry.response})
             
         openai_client = OpenAIClient()
         response = await openai_client.chat_with_document(
-            document_content=document.content,
+            document_content=context.content,
             user_message=request.message,
-            chat_history=chat_history
+            chat_history=context.history
         )    
         
-        chat_entry = chat_service.save_message(
+        chat_entry = await persistence.append_turn(
             user_id=user_id,
             document_id=document_id,
             message=request.message,
@@ -63,12 +59,14 @@ async def send_message(
         )
         
         return MessageResponse(
-            id=chat_entry.id,
-            message=chat_entry.message,
-            response=chat_entry.response,
-            timestamp=chat_entry.timestamp.isoformat()
+            id=chat_entry["id"],
+            message=request.message,
+            response=response,
+            timestamp=chat_entry["timestamp"].isoformat()
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in send_message: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
@@ -77,26 +75,72 @@ async def send_message(
 @router.get("/history/{document_id}", response_model=HistoryResponse)
 async def get_chat_history(
     document_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):  
+    """
+    Historial del más reciente al más antiguo. Si hay mensajes anteriores, el cursor
+    de la página siguiente va en la cabecera X-Next-Cursor (`?cursor=`).
+    """
     user_id = current_user["id"]
-    chat_service = ChatService(db)
-    document_service = DocumentService(db)
+    chat_service = AsyncChatService(db)
+    document_service = AsyncDocumentService(db)
     
-    document = document_service.get_document(document_id)
+    document = await document_service.get_document(document_id)
     if not document:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
     
-    history_entries = chat_service.get_chat_history(user_id, document_id)
+    try:
+        page = await chat_service.get_chat_history_page(user_id, document_id, cursor=cursor, limit=limit)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+
     history_response = [
         MessageResponse(
             id=entry.id,
             message=entry.message,
             response=entry.response,
             timestamp=entry.timestamp.isoformat()
-        ) for entry in history_entries
+        ) for entry in page.items
     ]
     
     return HistoryResponse(history=history_response, document_title=document.title)
-    
\ No newline at end of file
+
+
+@router.get("/history/{document_id}/archive", response_model=HistoryResponse)
+async def get_archived_chat_history(
+    document_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(1, ge=1, le=10, description="bloques archivados por página"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Mensajes anteriores al periodo de retención (CHAT_RETENTION_DAYS), del más
+    reciente al más antiguo. Se consulta cuando `/history/{document_id}` ya no
+    devuelve la cabecera X-Next-Cursor; se pagina con la misma cabecera.
+    """
+    try:
+        page = await AsyncChatArchiveService(db).get_archived_history_page(
+            current_user["id"], document_id, cursor=cursor, limit=limit
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+
+    history_response = [
+        MessageResponse(
+            id=turn["id"],
+            message=turn["message"],
+            response=turn["response"],
+            timestamp=turn["timestamp"].isoformat()
+        ) for turn in page.items
+    ]
+    return HistoryResponse(history=history_response)
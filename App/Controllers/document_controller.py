@@ -1,26 +1,47 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from pathlib import Path
-import shutil
-import os
-from App.Utils.db_sessions import get_db
-from App.Services.document_services import DocumentService
+from pydantic import BaseModel
+from typing import Optional
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
+from urllib.parse import quote
+from App.Core.config import settings
+from App.Utils.db_sessions import get_db, get_async_db
+from App.Services.document_services import DocumentService, AsyncDocumentService, download_name, read_text
 from App.Services.summary_services import SummaryService
 from App.Services.flashcard_services import FlashcardService
 from App.Services.subject_services import SubjectService
 from App.Services.quiz_services import QuizService
+from App.Services.audio_services import AudioService
+from App.Services.pregeneration_services import PregenerationService
+from App.Services.deletion_services import DeletionService, remove_stored_files
 from App.Utils.open_ai import OpenAIClient
 from App.Utils.auth_utils import get_current_user
-from gtts import gTTS
-import tempfile
+from App.Utils.file_responses import cached_file_response, get_file_meta
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-UPLOAD_DIR = Path("Public").resolve()
-AUDIO_DIR = UPLOAD_DIR / "audio"
+class DocumentUploadResponse(BaseModel):
+    id: int
+    title: str
+    message: str
+
+class DocumentResponse(BaseModel):
+    id: int
+    title: str
+    file_path: str
+    file_name: Optional[str] = None
+    content: Optional[str] = None  # solo con include_content=true
+
+class DocumentDeletedResponse(BaseModel):
+    message: str
+    document_id: int
 
-@router.post("/uploads/{subject_id}")
+@router.post("/uploads/{subject_id}", response_model=DocumentUploadResponse)
 async def upload_and_analyze(
     subject_id: int,
     file: UploadFile = File(...), 
@@ -28,22 +49,29 @@ async def upload_and_analyze(
     current_user: dict = Depends(get_current_user)
 ):
     user_id = current_user["id"]
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
     subject_service = SubjectService(db)
     doc_service = DocumentService(db)
 
     subject = subject_service.get_subject_by_id(subject_id)
     if not subject or subject.user_id != user_id:
         raise HTTPException(status_code=404, detail="Subject not found or access denied")
-    
-    new_doc = doc_service.save_document(file_path, subject_id)
+
+    # El archivo va al almacén por contenido: el nombre del cliente no decide la ruta
+    try:
+        new_doc = await run_in_threadpool(doc_service.save_upload, file.file, file.filename, subject_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not new_doc:
         raise HTTPException(status_code=500, detail="Error saving document")
     
+    # El documento ya está confirmado: si no se puede encolar la pre-generación,
+    # los artefactos se generan cuando se pidan y la subida no falla
+    try:
+        await run_in_threadpool(PregenerationService(db).schedule, new_doc, subject)
+    except Exception as e:
+        logger.error(f"❌ No se pudo programar la pre-generación del documento {new_doc.id}: {e}", exc_info=True)
+        await run_in_threadpool(db.rollback)
+    
     response = {
         "id": new_doc.id,
         "title": new_doc.title,
@@ -54,96 +82,125 @@ async def upload_and_analyze(
     }
     
     
-@router.get("/{doc_id}")
-def get_document(doc_id: int, db: Session = Depends(get_db),current_user: dict = Depends(get_current_user)):
-        document_service = DocumentService(db)
-        document = document_service.get_document(doc_id)
+@router.get("/{doc_id}", response_model=DocumentResponse, response_model_exclude_unset=True)
+async def get_document(doc_id: int, include_content: bool = True, db: AsyncSession = Depends(get_async_db),current_user: dict = Depends(get_current_user)):
+        # include_content=false devuelve solo los metadatos, sin el texto completo
+        document_service = AsyncDocumentService(db)
+        document = await document_service.get_document(doc_id, load_content=include_content)
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
-        return {
+        response = {
             "id": document.id,
             "title": document.title,
-            "content": document.content,
-            "file_path": document.file_path
+            "file_path": document.file_path,
+            "file_name": download_name(document)
         }
+        if include_content:
+            # Los documentos sin blob de texto lo tienen en Document.content (ya cargado)
+            text = await run_in_threadpool(read_text, document.content_hash)
+            response["content"] = document.content if text is None else text
+        return response
                 
-@router.get("/download/{doc_id}")
-def download_file_by_id(doc_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+@router.delete("/{doc_id}", response_model=DocumentDeletedResponse)
+def delete_document(doc_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """
+    Borra el documento y todo lo generado a partir de él (resúmenes, flashcards,
+    quizzes con sus intentos, chats y planes). El PDF y el audio se borran en segundo plano.
+    """
+    try:
+        files = DeletionService(db).delete_document(doc_id, current_user["id"])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    background_tasks.add_task(remove_stored_files, files)
+    return {"message": "Documento eliminado.", "document_id": doc_id}
+
+@router.get("/download/{doc_id}", response_class=FileResponse, responses={200: {"content": {"application/octet-stream": {}}}})
+def download_file_by_id(doc_id: int, request: Request, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     document_service = DocumentService(db)
-    document = document_service.get_document(doc_id)
-    if not document or not os.path.exists(document.file_path):
+    document = document_service.get_file_paths(doc_id)
+    if not document:
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
     
-    filename = os.path.basename(document.file_path)
-    return FileResponse(
-        path=document.file_path,
-        filename=filename,
-        media_type="application/octet-stream"
+    filename = download_name(document)
+    return cached_file_response(
+        request,
+        document.file_path,
+        media_type="application/octet-stream",
+        content_disposition=f"attachment; filename*=UTF-8''{quote(filename)}"
     )
     
-@router.get("/view/{doc_id}")
-def view_file(doc_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+@router.get("/view/{doc_id}", response_class=FileResponse, responses={200: {"content": {"application/pdf": {}}}})
+def view_file(doc_id: int, request: Request, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     document_service = DocumentService(db)
-    document = document_service.get_document(doc_id)
-    
-    print(f"Document fetched: {document}")
-    if not document or not os.path.exists(document.file_path):
+    document = document_service.get_file_paths(doc_id)
+    if not document:
         raise HTTPException(status_code=404, detail="Archivo no encontrado")
     
-    filename = os.path.basename(document.file_path)
-
-    print(document)
-    return FileResponse(
-        path=document.file_path,
+    filename = download_name(document)
+    return cached_file_response(
+        request,
+        document.file_path,
         media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"inline; filename*=UTF-8''{filename}"
-        }
+        content_disposition=f"inline; filename*=UTF-8''{quote(filename)}"
     )
     
-@router.get("/doc/prueba")
+@router.get("/doc/prueba", response_model=str)
 async def prueba():
     openai_client = OpenAIClient()
     response = await openai_client.prueba()
     return response
 
-@router.get("/text_to_speech/{doc_id}")
-async def text_to_speech(doc_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    document_service = DocumentService(db)
-    document = document_service.get_document(doc_id)
-    
-    if not document:
+def _audio_source(document_service: DocumentService, doc_id: int):
+    """
+    Parte síncrona de text_to_speech, para el pool de hilos: la ruta del audio ya
+    generado (sin leer el texto) o, si no lo hay, el texto del documento validado.
+    """
+    paths = document_service.get_file_paths(doc_id)
+    if not paths:
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    text = document.content
-    
+    if paths.audio_url and get_file_meta(paths.audio_url):
+        return paths.audio_url, None
+
+    text = document_service.get_text(document_service.get_document(doc_id))
     if not text or text.strip() == "":
         raise HTTPException(status_code=400, detail="Document content is empty")
-    
-    if document.audio_url and os.path.exists(document.audio_url):
-        return FileResponse(
-            path=document.audio_url,
-            media_type="audio/mpeg",
-            filename=f"document_{document.id}.mp3"
+
+    if len(text) > settings.TTS_MAX_CHARS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Document is too long for audio (max {settings.TTS_MAX_CHARS} characters)"
         )
-    
-    file_audio_response = f"document_{document.id}.mp3"
-    audio_path = os.path.join(AUDIO_DIR, file_audio_response)
-    
-    try: 
-        tts = gTTS(text, lang='es')
-        tts.save(audio_path)
-        
+    return None, text
+
+@router.get("/text_to_speech/{doc_id}", response_class=StreamingResponse, responses={200: {"content": {"audio/mpeg": {}}}})
+async def text_to_speech(doc_id: int, request: Request, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    audio_url, text = await run_in_threadpool(_audio_source, DocumentService(db), doc_id)
+    if audio_url:
+        return await run_in_threadpool(
+            cached_file_response,
+            request,
+            audio_url,
+            "audio/mpeg",
+            f'attachment; filename="document_{doc_id}.mp3"'
+        )
+
+    # El audio se envía a medida que se sintetiza cada fragmento. El primero se
+    # espera aquí para poder responder con error si el motor de TTS falla
+    audio_stream = AudioService(db).stream_audio(doc_id, text)
+    try:
+        first_chunk = await audio_stream.__anext__()
     except Exception as e:
+        await audio_stream.aclose()
         raise HTTPException(status_code=500, detail=f"Error generating audio: {str(e)}")
-        
-    document.audio_url = audio_path
-    db.commit()
-    db.refresh(document)    
-        
-    return FileResponse(
-        audio_path,
+
+    async def audio_body():
+        yield first_chunk
+        async for chunk in audio_stream:
+            yield chunk
+
+    return StreamingResponse(
+        audio_body(),
         media_type="audio/mpeg",
-        filename=f"document_{document.id}.mp3"
+        headers={"Content-Disposition": f'attachment; filename="document_{doc_id}.mp3"'}
     )
         
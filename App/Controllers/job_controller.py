@@ -0,0 +1,128 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Optional, Tuple
+from App.Core.config import settings
+from App.Core.job_queue import job_queue
+from App.Database.database import SessionLocal
+from App.Models.models import Job
+from App.Services.job_services import JobService, TERMINAL_STATUSES
+from App.Utils.db_sessions import get_db
+from App.Utils.auth_utils import get_current_user
+from App.Utils.json_responses import FastJSONResponse
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+class JobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    document_id: Optional[int] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+
+class JobAcceptedResponse(BaseModel):
+    job_id: int
+    status: str
+    status_url: str
+    events_url: str
+
+
+# Para documentar la respuesta 202 de los endpoints con ?background=true
+JOB_ACCEPTED_RESPONSES = {status.HTTP_202_ACCEPTED: {"model": JobAcceptedResponse, "description": "Trabajo encolado"}}
+
+
+def job_response(job: Job) -> JobResponse:
+    return JobResponse(
+        id=job.id,
+        job_type=job.job_type,
+        status=job.status,
+        document_id=job.document_id,
+        result=job.result,
+        error=job.error,
+        created_at=job.created_at.isoformat() if job.created_at else None,
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        finished_at=job.finished_at.isoformat() if job.finished_at else None
+    )
+
+
+def job_accepted(job: Job) -> FastJSONResponse:
+    """
+    Respuesta 202 común para los endpoints que delegan la generación a la cola.
+    """
+    return FastJSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=JobAcceptedResponse(
+            job_id=job.id,
+            status=job.status,
+            status_url=f"/jobs/{job.id}",
+            events_url=f"/jobs/{job.id}/events"
+        ).model_dump(),
+        headers={"Location": f"/jobs/{job.id}"}
+    )
+
+
+def _get_owned_job(job_service: JobService, job_id: int, user_id: int) -> Job:
+    job = job_service.get_job(job_id)
+    if not job or job.user_id != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    job = _get_owned_job(JobService(db), job_id, current_user["id"])
+    return job_response(job)
+
+
+def _job_state(job_id: int) -> Optional[Tuple[int, JobResponse]]:
+    """
+    Propietario y estado actual del trabajo, con una sesión propia que se cierra
+    al terminar: un cliente SSE de larga duración no retiene una conexión del pool.
+    """
+    db = SessionLocal()
+    try:
+        job = JobService(db).get_job(job_id)
+        return (job.user_id, job_response(job)) if job else None
+    finally:
+        db.close()
+
+
+@router.get("/{job_id}/events", response_class=StreamingResponse, responses={200: {"content": {"text/event-stream": {}}}})
+async def job_events(job_id: int, current_user: dict = Depends(get_current_user)):
+    """
+    Canal SSE con los cambios de estado del trabajo; se cierra al terminar.
+    Cada consulta se hace en el pool de hilos.
+    """
+    state = await run_in_threadpool(_job_state, job_id)
+    if not state or state[0] != current_user["id"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    async def event_stream(job: JobResponse):
+        last_payload = None
+        while True:
+            payload = job.model_dump_json()
+            if payload != last_payload:
+                yield f"event: {job.status}\ndata: {payload}\n\n"
+                last_payload = payload
+
+            if job.status in TERMINAL_STATUSES:
+                break
+            await job_queue.wait_for_update(job_id, timeout=settings.JOB_POLL_INTERVAL)
+            state = await run_in_threadpool(_job_state, job_id)
+            if state is None:
+                break
+            job = state[1]
+
+    return StreamingResponse(
+        event_stream(state[1]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from App.Core.metrics import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Métricas en formato de texto de Prometheus (pool de conexiones, etc.).
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,69 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import List
 from App.Utils.db_sessions import get_db
 from App.Services.quiz_services import QuizService
-from App.Services.document_services import DocumentService
+from App.Services.document_services import DocumentService, DocumentNotFoundError
+from App.Services.generation_services import GenerationService
+from App.Core.job_queue import submit_job
+from App.Controllers.job_controller import job_accepted, JOB_ACCEPTED_RESPONSES
 from App.Utils.auth_utils import get_current_user
-from App.Utils.open_ai import OpenAIClient
+from App.Utils.file_responses import cached_json_response
 
 router = APIRouter(prefix="/quiz", tags=["quiz"])
 
-@router.get("/get_quiz/{document_id}")
-def get_quiz(document_id:int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    quiz = QuizService(db).get_quiz(document_id)
-    if not quiz:
-        raise HTTPException(status_code=404, details="Quiz not found")
-    
-    return {
-        "id": quiz.id,
-        "title": quiz.title,
-        "document_id": quiz.document_id,
-        "questions": [
-            {
-                "id": q.id,
-                "question_text": q.question_text,
-                "correct_option": q.correct_option,
-                "options": [opt.text for opt in q.options]
-            }
-            for q in quiz.questions
-        ]
-    }
-    
+class QuizQuestionResponse(BaseModel):
+    id: int
+    question_text: str
+    correct_option: str
+    options: List[str]
 
-@router.post("/create/{document_id}")
-async def create_quiz_for_document(document_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    document_services = DocumentService(db)
-    quiz_service = QuizService(db)
-    open_ai_client = OpenAIClient()
-    
-    document = document_services.get_document(document_id)
-    if not document:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
-    result = await open_ai_client.generate_quiz(document.content)
+class QuizResponse(BaseModel):
+    id: int
+    title: str
+    document_id: int
+    questions: List[QuizQuestionResponse]
+
+class QuizCreatedResponse(BaseModel):
+    message: str
+    cached: bool
+    quiz: QuizResponse
+
+@router.get("/get_quiz/{document_id}", response_model=QuizResponse)
+def get_quiz(document_id:int, request: Request, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """
+    Quiz vigente del documento, servido tal como se guardó (Quiz.payload) con ETag:
+    el cliente puede revalidarlo con If-None-Match y recibir un 304. El cuerpo ya
+    está serializado, así que response_model solo lo documenta.
+    """
+    snapshot = QuizService(db).get_quiz_snapshot(document_id)
+    if not snapshot:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return cached_json_response(request, snapshot.payload, snapshot.etag)
     
-    if not result or "data" not in result or "quiz" not in result["data"]:
-        raise HTTPException(status_code=500, detail="Error generating quiz")
+
+@router.post("/create/{document_id}", response_model=QuizCreatedResponse, responses=JOB_ACCEPTED_RESPONSES)
+async def create_quiz_for_document(document_id: int, force: bool = False, background: bool = False, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    if background:
+        if not DocumentService(db).get_document(document_id):
+            raise HTTPException(status_code=404, detail="Document not found")
+        job = submit_job(db, "quiz", {"force": force}, user_id=current_user["id"], document_id=document_id)
+        return job_accepted(job)
     
-    quiz_data = result["data"]["quiz"]
-    saved_quiz = quiz_service.save_quiz(quiz_data, document_id)
-    if not saved_quiz:
-        raise HTTPException(status_code=500, detail="Error saving quiz")
+    try:
+        result = await GenerationService(db).create_quiz(document_id, force=force)
+    except DocumentNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     
     return {
         "message": "Quiz created successfully",
-        "quiz": {
-            "id": saved_quiz.id,
-            "title": saved_quiz.title,
-            "questions": [
-                {
-                    "id": q.id,
-                    "question_text": q.question_text,
-                    "correct_option": q.correct_option,
-                    "options": [opt.text for opt in q.options]
-                }
-                for q in saved_quiz.questions
-            ]
-        }
+        **result
     }
-    
\ No newline at end of file
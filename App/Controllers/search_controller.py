@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+from typing import List, Optional
+from App.Utils.db_sessions import get_async_db
+from App.Utils.auth_utils import get_current_user
+from App.Services.search_services import AsyncSearchService, SOURCES, SEARCH_PAGE_SIZE, MAX_SEARCH_RESULTS
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+class SearchResult(BaseModel):
+    source: str
+    source_id: int
+    document_id: int
+    title: str
+    snippet: str
+    rank: float
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+
+@router.get("", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    source: Optional[List[str]] = Query(None, description=f"limita la búsqueda a: {', '.join(SOURCES)}"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_RESULTS),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Busca en los documentos, resúmenes, flashcards y preguntas de quiz del usuario.
+    Resultados por relevancia, uno por elemento, con los términos encontrados
+    marcados con <mark> en `snippet` (el resto del snippet va escapado como HTML).
+    """
+    invalid = set(source or []) - set(SOURCES)
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Tipo de resultado no válido: {', '.join(sorted(invalid))}")
+    try:
+        hits = await AsyncSearchService(db).search(current_user["id"], q, source, limit)
+    except Exception as e:
+        logger.error(f"Error en la búsqueda: {e}")
+        raise HTTPException(status_code=500, detail=f"Error en la búsqueda: {str(e)}")
+    return SearchResponse(query=q, results=[SearchResult(**hit._asdict()) for hit in hits])
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from App.Services.stadistics_services import StatisticsService
-from App.Utils.db_sessions import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.Services.stadistics_services import AsyncStatisticsService
+from App.Services.attempt_ingestion_services import AttemptIngestionService
+from App.Services.percentile_services import AsyncPercentileService
+from App.Services.progress_services import AsyncProgressService
+from App.Core.config import settings
+from App.Utils.db_sessions import get_async_db
 from App.Utils.auth_utils import get_current_user
 from typing import List, Dict, Optional
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 
 router = APIRouter(prefix="/statistics", tags=["Statistics"])
 
@@ -18,6 +23,35 @@ class RecordQuizAttemptRequest(BaseModel):
     answers: List[QuizAnswerRequest]
     time_taken: Optional[int] = None
     
+class BulkAttemptItem(BaseModel):
+    quiz_id: int
+    answers: List[QuizAnswerRequest]
+    time_taken: Optional[int] = None
+    completed_at: Optional[datetime] = None  # momento en que se hizo el intento sin conexión
+
+class BulkAttemptsRequest(BaseModel):
+    attempts: List[BulkAttemptItem] = Field(min_length=1, max_length=settings.ATTEMPT_BULK_MAX)
+
+class BulkAttemptResult(BaseModel):
+    index: int
+    attempt_id: Optional[int] = None
+    score: Optional[float] = None
+    correct_answers: Optional[int] = None
+    total_questions: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkAttemptsResponse(BaseModel):
+    recorded: int
+    failed: int
+    results: List[BulkAttemptResult]
+    
+class RecordAttemptResponse(BaseModel):
+    message: str
+    attempt_id: int
+    score: float
+    correct_answers: int
+    total_questions: int
+    
 class QuizAttemptResponse(BaseModel):
     id: int
     user_id: int
@@ -47,18 +81,61 @@ class QuizStatisticsResponse(BaseModel):
     average_score: float
     pass_rate: float
     difficult_questions: List[Dict]
+
+class PercentileResponse(BaseModel):
+    scope: str
+    scope_id: int
+    score: float
+    percentile_rank: float  # % de intentos con peor puntuación
+    error_bound: float      # error máximo de percentile_rank, en puntos porcentuales
+    total_attempts: int
+
+class HistogramBin(BaseModel):
+    min_score: float
+    max_score: float
+    count: int
+
+class ScoreDistributionResponse(BaseModel):
+    scope: str
+    scope_id: int
+    total_attempts: int
+    average_score: float
+    quantiles: Dict[str, Optional[float]]
+    error_bound: float      # error máximo de los cuantiles, en puntos de puntuación
+    histogram: List[HistogramBin]
+
+class ProgressPointResponse(BaseModel):
+    period_start: str
+    attempts: int
+    average_score: Optional[float]
+    best_score: Optional[float]
+    total_time: int
+
+class StreakResponse(BaseModel):
+    current_streak: int
+    longest_streak: int
+    active_days: int
+    last_active_day: Optional[str]
+
+class SubjectTrendResponse(BaseModel):
+    subject_id: int
+    subject_name: str
+    attempts: int
+    average_score: Optional[float]
+    slope: Optional[float]  # variación de la nota media por periodo
+    series: List[ProgressPointResponse]
  
-@router.post("/record_attempt", response_model=Dict, status_code=status.HTTP_201_CREATED)   
+@router.post("/record_attempt", response_model=RecordAttemptResponse, status_code=status.HTTP_201_CREATED)   
 async def record_quiz_attempt(
     request: RecordQuizAttemptRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     if current_user["id"] != request.user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Has not permission to register this attempt.")
     
     try:
-        statistics_service = StatisticsService(db)
+        ingestion_service = AttemptIngestionService(db)
         answers_dict = [
             {
                 "question_id": ans.question_id,
@@ -67,7 +144,8 @@ async def record_quiz_attempt(
             for ans in request.answers
         ]
         
-        attempt = statistics_service.record_quiz_attempt(
+        # Se corrige con la solución en caché y se escribe junto a los intentos concurrentes
+        attempt = await ingestion_service.record_attempt(
             user_id=request.user_id,
             quiz_id=request.quiz_id,
             answers=answers_dict,
@@ -76,10 +154,7 @@ async def record_quiz_attempt(
         
         return {
             "message": "Intento registrado exitosamente.",
-            "attempt_id": attempt.id,
-            "score": attempt.score,
-            "correct_answers": attempt.correct_answers,
-            "total_questions": attempt.total_questions
+            **attempt
         }
     except ValueError as e:
         raise HTTPException(
@@ -91,16 +166,54 @@ async def record_quiz_attempt(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error interno del servidor: {str(e)}"
         )
+
+@router.post("/record_attempts", response_model=BulkAttemptsResponse, status_code=status.HTTP_201_CREATED)
+async def record_quiz_attempts(
+    request: BulkAttemptsRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Registra en una sola petición los intentos que un cliente acumuló sin conexión.
+    Cada intento se acepta o rechaza por separado.
+    """
+    try:
+        results = await AttemptIngestionService(db).record_attempts(
+            current_user["id"],
+            [
+                {
+                    "quiz_id": item.quiz_id,
+                    "answers": [ans.model_dump() for ans in item.answers],
+                    "time_taken": item.time_taken,
+                    "completed_at": item.completed_at
+                }
+                for item in request.attempts
+            ]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+    items = [
+        BulkAttemptResult(index=index, error=str(result)) if isinstance(result, Exception)
+        else BulkAttemptResult(index=index, **result)
+        for index, result in enumerate(results)
+    ]
+    failed = sum(1 for item in items if item.error)
+    return BulkAttemptsResponse(recorded=len(items) - failed, failed=failed, results=items)
+
 @router.get("/user_statistics", response_model=UserStatisticsResponse)
 async def get_user_statistics(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autenticado.")
     try:
-        statistics_service = StatisticsService(db)
-        stats = statistics_service.get_user_statistics(current_user["id"])
+        statistics_service = AsyncStatisticsService(db)
+        stats = await statistics_service.get_user_statistics(current_user["id"])
         return UserStatisticsResponse(**stats)
     except Exception as e:
         raise HTTPException(
@@ -110,15 +223,15 @@ async def get_user_statistics(
         
 @router.get("/subject/progress", response_model=List[ProgressBySubjectResponse])
 async def get_progress_by_subject(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ) -> List[ProgressBySubjectResponse]:
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized.")
     try:
-        statistics_service = StatisticsService(db)
+        statistics_service = AsyncStatisticsService(db)
         user_id = current_user["id"]
-        progress = statistics_service.get_user_progress_by_subject(user_id)
+        progress = await statistics_service.get_user_progress_by_subject(user_id)
         return [ProgressBySubjectResponse(**item)for item in progress]
 
     except ValueError as e:
@@ -135,14 +248,14 @@ async def get_progress_by_subject(
 @router.get("/quiz/{quiz_id}/statistics", response_model=QuizStatisticsResponse)    
 async def get_quiz_statistics(
     quiz_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ) -> QuizStatisticsResponse:
     if not current_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized.")
     try:
-        statistics_service = StatisticsService(db)
-        stats = statistics_service.get_quiz_statistics(quiz_id)
+        statistics_service = AsyncStatisticsService(db)
+        stats = await statistics_service.get_quiz_statistics(quiz_id)
         return QuizStatisticsResponse(**stats)
     except ValueError as e:
         raise HTTPException(
@@ -154,4 +267,98 @@ async def get_quiz_statistics(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
-        
\ No newline at end of file
+        
+
+
+async def _rollup_call(call):
+    try:
+        return await call
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@router.get("/quiz/{quiz_id}/percentile", response_model=PercentileResponse)
+async def get_quiz_percentile(
+    quiz_id: int,
+    score: Optional[float] = Query(None, ge=0, le=100, description="Por defecto, el último intento del usuario"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+) -> PercentileResponse:
+    """
+    "Superaste al X% de los intentos" en este quiz.
+    """
+    stats = await _rollup_call(AsyncPercentileService(db).get_quiz_percentile(quiz_id, current_user["id"], score))
+    return PercentileResponse(**stats)
+
+@router.get("/subject/{subject_id}/percentile", response_model=PercentileResponse)
+async def get_subject_percentile(
+    subject_id: int,
+    score: Optional[float] = Query(None, ge=0, le=100, description="Por defecto, el último intento del usuario"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+) -> PercentileResponse:
+    stats = await _rollup_call(
+        AsyncPercentileService(db).get_subject_percentile(subject_id, current_user["id"], score)
+    )
+    return PercentileResponse(**stats)
+
+@router.get("/quiz/{quiz_id}/distribution", response_model=ScoreDistributionResponse)
+async def get_quiz_distribution(
+    quiz_id: int,
+    bin_width: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+) -> ScoreDistributionResponse:
+    stats = await _rollup_call(AsyncPercentileService(db).get_quiz_distribution(quiz_id, bin_width))
+    return ScoreDistributionResponse(**stats)
+
+@router.get("/subject/{subject_id}/distribution", response_model=ScoreDistributionResponse)
+async def get_subject_distribution(
+    subject_id: int,
+    bin_width: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+) -> ScoreDistributionResponse:
+    stats = await _rollup_call(AsyncPercentileService(db).get_subject_distribution(subject_id, bin_width))
+    return ScoreDistributionResponse(**stats)
+
+@router.get("/progress/timeline", response_model=List[ProgressPointResponse])
+async def get_progress_timeline(
+    period: str = Query("day", pattern="^(day|week)$"),
+    points: int = Query(30, ge=1, le=366),
+    subject_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+) -> List[ProgressPointResponse]:
+    """
+    Evolución de los últimos `points` días o semanas (UTC), con los periodos sin intentos a 0.
+    """
+    series = await _rollup_call(
+        AsyncProgressService(db).get_timeline(current_user["id"], period, points, subject_id)
+    )
+    return [ProgressPointResponse(**item) for item in series]
+
+@router.get("/progress/streak", response_model=StreakResponse)
+async def get_progress_streak(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+) -> StreakResponse:
+    streak = await _rollup_call(AsyncProgressService(db).get_streak(current_user["id"]))
+    return StreakResponse(**streak)
+
+@router.get("/progress/trends", response_model=List[SubjectTrendResponse])
+async def get_progress_trends(
+    period: str = Query("week", pattern="^(day|week)$"),
+    points: int = Query(12, ge=2, le=260),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user)
+) -> List[SubjectTrendResponse]:
+    """
+    Serie y pendiente de la nota media por materia en los últimos `points` periodos.
+    """
+    trends = await _rollup_call(AsyncProgressService(db).get_subject_trends(current_user["id"], period, points))
+    return [SubjectTrendResponse(**item) for item in trends]
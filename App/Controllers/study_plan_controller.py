@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
 from typing import List, Optional
 import logging
 import traceback
 from App.Utils.db_sessions import get_db
 from App.Utils.auth_utils import get_current_user
 from App.Services.study_plan_services import StudyPlanService
-from App.Services.document_services import DocumentService
-from App.Utils.open_ai import OpenAIClient
+from App.Services.document_services import DocumentService, DocumentNotFoundError
+from App.Services.generation_services import GenerationService, VALID_STUDY_PLAN_LEVELS
+from App.Core.job_queue import submit_job
+from App.Controllers.job_controller import job_accepted, JOB_ACCEPTED_RESPONSES
+from App.Utils.pagination import InvalidCursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
 
 logger = logging.getLogger(__name__)
 
@@ -18,23 +23,41 @@ router = APIRouter(
 )
 
 
-@router.post("/create/{document_id}/{level}", status_code=status.HTTP_201_CREATED)
+class StudyPlanResponse(BaseModel):
+    """
+    Plan de estudio; se construye directamente desde CustomStudyPlan.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    level: str
+    content: dict
+    user_id: int
+    document_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+@router.post(
+    "/create/{document_id}/{level}",
+    response_model=StudyPlanResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses=JOB_ACCEPTED_RESPONSES
+)
 async def create_study_plan(
     document_id: int,
     level: str,
+    force: bool = False,
+    background: bool = False,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
     
-    plan_services = StudyPlanService(db)
-    document_service = DocumentService(db)
-    open_ai_service = OpenAIClient()
-    
-    valid_levels = ["basico", "intermedio", "avanzado"]
-    if level.lower() not in valid_levels:
+    if level.lower() not in VALID_STUDY_PLAN_LEVELS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Nivel inválido. Debe ser uno de: {', '.join(valid_levels)}"
+            detail=f"Nivel inválido. Debe ser uno de: {', '.join(VALID_STUDY_PLAN_LEVELS)}"
         )
     try:
         user_id = current_user["id"]
@@ -46,46 +69,28 @@ async def create_study_plan(
         
         logger.info(f"Usuario {user_id} creando plan de estudio nivel {level} para documento {document_id}")
         
-        document = document_service.get_document(document_id)
-        if not document:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Documento no encontrado"
-            )
+        if background:
+            if not DocumentService(db).get_document(document_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Documento no encontrado"
+                )
+            job = submit_job(db, "study_plan", {"level": level.lower(), "force": force}, user_id=user_id, document_id=document_id)
+            return job_accepted(job)
         
-        logger.info(f"Documento {document_id} encontrado, generando plan...")
-        
-        ai_response = await open_ai_service.study_plan_personalized(
-            document_content=document.content,
-            level_plan=level
-        )
-        
-        logger.info(f"Respuesta de IA recibida: {ai_response.keys()}")
-        
-        # Verificar estructura de respuesta
-        if not ai_response or "data" not in ai_response:
-            logger.error(f"Respuesta inválida de IA: {ai_response}")
-            raise ValueError("Respuesta inválida del servicio de IA")
-        
-        if "study_plan" not in ai_response["data"]:
-            logger.error(f"Falta campo 'study_plan' en data: {ai_response['data']}")
-            raise ValueError("El plan de estudio no fue generado correctamente")
-        
-        ai_response_data = ai_response["data"]["study_plan"]
-        logger.info(f"Plan de estudio extraído correctamente: {list(ai_response_data.keys())}")
-        
-        study_plan = plan_services.create_study_plan(
-            title=f"Plan de estudio - {level.capitalize()}",
-            level=level,
-            content=ai_response_data,
-            user_id=user_id,
-            document_id=document.id
-        )
+        study_plan = await GenerationService(db).create_study_plan(document_id, level, user_id, force=force)
         
         logger.info(f"Plan de estudio {study_plan.id} creado exitosamente")
         
         return study_plan
             
+    except HTTPException:
+        raise
+    except DocumentNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Documento no encontrado"
+        )
     except ValueError as ve:
         logger.error(f"Error de validación: {ve}")
         raise HTTPException(
@@ -107,7 +112,42 @@ async def create_study_plan(
         )
         
         
-@router.get("/{plan_id}", status_code=status.HTTP_200_OK)
+# Debe declararse antes de "/{plan_id}": si no, "user" no pasa la validación del id
+@router.get("/user", response_model=List[StudyPlanResponse], status_code=status.HTTP_200_OK)
+def get_study_plans_by_user(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Planes del usuario, del más reciente al más antiguo. Si hay más, el cursor de la
+    página siguiente va en la cabecera X-Next-Cursor (`?cursor=`).
+    """
+    plan_services = StudyPlanService(db)
+
+    try:
+        page = plan_services.get_study_plans_by_user(current_user["id"], cursor=cursor, limit=limit)
+        if page.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+        return page.items
+
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error inesperado en get_study_plans_by_user: {e}")
+        logger.error(f"Traceback completo:\n{traceback.format_exc()}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@router.get("/{plan_id}", response_model=StudyPlanResponse, status_code=status.HTTP_200_OK)
 def get_study_plan(
     plan_id: int,
     db: Session = Depends(get_db),
@@ -133,7 +173,7 @@ def get_study_plan(
             detail=f"Error interno del servidor: {str(e)}"
         )
         
-@router.get("/by-document/{document_id}/{level}", status_code=status.HTTP_200_OK)
+@router.get("/by-document/{document_id}/{level}", response_model=Optional[StudyPlanResponse], status_code=status.HTTP_200_OK)
 async def get_study_plan_by_document(
     document_id: int,
     level: str,
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import Optional
-from App.Utils.db_sessions import get_db
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Optional
+from App.Utils.db_sessions import get_db, get_async_db
 from App.Utils.auth_utils import get_current_user
-from App.Services.subject_services import SubjectService
+from App.Services.subject_services import AsyncSubjectService, DOCUMENTS_PAGE_SIZE
+from App.Services.deletion_services import DeletionService, remove_stored_files
+from App.Utils.pagination import InvalidCursor, NEXT_CURSOR_HEADER
 from sqlalchemy.exc import IntegrityError
 import logging
 
@@ -15,22 +18,59 @@ router = APIRouter(prefix="/subject", tags=["subject"])
 class SubjectCreate(BaseModel):
     name: str
     description: Optional[str] = None
+    pregenerate: Optional[bool] = None
+    
+class PregenerateRequest(BaseModel):
+    enabled: Optional[bool] = None
+    
+class DocumentListItem(BaseModel):
+    """
+    Documento en listados: metadatos sin el texto completo.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str
+    subject_id: int
+    file_path: str
+    file_name: Optional[str] = None
+    audio_url: Optional[str] = None
+
+class SubjectResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    pregenerate: Optional[bool] = None
+
+class SubjectListItem(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+
+class PregenerateResponse(BaseModel):
+    id: int
+    pregenerate: Optional[bool] = None
+
+class SubjectDeletedResponse(BaseModel):
+    message: str
+    id: int
     
 
-@router.post("/create")
+@router.post("/create", response_model=SubjectResponse)
 async def create_subject(
     subject_data: SubjectCreate, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: dict = Depends(get_current_user)
 ):
     user_id = current_user["id"]
-    subject_service = SubjectService(db)
+    subject_service = AsyncSubjectService(db)
     
     try:
-        new_subject = subject_service.create_subject(
+        new_subject = await subject_service.create_subject(
             subject_data.name, 
             subject_data.description, 
-            user_id
+            user_id,
+            subject_data.pregenerate
         )
         
         if not new_subject:
@@ -40,29 +80,30 @@ async def create_subject(
             "id": new_subject.id,
             "name": new_subject.name,
             "description": new_subject.description,
+            "pregenerate": new_subject.pregenerate,
         }
         
     except ValueError as e:
         # Errores esperados (por ejemplo, subject ya existe)
         raise HTTPException(status_code=400, detail=str(e))
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"IntegrityError creando subject para user {user_id}: {e}")
         raise HTTPException(status_code=400, detail="Datos inconsistentes (constraint).")
     except Exception as e:
         logger.exception(f"Error inesperado creando subject para user {user_id}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
-@router.get("/user")
+@router.get("/user", response_model=List[SubjectListItem])
 async def get_subjects_by_user(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user)
 ):
     user_id = current_user["id"]
-    subject_service = SubjectService(db)
+    subject_service = AsyncSubjectService(db)
     
     try:
-        subjects = subject_service.get_subjects_by_user(user_id)
+        subjects = await subject_service.get_subjects_by_user(user_id)
         if not subjects:
             raise HTTPException(status_code=404, detail="No subjects found for this user")
         
@@ -78,24 +119,67 @@ async def get_subjects_by_user(
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
     
-@router.get("/{subject_id}/documents")
+@router.get("/{subject_id}/documents", response_model=List[DocumentListItem])
 async def get_documents_by_subject(
     subject_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DOCUMENTS_PAGE_SIZE, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
     current_user: dict = Depends(get_current_user),
 ): 
-    subject_service = SubjectService(db)
+    """
+    El cuerpo sigue siendo la lista de documentos; si hay más, el cursor de la
+    página siguiente va en la cabecera X-Next-Cursor (`?cursor=`).
+    """
+    subject_service = AsyncSubjectService(db)
     try:
-        subject = subject_service.get_subject_by_id(subject_id)
-        if not subject:
-            raise HTTPException(status_code=404, detail="Subject not found")
-
-        return subject.documents
+        page = await subject_service.get_documents_by_subject(subject_id, cursor=cursor, limit=limit)
+        if page.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+        return [DocumentListItem.model_validate(document) for document in page.items]
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
-@router.get("/test")
+@router.put("/{subject_id}/pregenerate", response_model=PregenerateResponse)
+async def set_subject_pregenerate(
+    subject_id: int,
+    request: PregenerateRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: dict = Depends(get_current_user),
+):
+    subject_service = AsyncSubjectService(db)
+    subject = await subject_service.get_subject_by_id(subject_id)
+    if not subject or subject.user_id != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Subject not found")
+    
+    subject = await subject_service.set_pregenerate(subject_id, request.enabled)
+    return {
+        "id": subject.id,
+        "pregenerate": subject.pregenerate,
+    }
+
+@router.delete("/{subject_id}", response_model=SubjectDeletedResponse)
+def delete_subject(
+    subject_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Borra la materia con sus documentos y todo lo que depende de ellos.
+    """
+    try:
+        files = DeletionService(db).delete_subject(subject_id, current_user["id"])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    background_tasks.add_task(remove_stored_files, files)
+    return {"message": "Subject deleted", "id": subject_id}
+
+@router.get("/test", response_model=Dict[str, str])
 def test():
     return {"message": "Subject controller is working!"}
\ No newline at end of file
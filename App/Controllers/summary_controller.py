@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
 from App.Utils.db_sessions import get_db
 from App.Services.summary_services import SummaryService
-from App.Services.document_services import DocumentService
+from App.Services.document_services import DocumentService, DocumentNotFoundError
+from App.Services.generation_services import GenerationService
+from App.Core.job_queue import submit_job
+from App.Controllers.job_controller import job_accepted, JOB_ACCEPTED_RESPONSES
 from App.Utils.open_ai import OpenAIClient
 from App.Utils.auth_utils import get_current_user
 import logging
@@ -11,76 +16,58 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/summary", tags=["summary"])
 
-@router.get("/resumen/{document_id}")
+class SummaryResponse(BaseModel):
+    id: int
+    content: str
+    document_id: int
+
+class SummaryGenerationMeta(BaseModel):
+    model: Optional[str] = None
+    response_time: Optional[float] = None
+    tokens_used: int = 0
+
+class SummaryCreatedResponse(BaseModel):
+    id: int
+    content: str
+    document_id: int
+    cached: bool
+    meta: Optional[SummaryGenerationMeta] = None  # solo si se acaba de generar
+
+@router.get("/resumen/{document_id}", response_model=SummaryResponse)
 def get_summary(document_id: int, db: Session = Depends(get_db),current_user: dict = Depends(get_current_user)):
-    summary = SummaryService(db).get_summary_document_id(document_id)
+    summary = SummaryService(db).get_summary_payload(document_id)
     if not summary:
         raise HTTPException(status_code=404, detail="Summary not found")
     return summary
 
-@router.post("/create/{document_id}")
-async def create_summary(document_id: int, db: Session = Depends(get_db),current_user: dict = Depends(get_current_user)):
+@router.post(
+    "/create/{document_id}",
+    response_model=SummaryCreatedResponse,
+    response_model_exclude_unset=True,
+    responses=JOB_ACCEPTED_RESPONSES
+)
+async def create_summary(document_id: int, force: bool = False, background: bool = False, db: Session = Depends(get_db),current_user: dict = Depends(get_current_user)):
     try:
-        document_service = DocumentService(db)
-        summary_service = SummaryService(db)
-        openai_client = OpenAIClient()
-        
         logger.info(f"📄 Creando resumen para documento {document_id}")
         
-        document = document_service.get_document(document_id)
-        
-        if not document:
-            logger.error(f"❌ Documento {document_id} no encontrado")
-            raise HTTPException(status_code=404, detail="Document not found")
-        
-        logger.info(f"📝 Documento encontrado: {document.title} ({len(document.content)} caracteres)")
-        
-        # Generar resumen
-        logger.info(f"🤖 Enviando contenido al modelo de IA...")
-        result = await openai_client.generate_summary(document.content)
-        
-        if not result:
-            logger.error("❌ El resultado del modelo es None")
-            raise HTTPException(status_code=500, detail="El modelo no devolvió ningún resultado")
-        
-        if "data" not in result:
-            logger.error(f"❌ Falta 'data' en resultado: {result}")
-            raise HTTPException(status_code=500, detail="Formato de respuesta inválido del modelo")
-        
-        if "summary" not in result["data"]:
-            logger.error(f"❌ Falta 'summary' en data: {result['data']}")
-            raise HTTPException(status_code=500, detail="El modelo no generó un resumen")
-        
-        summary_content = result["data"]["summary"]
-        logger.info(f"✅ Resumen generado: {len(summary_content)} caracteres")
-        
-        # Guardar el resumen
-        logger.info(f"💾 Guardando resumen en la base de datos...")
-        saved_summary = summary_service.save_summary(summary_content, document_id)
-        
-        if not saved_summary:
-            logger.error("❌ Error al guardar el resumen en la BD")
-            raise HTTPException(status_code=500, detail="Error saving summary")
-        
-        logger.info(f"✅ Resumen guardado exitosamente con ID {saved_summary.id}")
-        
-        return {
-            "id": saved_summary.id,
-            "content": saved_summary.content,
-            "document_id": saved_summary.document_id,
-            "meta": {
-                "model": result.get("model"),
-                "response_time": result.get("response_time"),
-                "tokens_used": result.get("usage", {}).get("total_tokens", 0)
-            }
-        }
+        if background:
+            if not DocumentService(db).get_document(document_id):
+                raise HTTPException(status_code=404, detail="Document not found")
+            job = submit_job(db, "summary", {"force": force}, user_id=current_user["id"], document_id=document_id)
+            return job_accepted(job)
         
+        return await GenerationService(db).create_summary(document_id, force=force)
     
+    except HTTPException:
+        raise
+    except DocumentNotFoundError as e:
+        logger.error(f"❌ Documento {document_id} no encontrado")
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:        
         logger.error(f"❌ Error inesperado en create_summary: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
 
-@router.get("/test-model")
+@router.get("/test-model", response_model=Dict[str, Any])
 async def test_model():
     """Endpoint de prueba para verificar que el modelo responde correctamente"""
     try:
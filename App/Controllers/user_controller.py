@@ -1,7 +1,8 @@
 from App.Utils.auth_utils import get_current_user
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from App.Services.auth_services import AuthService
+from App.Services.deletion_services import DeletionService, remove_stored_files
 from App.Utils.db_sessions import get_db
 from pydantic import BaseModel
 
@@ -22,8 +23,20 @@ class UserDataResponse(BaseModel):
     last_name: str
     email: str
 
+class UserProfile(BaseModel):
+    name: str
+    last_name: str
+    email: str
+
+class UserEditResponse(BaseModel):
+    message: str
+    user: UserProfile
+
+class UserMessageResponse(BaseModel):
+    message: str
 
-@router.get("/data")
+
+@router.get("/data", response_model=UserDataResponse)
 def userData(db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     auth_service = AuthService(db)
     user_id = current_user["id"]
@@ -35,7 +48,7 @@ def userData(db: Session = Depends(get_db), current_user: dict = Depends(get_cur
         email=user.email
     )
 
-@router.put("/edit")
+@router.put("/edit", response_model=UserEditResponse)
 def editUser(request: UserEditRequest, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     auth_service = AuthService(db)
     try:
@@ -53,7 +66,7 @@ def editUser(request: UserEditRequest, db: Session = Depends(get_db), current_us
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
         
-@router.put("/change_password")
+@router.put("/change_password", response_model=UserMessageResponse)
 def change_password(request: PasswordChangeRequest, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     auth_service = AuthService(db)
     try:
@@ -61,4 +74,16 @@ def change_password(request: PasswordChangeRequest, db: Session = Depends(get_db
         auth_service.change_password(user_id, request.old_password, request.new_password)
         return {"message": "Password changed successfully"}
     except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/delete", response_model=UserMessageResponse)
+def delete_user(background_tasks: BackgroundTasks, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    """
+    Borra la cuenta del usuario autenticado y todos sus datos.
+    """
+    try:
+        files = DeletionService(db).delete_user(current_user["id"])
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    background_tasks.add_task(remove_stored_files, files)
+    return {"message": "User deleted successfully"}
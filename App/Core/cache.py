@@ -0,0 +1,309 @@
+import json
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+from App.Core.config import settings
+from App.Core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cambia si cambia el formato de los valores guardados (las claves antiguas caducan solas)
+KEY_PREFIX = "leviatan:v2:"
+
+cache_requests = metrics.counter(
+    "cache_requests_total",
+    "Lecturas de la caché por tipo de entrada y resultado (hit, miss)"
+)
+cache_backend_errors = metrics.counter(
+    "cache_backend_errors_total",
+    "Errores de la caché compartida (la lectura sigue contra la base de datos)"
+)
+
+
+def document_key(document_id: int) -> str:
+    return f"document:{document_id}"
+
+
+def quiz_key(document_id: int) -> str:
+    return f"quiz:document:{document_id}"
+
+
+def flashcards_key(document_id: int) -> str:
+    return f"flashcards:document:{document_id}"
+
+
+def summary_key(document_id: int) -> str:
+    return f"summary:document:{document_id}"
+
+
+class LocalCache:
+    """
+    LRU con caducidad en memoria del proceso. Los valores se comparten entre
+    peticiones: quien los lee no debe modificarlos.
+    """
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if time.monotonic() - cached[1] >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return cached[0]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RespError(Exception):
+    pass
+
+
+class RespClient:
+    """
+    Cliente mínimo del protocolo de Redis (RESP2) con los comandos que usa la
+    caché: GET, SET ... EX, DEL y PING. Sirve contra Redis, Valkey o el servidor
+    local de scripts/cache_server.py, sin depender del paquete redis.
+    Una conexión por hilo, abierta al primer uso y reabierta tras un error.
+    """
+    def __init__(self, host: str, port: int, db: int = 0, password: Optional[str] = None, timeout: float = 0.1):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 0.1) -> "RespClient":
+        """
+        redis://[:password@]host[:port][/db]
+        """
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"CACHE_URL no soportada: {url!r} (se espera redis://host:puerto/db)")
+        db = int(parsed.path.lstrip("/") or 0)
+        password = unquote(parsed.password) if parsed.password else None
+        return cls(parsed.hostname or "localhost", parsed.port or 6379, db, password, timeout)
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = (sock, sock.makefile("rb"))
+            self._local.connection = connection
+            if self.password:
+                self._send(connection, ("AUTH", self.password))
+            if self.db:
+                self._send(connection, ("SELECT", str(self.db)))
+        return connection
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        self._local.connection = None
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+
+    def execute(self, *args) -> Any:
+        try:
+            return self._send(self._connection(), args)
+        except (OSError, RespError):
+            # La conexión puede quedar a medio leer: se descarta
+            self.close()
+            raise
+
+    def _send(self, connection, args) -> Any:
+        sock, reader = connection
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        sock.sendall(b"".join(parts))
+        return self._read_reply(reader)
+
+    def _read_reply(self, reader) -> Any:
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise RespError("Conexión cerrada por el servidor de caché")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RespError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length == -1 else [self._read_reply(reader) for _ in range(length)]
+        raise RespError(f"Respuesta no válida: {line!r}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.execute("GET", key)
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.execute("SET", key, value, "EX", ttl)
+
+    def delete(self, keys: List[str]) -> int:
+        return self.execute("DEL", *keys)
+
+    def ping(self) -> bool:
+        return self.execute("PING") == "PONG"
+
+
+class ReadThroughCache:
+    """
+    Caché de lectura en dos niveles para datos que casi nunca cambian (documentos,
+    quizzes, flashcards y resúmenes por documento):
+
+    - En memoria del proceso (LocalCache), siempre.
+    - Compartida entre procesos e instancias (RespClient), si hay CACHE_URL.
+
+    Los valores se guardan como JSON. Cada escritura en la base de datos llama a
+    `invalidate` con las claves afectadas después de su commit. Sin caché compartida,
+    otro proceso puede servir un valor antiguo durante CACHE_LOCAL_TTL segundos como
+    mucho; con ella, la copia local de los demás procesos caduca igual. Si la caché
+    compartida falla, se deja de usar durante CACHE_RETRY_SECONDS y las lecturas
+    van a la base de datos.
+    """
+    def __init__(
+        self,
+        local: LocalCache,
+        shared: Optional[RespClient] = None,
+        ttl: int = 300,
+        retry_seconds: float = 30,
+        enabled: bool = True
+    ):
+        self.local = local
+        self.shared = shared
+        self.ttl = ttl
+        self.retry_seconds = retry_seconds
+        self.enabled = enabled
+        self._shared_down_until = 0.0
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def version(self) -> int:
+        """
+        Se toma antes de leer de la base de datos y se pasa a `set`: si entre tanto
+        hubo una invalidación, el valor leído puede ser anterior a ella y no se guarda.
+        """
+        return self._invalidations
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        kind = key.split(":", 1)[0]
+        value = self.local.get(key)
+        if value is None and self._shared_available():
+            raw = self._shared_call(self.shared.get, KEY_PREFIX + key)
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+        cache_requests.inc(labels={"kind": kind, "result": "miss" if value is None else "hit"})
+        return value
+
+    def set(self, key: str, value: Any, version: Optional[int] = None) -> None:
+        if not self.enabled or value is None:
+            return
+        if version is not None and version != self._invalidations:
+            return
+        self.local.set(key, value)
+        if self._shared_available():
+            raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self._shared_call(self.shared.set, KEY_PREFIX + key, raw, self.ttl)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor en caché o lo lee con `loader` y lo guarda. None no se guarda.
+        """
+        value = self.get(key)
+        if value is None:
+            version = self.version()
+            value = loader()
+            self.set(key, value, version)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        if not keys:
+            return
+        with self._lock:
+            self._invalidations += 1
+        self.local.delete(list(keys))
+        if self._shared_available():
+            self._shared_call(self.shared.delete, [KEY_PREFIX + key for key in keys])
+
+    def clear_local(self) -> None:
+        self.local.clear()
+
+    def _shared_available(self) -> bool:
+        return self.shared is not None and time.monotonic() >= self._shared_down_until
+
+    def _shared_call(self, method, *args) -> Any:
+        try:
+            return method(*args)
+        except (OSError, RespError) as e:
+            cache_backend_errors.inc()
+            self._shared_down_until = time.monotonic() + self.retry_seconds
+            logger.warning(f"⚠️ Caché compartida no disponible ({e}); se reintenta en {self.retry_seconds:.0f} s")
+            return None
+
+
+def invalidate_document(document_id: int) -> None:
+    """
+    Descarta todo lo cacheado de un documento (al borrarlo o cambiar sus datos).
+    """
+    cache.invalidate(
+        document_key(document_id),
+        quiz_key(document_id),
+        flashcards_key(document_id),
+        summary_key(document_id)
+    )
+
+
+def _build_cache() -> ReadThroughCache:
+    shared = RespClient.from_url(settings.CACHE_URL, settings.CACHE_TIMEOUT) if settings.CACHE_URL else None
+    return ReadThroughCache(
+        LocalCache(settings.CACHE_SIZE, settings.CACHE_LOCAL_TTL),
+        shared,
+        ttl=settings.CACHE_TTL,
+        retry_seconds=settings.CACHE_RETRY_SECONDS,
+        enabled=settings.CACHE_ENABLED
+    )
+
+
+cache = _build_cache()
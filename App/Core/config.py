@@ -28,11 +28,85 @@ class Settings:
         f"postgresql://{os.getenv('USER_DB', 'postgres')}:{os.getenv('USER_DB_PASSWORD', '123456')}@localhost/{os.getenv('DB_NAME', 'leviatan_project')}"
     )
     
+    # Pool de conexiones y límites por sentencia (Postgres)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    DB_APPLICATION_NAME: str = os.getenv("DB_APPLICATION_NAME", "leviatan-backend")
+    
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
     
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-    
+
+    # Cola de trabajos asíncronos (generación con IA)
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_SIZE: int = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+    JOB_STALE_SECONDS: int = int(os.getenv("JOB_STALE_SECONDS", "900"))
+    # Un trabajo en ejecución renueva updated_at cada JOB_HEARTBEAT_INTERVAL segundos
+    # (menor que JOB_STALE_SECONDS) y los trabajos sin latido se recuperan cada JOB_RECOVERY_INTERVAL
+    JOB_HEARTBEAT_INTERVAL: float = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "60"))
+    JOB_RECOVERY_INTERVAL: float = float(os.getenv("JOB_RECOVERY_INTERVAL", "60"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+    # Pre-generación de resumen, flashcards, quiz y audio tras la ingesta
+    PREGENERATE_ARTIFACTS: bool = os.getenv("PREGENERATE_ARTIFACTS", "False").lower() == "true"
+    PREGENERATE_CONCURRENCY: int = int(os.getenv("PREGENERATE_CONCURRENCY", "1"))
+
+    # Texto a voz: motor ("gtts" u "offline"), paralelismo y límites
+    TTS_BACKEND: str = os.getenv("TTS_BACKEND", "gtts")
+    TTS_LANG: str = os.getenv("TTS_LANG", "es")
+    TTS_MAX_WORKERS: int = int(os.getenv("TTS_MAX_WORKERS", "4"))
+    TTS_CHUNK_CHARS: int = int(os.getenv("TTS_CHUNK_CHARS", "1000"))
+    TTS_MAX_CHARS: int = int(os.getenv("TTS_MAX_CHARS", "200000"))
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", str(pathlib.Path("Public").resolve() / "audio" / "chunks"))
+
+    # Ingesta de intentos de quiz: caché de soluciones y escritura en lote
+    ANSWER_KEY_CACHE_SIZE: int = int(os.getenv("ANSWER_KEY_CACHE_SIZE", "512"))
+    ANSWER_KEY_CACHE_TTL: float = float(os.getenv("ANSWER_KEY_CACHE_TTL", "600"))
+    ATTEMPT_BATCH_SIZE: int = int(os.getenv("ATTEMPT_BATCH_SIZE", "200"))
+    ATTEMPT_BATCH_MAX_DELAY: float = float(os.getenv("ATTEMPT_BATCH_MAX_DELAY", "0.05"))
+    ATTEMPT_QUEUE_SIZE: int = int(os.getenv("ATTEMPT_QUEUE_SIZE", "5000"))
+    ATTEMPT_BULK_MAX: int = int(os.getenv("ATTEMPT_BULK_MAX", "500"))
+
+    # Escritura en lote de los mensajes del chat
+    CHAT_BATCH_SIZE: int = int(os.getenv("CHAT_BATCH_SIZE", "100"))
+    CHAT_BATCH_MAX_DELAY: float = float(os.getenv("CHAT_BATCH_MAX_DELAY", "0.02"))
+    CHAT_QUEUE_SIZE: int = int(os.getenv("CHAT_QUEUE_SIZE", "2000"))
+
+    # Retención del chat: los mensajes con más de CHAT_RETENTION_DAYS días se archivan comprimidos
+    CHAT_RETENTION_DAYS: int = int(os.getenv("CHAT_RETENTION_DAYS", "180"))
+    CHAT_ARCHIVE_BATCH_SIZE: int = int(os.getenv("CHAT_ARCHIVE_BATCH_SIZE", "500"))
+    CHAT_ARCHIVE_CODEC: str = os.getenv("CHAT_ARCHIVE_CODEC", "zstd")  # "zstd" (si está instalado) o "gzip"
+
+    # Compresión de columnas de texto grandes (CompressedText / CompressedJSON)
+    COMPRESSION_CODEC: str = os.getenv("COMPRESSION_CODEC", "zlib")  # "zlib" o "zstd" (si está instalado)
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "256"))  # bytes; por debajo se guarda tal cual
+
+    # Almacén de archivos por contenido (subidas y texto extraído), ver App/Utils/blob_store.py
+    BLOB_STORE_ROOT: str = os.getenv("BLOB_STORE_ROOT", str(pathlib.Path("Public").resolve() / "blobs"))
+
+    # Búsqueda de texto (App/Services/search_services.py)
+    SEARCH_LANGUAGE: str = os.getenv("SEARCH_LANGUAGE", "spanish")  # configuración de texto de Postgres
+    SEARCH_CHUNK_CHARS: int = int(os.getenv("SEARCH_CHUNK_CHARS", "2000"))  # caracteres por fragmento indexado
+
+    # Caché de lectura de documentos, quizzes, flashcards y resúmenes (App/Core/cache.py)
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+    CACHE_URL: str = os.getenv("CACHE_URL", "")  # redis://host:6379/0 para compartirla entre procesos; vacío = solo en memoria
+    CACHE_SIZE: int = int(os.getenv("CACHE_SIZE", "2048"))  # entradas en memoria por proceso
+    CACHE_LOCAL_TTL: float = float(os.getenv("CACHE_LOCAL_TTL", "60"))
+    CACHE_TTL: int = int(os.getenv("CACHE_TTL", "300"))  # caché compartida
+    CACHE_TIMEOUT: float = float(os.getenv("CACHE_TIMEOUT", "0.1"))
+    CACHE_RETRY_SECONDS: float = float(os.getenv("CACHE_RETRY_SECONDS", "30"))
+
+    # Caché de metadatos (tamaño, ETag) de los archivos servidos
+    FILE_META_CACHE_TTL: float = float(os.getenv("FILE_META_CACHE_TTL", "60"))
+    FILE_META_CACHE_SIZE: int = int(os.getenv("FILE_META_CACHE_SIZE", "1024"))
+
     def is_openrouter(self) -> bool:
         """Detecta si estamos usando OpenRouter"""
         return "openrouter.ai" in self.OPENAI_BASE_URL.lower()
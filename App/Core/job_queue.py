@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from App.Core.config import settings
+from App.Database.database import SessionLocal
+from App.Models.models import Job
+from App.Services.job_services import JobService, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Session, Job], Awaitable[dict]]
+
+
+class JobQueue:
+    """
+    Pool acotado de workers asyncio que ejecuta los trabajos persistidos en la tabla `jobs`.
+
+    La base de datos es la fuente de verdad: la cola en memoria solo contiene IDs.
+    Si la cola está llena o el proceso se reinicia, el sondeo periódico vuelve a
+    recoger los trabajos pendientes. Mientras se ejecuta, cada trabajo renueva su
+    updated_at (latido) y el sondeo recupera los que dejan de latir, por ejemplo
+    porque otra réplica cayó con el trabajo en curso.
+
+    Las consultas con Session síncrona se hacen en el pool de hilos para no bloquear
+    el bucle de eventos.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.JOB_WORKERS,
+        background_workers: int = settings.PREGENERATE_CONCURRENCY,
+        maxsize: int = settings.JOB_QUEUE_SIZE,
+        poll_interval: float = settings.JOB_POLL_INTERVAL,
+        heartbeat_interval: float = settings.JOB_HEARTBEAT_INTERVAL,
+        recovery_interval: float = settings.JOB_RECOVERY_INTERVAL
+    ):
+        self.workers = workers
+        self.background_workers = background_workers
+        self.maxsize = maxsize
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.recovery_interval = recovery_interval
+        self._handlers: Dict[str, JobHandler] = {}
+        # Una cola por clase de prioridad: los trabajos en segundo plano tienen su
+        # propio pool (el presupuesto de concurrencia) y nunca retrasan a los interactivos
+        self._queues: Dict[bool, asyncio.Queue] = {}
+        self._queued: Set[int] = set()
+        self._events: Dict[int, asyncio.Event] = {}
+        self._tasks = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        self._handlers[job_type] = handler
+
+    def has_handler(self, job_type: str) -> bool:
+        return job_type in self._handlers
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queues = {
+            False: asyncio.Queue(maxsize=self.maxsize),
+            True: asyncio.Queue(maxsize=self.maxsize)
+        }
+
+        recovered = await run_in_threadpool(self._recover_stale_jobs)
+        if recovered:
+            logger.info(f"🔁 {recovered} trabajos recuperados tras reinicio")
+
+        self._tasks = [
+            asyncio.create_task(self._worker(i, background=False)) for i in range(self.workers)
+        ] + [
+            asyncio.create_task(self._worker(i, background=True)) for i in range(self.background_workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._poller()))
+        logger.info(
+            f"Cola de trabajos iniciada con {self.workers} workers "
+            f"y {self.background_workers} en segundo plano"
+        )
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = {}
+        self._queued.clear()
+        self._loop = None
+
+    def enqueue(self, job_id: int, priority: int = PRIORITY_INTERACTIVE) -> bool:
+        """
+        Encola un trabajo ya persistido. Si la cola está llena el trabajo queda
+        pendiente en la base de datos y lo recogerá el sondeo. Se puede llamar desde
+        el pool de hilos (submit_job en código síncrono): las colas de asyncio no son
+        seguras entre hilos, así que entonces se encola desde el bucle de eventos.
+        """
+        if self._loop is not None and not self._on_loop():
+            self._loop.call_soon_threadsafe(self._enqueue, job_id, priority)
+            return True
+        return self._enqueue(job_id, priority)
+
+    def _on_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _enqueue(self, job_id: int, priority: int) -> bool:
+        if not self._queues or job_id in self._queued:
+            return False
+        try:
+            self._queues[priority >= PRIORITY_BACKGROUND].put_nowait(job_id)
+        except asyncio.QueueFull:
+            logger.warning(f"Cola de trabajos llena, el trabajo {job_id} queda pendiente")
+            return False
+        self._queued.add(job_id)
+        return True
+
+    async def wait_for_update(self, job_id: int, timeout: float) -> None:
+        """
+        Espera a que cambie el estado del trabajo en este proceso o a que venza el timeout.
+        """
+        event = self._events.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            event.clear()
+
+    def _notify(self, job_id: int, finished: bool = False) -> None:
+        event = self._events.pop(job_id, None) if finished else self._events.get(job_id)
+        if event:
+            event.set()
+
+    @staticmethod
+    def _recover_stale_jobs() -> int:
+        db = SessionLocal()
+        try:
+            return JobService(db).recover_stale_jobs(settings.JOB_STALE_SECONDS, settings.JOB_MAX_ATTEMPTS)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _pending_job_ids(free: Dict[bool, int]) -> Dict[bool, List[int]]:
+        db = SessionLocal()
+        try:
+            job_service = JobService(db)
+            return {
+                background: job_service.get_pending_job_ids(background=background, limit=limit)
+                for background, limit in free.items() if limit > 0
+            }
+        finally:
+            db.close()
+
+    async def _poller(self) -> None:
+        last_recovery = time.monotonic()
+        while True:
+            try:
+                if time.monotonic() - last_recovery >= self.recovery_interval:
+                    last_recovery = time.monotonic()
+                    recovered = await run_in_threadpool(self._recover_stale_jobs)
+                    if recovered:
+                        logger.info(f"🔁 {recovered} trabajos sin latido devueltos a la cola")
+
+                free = {background: self.maxsize - queue.qsize() for background, queue in self._queues.items()}
+                pending = await run_in_threadpool(self._pending_job_ids, free)
+                for background, job_ids in pending.items():
+                    priority = PRIORITY_BACKGROUND if background else PRIORITY_INTERACTIVE
+                    for job_id in job_ids:
+                        self.enqueue(job_id, priority)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error sondeando trabajos pendientes: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _worker(self, worker_id: int, background: bool) -> None:
+        queue = self._queues[background]
+        while True:
+            job_id = await queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Worker {worker_id}: error inesperado en trabajo {job_id}: {e}", exc_info=True)
+            finally:
+                self._queued.discard(job_id)
+                queue.task_done()
+
+    @staticmethod
+    def _touch(job_id: int) -> bool:
+        # Sesión propia: la del trabajo la está usando el handler
+        db = SessionLocal()
+        try:
+            return JobService(db).heartbeat(job_id)
+        finally:
+            db.close()
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                if not await run_in_threadpool(self._touch, job_id):
+                    return
+            except Exception as e:
+                logger.warning(f"No se pudo renovar el latido del trabajo {job_id}: {e}")
+
+    async def _run(self, job_id: int) -> None:
+        db = SessionLocal()
+        job_service = JobService(db)
+        heartbeat = None
+        try:
+            if not await run_in_threadpool(job_service.claim_job, job_id):
+                return
+            heartbeat = asyncio.create_task(self._heartbeat(job_id))
+            self._notify(job_id)
+
+            job = await run_in_threadpool(job_service.get_job, job_id)
+            handler = self._handlers.get(job.job_type)
+            if handler is None:
+                await run_in_threadpool(job_service.fail_job, job_id, f"Tipo de trabajo desconocido: {job.job_type}")
+                return
+
+            logger.info(f"▶️ Ejecutando trabajo {job_id} ({job.job_type})")
+            try:
+                result = await handler(db, job)
+            except asyncio.CancelledError:
+                await run_in_threadpool(db.rollback)
+                await run_in_threadpool(job_service.release_job, job_id)
+                raise
+            except Exception as e:
+                await run_in_threadpool(db.rollback)
+                logger.error(f"❌ Trabajo {job_id} falló: {e}")
+                await run_in_threadpool(job_service.fail_job, job_id, str(e))
+                return
+
+            await run_in_threadpool(job_service.complete_job, job_id, result)
+            logger.info(f"✅ Trabajo {job_id} completado")
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            self._notify(job_id, finished=True)
+            await run_in_threadpool(db.close)
+
+
+job_queue = JobQueue()
+
+
+def submit_job(
+    db: Session,
+    job_type: str,
+    params: dict = None,
+    user_id: Optional[int] = None,
+    document_id: Optional[int] = None,
+    priority: int = PRIORITY_INTERACTIVE
+) -> Job:
+    """
+    Persiste un trabajo y lo encola para su ejecución en segundo plano.
+    """
+    if not job_queue.has_handler(job_type):
+        raise ValueError(f"Tipo de trabajo desconocido: {job_type}")
+    job = JobService(db).create_job(
+        job_type, params or {}, user_id=user_id, document_id=document_id, priority=priority
+    )
+    job_queue.enqueue(job.id, job.priority)
+    return job
@@ -1,10 +1,107 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from App.Core.config import settings
+from App.Database.pool import InstrumentedQueuePool, InstrumentedAsyncQueuePool, register_pool_gauges
+import logging
 
-engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+logger = logging.getLogger(__name__)
+
+# Drivers asíncronos equivalentes a los síncronos de DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(database_url: str):
+    """
+    Convierte DATABASE_URL al driver asíncrono (asyncpg / aiosqlite).
+    asyncpg no entiende `sslmode` (habitual en Render), así que se traduce a `ssl`.
+    """
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    query = dict(url.query)
+    if drivername == "postgresql+asyncpg" and "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return url.set(drivername=drivername, query=query)
+
+
+def engine_options(url, is_async: bool = False) -> dict:
+    """
+    Opciones del motor según Settings: tamaño del pool, pre-ping, reciclado y,
+    en Postgres, statement_timeout y application_name por conexión.
+    """
+    url = make_url(url)
+    options = {
+        "echo": settings.DEBUG,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+    if url.get_backend_name() == "sqlite":
+        # SQLite en memoria usa su propio pool; en archivos se mide el pool por defecto
+        if url.database and url.database != ":memory:":
+            options["poolclass"] = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+        return options
 
+    options.update({
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    })
 
+    if url.get_backend_name() == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+            if settings.DB_STATEMENT_TIMEOUT_MS:
+                server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+            options["connect_args"] = {"server_settings": server_settings}
+        else:
+            connect_args = {"application_name": settings.DB_APPLICATION_NAME}
+            if settings.DB_STATEMENT_TIMEOUT_MS:
+                connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+            options["connect_args"] = connect_args
+
+    return options
+
+
+def enable_sqlite_foreign_keys(engine) -> None:
+    """
+    SQLite solo aplica las claves foráneas (y ON DELETE CASCADE) si se activa en cada
+    conexión. Solo se registra en los motores de la aplicación: Alembic usa su propio
+    motor, sin la PRAGMA, para poder recrear tablas en las migraciones por lotes.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _foreign_keys_on(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base = declarative_base()
+register_pool_gauges(engine, "sync")
+enable_sqlite_foreign_keys(engine)
 
+try:
+    _async_url = to_async_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url, is_async=True))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    register_pool_gauges(async_engine.sync_engine, "async")
+    enable_sqlite_foreign_keys(async_engine.sync_engine)
+except ImportError as e:
+    # Sin driver asíncrono (asyncpg / aiosqlite) solo funcionan las sesiones síncronas:
+    # sirve para scripts y migraciones, pero la API no arranca (ver main.py)
+    logger.warning(f"⚠️ Motor asíncrono no disponible: {e}")
+    async_engine = None
+    AsyncSessionLocal = None
@@ -0,0 +1,61 @@
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from App.Core.metrics import metrics
+
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+checkout_wait = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Tiempo de espera para obtener una conexión del pool",
+    buckets=POOL_WAIT_BUCKETS
+)
+checkout_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts_total",
+    "Peticiones de conexión que agotaron DB_POOL_TIMEOUT"
+)
+
+
+class _CheckoutTimingMixin:
+    """
+    Mide cuánto espera cada checkout hasta obtener una conexión del pool.
+    """
+    pool_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            checkout_timeouts.inc(labels={"pool": self.pool_label})
+            raise
+        finally:
+            checkout_wait.observe(time.perf_counter() - start, labels={"pool": self.pool_label})
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pool_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pool_label = "async"
+
+
+def register_pool_gauges(engine, label: str) -> None:
+    """
+    Publica el estado del pool del motor; se lee `engine.pool` en cada consulta
+    porque el pool puede recrearse (por ejemplo, tras `dispose()`).
+    """
+    labels = {"pool": label}
+
+    def _stat(method: str):
+        def read() -> float:
+            fn = getattr(engine.pool, method, None)
+            # overflow() es negativo mientras no se supera pool_size
+            return max(fn(), 0) if fn else 0
+        return read
+
+    metrics.gauge("db_pool_size", "Tamaño configurado del pool").set_function(_stat("size"), labels)
+    metrics.gauge("db_pool_checked_out", "Conexiones en uso").set_function(_stat("checkedout"), labels)
+    metrics.gauge("db_pool_checked_in", "Conexiones libres en el pool").set_function(_stat("checkedin"), labels)
+    metrics.gauge("db_pool_overflow", "Conexiones abiertas por encima de pool_size").set_function(_stat("overflow"), labels)
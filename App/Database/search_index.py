@@ -0,0 +1,80 @@
+import re
+from sqlalchemy import text
+from App.Core.config import settings
+
+# La configuración va en el DDL (columna generada) y en las consultas: solo un identificador
+if not re.match(r"^\w+$", settings.SEARCH_LANGUAGE):
+    raise ValueError(f"SEARCH_LANGUAGE no válido: {settings.SEARCH_LANGUAGE!r}")
+SEARCH_CONFIG = settings.SEARCH_LANGUAGE
+
+FTS_TABLE = "search_entries_fts"
+
+# Postgres: tsvector generado a partir del título y el texto del fragmento, con índice GIN.
+# El título pesa menos (B) que el texto (A) porque se repite en todos los fragmentos
+_POSTGRES_DDL = [
+    f"""
+    ALTER TABLE search_entries ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', body), 'A')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_search_entries_tsv ON search_entries USING gin (tsv)",
+]
+
+# SQLite: tabla FTS5 de contenido externo (el texto solo se guarda en search_entries)
+# sincronizada con triggers, que también se disparan con los ON DELETE CASCADE.
+# user_id y source se indexan como términos para filtrar dentro del propio índice
+# (intersección de listas) en lugar de con un JOIN por cada coincidencia
+_FTS_COLUMNS = "title, body, user_id, source"
+_SQLITE_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_FTS_COLUMNS}, content='search_entries', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_entries_ai AFTER INSERT ON search_entries BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.title, new.body, new.user_id, new.source);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_entries_ad AFTER DELETE ON search_entries BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.title, old.body, old.user_id, old.source);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS search_entries_au AFTER UPDATE ON search_entries BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.title, old.body, old.user_id, old.source);
+        INSERT INTO {FTS_TABLE}(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.title, new.body, new.user_id, new.source);
+    END
+    """,
+]
+
+_SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS search_entries_au",
+    "DROP TRIGGER IF EXISTS search_entries_ad",
+    "DROP TRIGGER IF EXISTS search_entries_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_search_index(target, connection, **kw) -> None:
+    """
+    Índice de texto de search_entries según la base de datos. Se ejecuta al crear
+    la tabla con create_all; las bases existentes lo reciben con la migración.
+    """
+    statements = {"postgresql": _POSTGRES_DDL, "sqlite": _SQLITE_DDL}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def drop_search_index(target, connection, **kw) -> None:
+    # En Postgres la columna y el índice desaparecen con la tabla
+    if connection.dialect.name == "sqlite":
+        for statement in _SQLITE_DROP:
+            connection.execute(text(statement))
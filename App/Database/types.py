@@ -0,0 +1,44 @@
+import json
+from sqlalchemy.types import LargeBinary, TypeDecorator
+from App.Utils.compression import compress_bytes, decompress_bytes
+
+
+class CompressedText(TypeDecorator):
+    """
+    Texto guardado comprimido (ver App/Utils/compression.py) en una columna binaria.
+
+    Se descomprime al leer la columna, así que las consultas que no la seleccionan
+    (columnas diferidas, listados con columnas explícitas) no pagan el coste. No
+    admite comparaciones ni búsquedas en SQL sobre el contenido.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_bytes(value.encode("utf-8"))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # Filas anteriores a la compresión en SQLite, que conserva el valor como texto
+            return value
+        return decompress_bytes(bytes(value)).decode("utf-8")
+
+
+class CompressedJSON(CompressedText):
+    """
+    JSON serializado y comprimido como CompressedText.
+    """
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return super().process_bind_param(json.dumps(value, ensure_ascii=False), dialect)
+
+    def process_result_value(self, value, dialect):
+        text = super().process_result_value(value, dialect)
+        return None if text is None else json.loads(text)
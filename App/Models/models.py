@@ -1,9 +1,11 @@
 from typing import Optional, List
-from datetime import datetime
-from sqlalchemy import ForeignKey, String, Integer, DateTime, Boolean, Float
+from datetime import date, datetime
+from sqlalchemy import ForeignKey, String, Integer, BigInteger, DateTime, Date, Boolean, Float, Index, LargeBinary, Text, event
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
 from App.Database.database import Base
+from App.Database.types import CompressedText, CompressedJSON
+from App.Database.search_index import create_search_index, drop_search_index
 
 
 class User(Base):
@@ -15,19 +17,19 @@ class User(Base):
     password: Mapped[str] = mapped_column(String(255), nullable=False)
       #* Relacion uno a muchos (Usuario a Materias [1:N])
     subjects: Mapped[List["Subject"]] = relationship(
-        back_populates="user", cascade="all, delete-orphan"
+        back_populates="user", cascade="all, delete-orphan", passive_deletes=True
     )
     
-    quiz_attempts: Mapped[List["QuizAttempt"]] = relationship()
+    quiz_attempts: Mapped[List["QuizAttempt"]] = relationship(passive_deletes=True)
     
     #* Relacion con el historial del chat
     chat_histories: Mapped[List["ChatHistory"]] = relationship(
-        back_populates="user", cascade="all, delete-orphan"
+        back_populates="user", cascade="all, delete-orphan", passive_deletes=True
     )
     
     #* Relacion con planes de estudio personalizados
     study_plans: Mapped[List["CustomStudyPlan"]] = relationship(
-        back_populates="user", cascade="all, delete-orphan"
+        back_populates="user", cascade="all, delete-orphan", passive_deletes=True
     )
 
 
@@ -36,25 +38,37 @@ class Subject(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
     description: Mapped[str] = mapped_column(String(255), nullable=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)  # <- ASEGURATE QUE ESTÉ AQUÍ
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)  # <- ASEGURATE QUE ESTÉ AQUÍ
+    # Pre-generación de artefactos tras subir un documento (None = usar la configuración global)
+    pregenerate: Mapped[Optional[bool]] = mapped_column(Boolean, nullable=True)
     
     #* Relacion inversa con User
     user: Mapped["User"] = relationship(back_populates="subjects")
     
     #* Relacion uno a muchos (Materia a Documentos [1:N])
     documents: Mapped[List["Document"]] = relationship(
-        back_populates="subject", cascade="all, delete-orphan"
+        back_populates="subject", cascade="all, delete-orphan", passive_deletes=True
     )
     
     
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        #* Documentos de una materia en orden de id (listado paginado)
+        Index("ix_documents_subject_id_id", "subject_id", "id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(100), nullable=False)
-    content: Mapped[str] = mapped_column(String, nullable=False)
+    # Texto completo de los documentos anteriores al almacén por contenido (diferido). En
+    # los demás es NULL: el texto está en el blob content_hash (DocumentService.get_text)
+    content: Mapped[Optional[str]] = mapped_column(CompressedText, nullable=True, deferred=True)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # sha256 del texto extraído (blob de texto)
     file_path: Mapped[str] = mapped_column(String, nullable=False)
-    subject_id: Mapped[int] = mapped_column(ForeignKey("subjects.id"), nullable=False)  # <- CORREGIDO
+    # Archivo subido en el almacén por contenido (file_path apunta a su blob); NULL en documentos sin migrar
+    file_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    file_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)  # nombre original de la subida
+    subject_id: Mapped[int] = mapped_column(ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)  # <- CORREGIDO
     audio_url: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     
     #* Relacion inversa con Subject
@@ -63,34 +77,36 @@ class Document(Base):
     
     #! Relacion uno a uno (Documento a Resumenes[1:1])
     summaries: Mapped[List["Summary"]] = relationship(
-        back_populates="document", cascade="all, delete-orphan"
+        back_populates="document", cascade="all, delete-orphan", passive_deletes=True
     )
 
     #! Relacion uno a muchos (Documento a Flashcards[1:N])
     flashcards: Mapped[List["Flashcard"]] = relationship(
-        back_populates="document", cascade="all, delete-orphan"
+        back_populates="document", cascade="all, delete-orphan", passive_deletes=True
     )
 
     #! Relacion uno a muchos (Documento a Quizzes[1:N])
     quizzes: Mapped[List["Quiz"]] = relationship(
-        back_populates="document", cascade="all, delete-orphan"
+        back_populates="document", cascade="all, delete-orphan", passive_deletes=True
     )
       #! Relacion con el historial del chat
     chat_histories: Mapped[List["ChatHistory"]] = relationship(
-        back_populates="document", cascade="all, delete-orphan"
+        back_populates="document", cascade="all, delete-orphan", passive_deletes=True
     )
     
     #! Relacion con planes de estudio personalizados
     study_plans: Mapped[List["CustomStudyPlan"]] = relationship(
-        back_populates="document", cascade="all, delete-orphan"
+        back_populates="document", cascade="all, delete-orphan", passive_deletes=True
     )
     
     
 class Summary(Base):
     __tablename__ = "summaries"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    content: Mapped[str] = mapped_column(String, nullable=False)
-    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id"), nullable=False)
+    content: Mapped[str] = mapped_column(CompressedText, nullable=False)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    #* Clave de generación (documento, tipo, parámetros, hash del contenido)
+    generation_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, unique=True, index=True)
 
     #* Relacion inversa con Documento
     document: Mapped["Document"] = relationship(back_populates="summaries")
@@ -100,7 +116,9 @@ class Flashcard(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     question: Mapped[str] = mapped_column(String, nullable=False)
     answer: Mapped[str] = mapped_column(String, nullable=False)
-    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id"), nullable=False)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    #* Todas las flashcards de una misma generación comparten la clave
+    generation_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
 
     #* Relacion inversa con Documento
     document: Mapped["Document"] = relationship(back_populates="flashcards")
@@ -109,14 +127,22 @@ class Quiz(Base):
     __tablename__ = "quizzes"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(100), nullable=False)
-    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id"), nullable=False)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    generation_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, unique=True, index=True)
+    #* Quiz reemplazado por una regeneración que se conserva porque ya tiene intentos
+    retired_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    #* Quiz completo (preguntas y opciones) serializado al guardarlo, que se sirve tal cual.
+    #* payload_version es la versión del formato (QUIZ_PAYLOAD_VERSION) y payload_etag su sha256
+    payload: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True)
+    payload_version: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    payload_etag: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
 
     #* Relacion inversa con Documento
     document: Mapped["Document"] = relationship(back_populates="quizzes")
 
     #! Relacion uno a muchos (Quiz a Pregunta[1:N])
     questions: Mapped[List["Question"]] = relationship(
-        back_populates="quiz", cascade="all, delete-orphan"
+        back_populates="quiz", cascade="all, delete-orphan", passive_deletes=True
     )
 
 
@@ -125,14 +151,14 @@ class Question(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     question_text: Mapped[str] = mapped_column(String, nullable=False)
     correct_option: Mapped[str] = mapped_column(String, nullable=False)
-    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"), nullable=False)
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
 
     #* Relacion inversa con Quiz
     quiz: Mapped["Quiz"] = relationship(back_populates="questions")
 
     #! Relacion uno a muchos (Question a Options[1:N])
     options: Mapped[List["Option"]] = relationship(
-        back_populates="question", cascade="all, delete-orphan"
+        back_populates="question", cascade="all, delete-orphan", passive_deletes=True
     )
 
 
@@ -140,7 +166,7 @@ class Option(Base):
     __tablename__ = "options"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     text: Mapped[str] = mapped_column(String, nullable=False)
-    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"), nullable=False)
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
 
     #* Relacion inversa con Question
     question: Mapped["Question"] = relationship(back_populates="options")
@@ -148,8 +174,8 @@ class Option(Base):
 class QuizAttempt(Base):
     __tablename__ = "quiz_attempts"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id"), nullable=False)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     score: Mapped[float] = mapped_column(Float, nullable=False)  # Porcentaje (0-100)
     total_questions: Mapped[int] = mapped_column(Integer, nullable=False)
     correct_answers: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -162,14 +188,14 @@ class QuizAttempt(Base):
     
     #! relacion de intentos 
     answers: Mapped[List["QuizAnswer"]] = relationship(
-        back_populates="attempt", cascade="all, delete-orphan"
+        back_populates="attempt", cascade="all, delete-orphan", passive_deletes=True
     )
     
 class QuizAnswer(Base):
     __tablename__ = "quiz_answers" 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    attempt_id: Mapped[int] = mapped_column(ForeignKey("quiz_attempts.id"), nullable=False)
-    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"), nullable=False)
+    attempt_id: Mapped[int] = mapped_column(ForeignKey("quiz_attempts.id", ondelete="CASCADE"), nullable=False, index=True)
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
     selected_option: Mapped[str] = mapped_column(String, nullable=False)  # Texto de la opción seleccionada
     is_correct: Mapped[bool] = mapped_column(Boolean, nullable=False)
     
@@ -179,36 +205,222 @@ class QuizAnswer(Base):
     
 class ChatHistory(Base):
     __tablename__ = "chat_histories"
+    __table_args__ = (
+        #* Historial de un usuario sobre un documento, ordenado por fecha (el id desempata en la paginación)
+        Index("ix_chat_histories_user_document_timestamp_id", "user_id", "document_id", "timestamp", "id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
     message: Mapped[str] = mapped_column(String, nullable=False)
-    response: Mapped[str] = mapped_column(String, nullable=False)
+    response: Mapped[str] = mapped_column(CompressedText, nullable=False)
     timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     
     user:Mapped["User"] = relationship()
     document:Mapped["Document"] = relationship()
 
 
+class ChatArchive(Base):
+    """
+    Mensajes de ChatHistory anteriores al periodo de retención, empaquetados en
+    bloques comprimidos por usuario y documento (ver App/Utils/chat_archive.py).
+    Cada bloque guarda hasta CHAT_ARCHIVE_BATCH_SIZE mensajes consecutivos.
+    """
+    __tablename__ = "chat_archives"
+    __table_args__ = (
+        #* Bloques de un usuario sobre un documento, del más reciente al más antiguo
+        Index("ix_chat_archives_user_document_last", "user_id", "document_id", "last_timestamp", "id"),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    first_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    message_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    codec: Mapped[str] = mapped_column(String(10), nullable=False)  # "gzip" | "zstd"
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
 class CustomStudyPlan(Base):
     """
     Modelo para almacenar planes de estudio personalizados generados por IA
     El campo 'content' almacena la estructura JSON del plan de estudio
     """
     __tablename__ = "custom_study_plans"
+    __table_args__ = (
+        Index("ix_custom_study_plans_document_level", "document_id", "level"),
+        Index("ix_custom_study_plans_user_created_id", "user_id", "created_at", "id"),
+    )
     
     # Campos básicos
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     level: Mapped[str] = mapped_column(String(50), nullable=False)  # "básico", "intermedio", "avanzado"
     
-    content: Mapped[dict] = mapped_column(JSON, nullable=False)
+    content: Mapped[dict] = mapped_column(CompressedJSON, nullable=False)
     
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    document_id: Mapped[Optional[int]] = mapped_column(ForeignKey("documents.id"), nullable=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    document_id: Mapped[Optional[int]] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=True)
+    generation_key: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, unique=True, index=True)
     
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
     
     user: Mapped["User"] = relationship(back_populates="study_plans")
-    document: Mapped[Optional["Document"]] = relationship(back_populates="study_plans")
\ No newline at end of file
+    document: Mapped[Optional["Document"]] = relationship(back_populates="study_plans")
+
+class Job(Base):
+    """
+    Trabajo asíncrono de generación con IA (resumen, flashcards, quiz, plan de estudio).
+    Se persiste en la base de datos para sobrevivir a reinicios del worker.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_id", "status", "id"),
+        Index("ix_jobs_document_type", "document_id", "job_type"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    job_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="pending")  # pending, running, completed, failed
+    params: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    result: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # 0 = interactivo, 10 = segundo plano
+
+    user_id: Mapped[Optional[int]] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    document_id: Mapped[Optional[int]] = mapped_column(ForeignKey("documents.id", ondelete="SET NULL"), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
+class UserStatsRollup(Base):
+    """
+    Resumen de los intentos de quiz de un usuario, mantenido en la misma transacción
+    que registra cada intento para servir las estadísticas con una sola lectura.
+    """
+    __tablename__ = "user_stats_rollups"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    best_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    worst_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    total_time: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # segundos
+    # Últimos intentos ya formateados (id, quiz_id, score, time_taken, completed_at), del más antiguo al más reciente
+    recent_attempts: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class QuizStatsRollup(Base):
+    """
+    Resumen de los intentos de un quiz: conteo, suma de puntuaciones e histograma
+    de puntuaciones por tramos, actualizado al registrar cada intento.
+    """
+    __tablename__ = "quiz_stats_rollups"
+
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id", ondelete="CASCADE"), primary_key=True)
+    total_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # Intentos por tramo de puntuación (conteos de App/Utils/score_sketch.ScoreSketch)
+    score_histogram: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class SubjectStatsRollup(Base):
+    """
+    Distribución de puntuaciones de los intentos de todos los quizzes de una materia,
+    para el percentil por materia.
+    """
+    __tablename__ = "subject_stats_rollups"
+
+    subject_id: Mapped[int] = mapped_column(ForeignKey("subjects.id", ondelete="CASCADE"), primary_key=True)
+    total_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # Conteos de App/Utils/score_sketch.ScoreSketch
+    score_histogram: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class ProgressRollup(Base):
+    """
+    Intentos de un usuario sobre un documento agregados por día o por semana
+    (period = "day" | "week", period_start = fecha o lunes de la semana).
+    Sirve las series de progreso sin recorrer el historial de QuizAttempt.
+    """
+    __tablename__ = "progress_rollups"
+    __table_args__ = (
+        #* Un tramo por usuario, periodo y documento; también sirve las lecturas por rango de fechas
+        Index("ux_progress_rollups_bucket", "user_id", "period", "period_start", "document_id", unique=True),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    subject_id: Mapped[int] = mapped_column(ForeignKey("subjects.id", ondelete="CASCADE"), nullable=False)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    period: Mapped[str] = mapped_column(String(10), nullable=False)
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    score_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    best_score: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    total_time: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # segundos
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class QuestionStats(Base):
+    """
+    Contadores de respuestas por pregunta para detectar las preguntas difíciles
+    sin reagrupar todo el historial de QuizAnswer.
+    """
+    __tablename__ = "question_stats"
+
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    quiz_id: Mapped[int] = mapped_column(ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False, index=True)
+    total_answers: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    correct_answers: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class Blob(Base):
+    """
+    Archivo del almacén por contenido (App/Utils/blob_store.py): el sha256 es la
+    clave y el nombre del archivo. `ref_count` cuenta los documentos que lo usan
+    (como archivo subido o como texto extraído); el archivo se borra al llegar a 0.
+    """
+    __tablename__ = "blobs"
+
+    hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+
+class SearchEntry(Base):
+    """
+    Texto indexado para la búsqueda (App/Services/search_services.py): fragmentos de
+    los documentos, resúmenes, flashcards y preguntas de quiz de cada usuario. El
+    índice de texto depende de la base de datos (App/Database/search_index.py):
+    columna tsvector con GIN en Postgres y tabla FTS5 en SQLite.
+    """
+    __tablename__ = "search_entries"
+    __table_args__ = (
+        #* Sustitución de las entradas de un documento por tipo al regenerar
+        Index("ix_search_entries_document_source", "document_id", "source"),
+        Index("ix_search_entries_user_source", "user_id", "source"),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    document_id: Mapped[int] = mapped_column(ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    source: Mapped[str] = mapped_column(String(20), nullable=False)  # "document" | "summary" | "flashcard" | "question"
+    source_id: Mapped[int] = mapped_column(Integer, nullable=False)  # id de la fila de origen
+    chunk: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # fragmento dentro del origen
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+
+
+event.listen(SearchEntry.__table__, "after_create", create_search_index)
+event.listen(SearchEntry.__table__, "before_drop", drop_search_index)
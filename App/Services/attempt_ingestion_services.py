@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from App.Core.config import settings
+from App.Database.database import AsyncSessionLocal
+from App.Models.models import Quiz, Question, QuizAttempt, QuizAnswer
+from App.Services.stats_rollup_services import (
+    AsyncStatsRollupService, AsyncQuizStatsRollupService, AsyncSubjectStatsRollupService
+)
+from App.Services.progress_services import AsyncProgressRollupService, naive_utc, utc_now
+from App.Utils.batch_writer import BatchWriter
+
+
+class AnswerKey(NamedTuple):
+    quiz_id: int
+    correct_options: Dict[int, str]  # question_id -> opción correcta
+
+
+class GradedAttempt(NamedTuple):
+    user_id: int
+    quiz_id: int
+    time_taken: Optional[int]
+    completed_at: datetime
+    total_questions: int
+    correct_answers: int
+    score: float
+    answers: List[Tuple[int, str, bool]]  # (question_id, opción elegida, acierto)
+
+
+# Margen para relojes de cliente algo adelantados en los intentos registrados sin conexión
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+
+_answer_keys: "OrderedDict[int, Tuple[AnswerKey, float]]" = OrderedDict()
+_answer_keys_lock = threading.Lock()
+
+
+def _cached_answer_key(quiz_id: int) -> Optional[AnswerKey]:
+    with _answer_keys_lock:
+        cached = _answer_keys.get(quiz_id)
+        if cached and time.monotonic() - cached[1] < settings.ANSWER_KEY_CACHE_TTL:
+            _answer_keys.move_to_end(quiz_id)
+            return cached[0]
+    return None
+
+
+def _store_answer_key(key: AnswerKey) -> None:
+    with _answer_keys_lock:
+        _answer_keys[key.quiz_id] = (key, time.monotonic())
+        _answer_keys.move_to_end(key.quiz_id)
+        while len(_answer_keys) > settings.ANSWER_KEY_CACHE_SIZE:
+            _answer_keys.popitem(last=False)
+
+
+def invalidate_answer_key(quiz_id: int) -> None:
+    """
+    Descarta la solución en caché de un quiz borrado (los ids pueden reutilizarse).
+    """
+    with _answer_keys_lock:
+        _answer_keys.pop(quiz_id, None)
+
+
+def grade_attempt(
+    key: AnswerKey,
+    user_id: int,
+    answers: List[Dict[str, str]],
+    time_taken: Optional[int] = None,
+    completed_at: Optional[datetime] = None
+) -> GradedAttempt:
+    """
+    Corrige un intento contra la solución en memoria. Las respuestas a preguntas
+    que no son del quiz se ignoran, igual que en StatisticsService. `completed_at`
+    se guarda en UTC sin zona; uno futuro (reloj del cliente) se rechaza con ValueError.
+    """
+    now = utc_now()
+    if completed_at is None:
+        completed_at = now
+    else:
+        completed_at = naive_utc(completed_at)
+        if completed_at > now + MAX_CLOCK_SKEW:
+            raise ValueError("La fecha del intento (completed_at) está en el futuro.")
+
+    graded = []
+    correct_answers = 0
+    for data in answers:
+        question_id = data["question_id"]
+        correct_option = key.correct_options.get(question_id)
+        if correct_option is None:
+            continue
+        is_correct = correct_option == data["selected_option"]
+        correct_answers += is_correct
+        graded.append((question_id, data["selected_option"], is_correct))
+
+    total_questions = len(key.correct_options)
+    return GradedAttempt(
+        user_id=user_id,
+        quiz_id=key.quiz_id,
+        time_taken=time_taken,
+        completed_at=completed_at,
+        total_questions=total_questions,
+        correct_answers=correct_answers,
+        score=(correct_answers / total_questions) * 100 if total_questions > 0 else 0,
+        answers=graded
+    )
+
+
+async def _write_attempts(batch: List[GradedAttempt]) -> List[Dict]:
+    """
+    Escribe un lote de intentos ya corregidos y actualiza los resúmenes en una transacción.
+    """
+    async with AsyncSessionLocal() as db:
+        attempts = [
+            QuizAttempt(
+                user_id=graded.user_id,
+                quiz_id=graded.quiz_id,
+                total_questions=graded.total_questions,
+                correct_answers=graded.correct_answers,
+                score=graded.score,
+                time_taken=graded.time_taken,
+                completed_at=graded.completed_at
+            )
+            for graded in batch
+        ]
+        db.add_all(attempts)
+        await db.flush()
+
+        answers = [
+            [
+                QuizAnswer(attempt_id=attempt.id, question_id=question_id, selected_option=selected, is_correct=is_correct)
+                for question_id, selected, is_correct in graded.answers
+            ]
+            for attempt, graded in zip(attempts, batch)
+        ]
+        db.add_all([answer for group in answers for answer in group])
+
+        await AsyncStatsRollupService(db).apply_attempts(attempts)
+        await AsyncQuizStatsRollupService(db).apply_attempts(list(zip(attempts, answers)))
+        await AsyncSubjectStatsRollupService(db).apply_attempts(attempts)
+        await AsyncProgressRollupService(db).apply_attempts(attempts)
+        await db.commit()
+
+        return [
+            {
+                "attempt_id": attempt.id,
+                "score": attempt.score,
+                "correct_answers": attempt.correct_answers,
+                "total_questions": attempt.total_questions
+            }
+            for attempt in attempts
+        ]
+
+
+attempt_writer: BatchWriter[GradedAttempt, Dict] = BatchWriter(
+    "quiz_attempts",
+    _write_attempts,
+    max_batch=settings.ATTEMPT_BATCH_SIZE,
+    max_delay=settings.ATTEMPT_BATCH_MAX_DELAY,
+    max_pending=settings.ATTEMPT_QUEUE_SIZE
+)
+
+
+class AttemptIngestionService:
+    """
+    Registro de intentos pensado para ráfagas (fin de un examen): corrige con la
+    solución en caché y delega la escritura en `attempt_writer`, que agrupa los
+    intentos concurrentes en una sola transacción.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_answer_key(self, quiz_id: int) -> AnswerKey:
+        key = _cached_answer_key(quiz_id)
+        if key:
+            return key
+
+        result = await self.db.execute(
+            select(Question.id, Question.correct_option).where(Question.quiz_id == quiz_id)
+        )
+        correct_options = {row.id: row.correct_option for row in result.all()}
+        if not correct_options and await self.db.scalar(select(Quiz.id).where(Quiz.id == quiz_id)) is None:
+            raise ValueError(f"Quiz con ID {quiz_id} no encontrado.")
+
+        key = AnswerKey(quiz_id=quiz_id, correct_options=correct_options)
+        _store_answer_key(key)
+        return key
+
+    async def _release_connection(self) -> None:
+        # La escritura usa su propia sesión: si la petición retuviera su conexión mientras
+        # espera al lote, una ráfaga agotaría el pool y el lote no podría escribirse.
+        if self.db.in_transaction():
+            await self.db.rollback()
+
+    async def record_attempt(
+        self,
+        user_id: int,
+        quiz_id: int,
+        answers: List[Dict[str, str]],
+        time_taken: Optional[int] = None,
+        completed_at: Optional[datetime] = None
+    ) -> Dict:
+        key = await self.get_answer_key(quiz_id)
+        await self._release_connection()
+        return await attempt_writer.submit(grade_attempt(key, user_id, answers, time_taken, completed_at))
+
+    async def record_attempts(self, user_id: int, attempts: List[Dict]) -> List[Union[Dict, Exception]]:
+        """
+        Registra varios intentos (por ejemplo, los que un cliente guardó sin conexión).
+        Devuelve, en el mismo orden, el resultado o la excepción de cada uno.
+        """
+        results: List[Union[Dict, Exception]] = [None] * len(attempts)
+        pending = []
+        for index, data in enumerate(attempts):
+            try:
+                key = await self.get_answer_key(data["quiz_id"])
+                graded = grade_attempt(
+                    key, user_id, data["answers"], data.get("time_taken"), data.get("completed_at")
+                )
+            except ValueError as e:
+                results[index] = e
+                continue
+            pending.append((index, graded))
+
+        await self._release_connection()
+        written = await attempt_writer.submit_many([graded for _, graded in pending])
+        for (index, _), result in zip(pending, written):
+            results[index] = result
+        return results
@@ -0,0 +1,119 @@
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from pathlib import Path
+from typing import AsyncIterator, Optional
+import logging
+import os
+import tempfile
+from App.Core.cache import cache, document_key
+from App.Core.config import settings
+from App.Database.database import SessionLocal
+from App.Models.models import Document
+from App.Services.document_services import DocumentService
+from App.Utils.tts import TTSPipeline
+from App.Utils.file_responses import invalidate_file_meta
+
+logger = logging.getLogger(__name__)
+
+AUDIO_DIR = Path("Public").resolve() / "audio"
+
+
+def _audio_temp_file(document_id: int):
+    """
+    Temporal con nombre único junto al MP3 final, para moverlo con os.replace
+    cuando esté completo: nadie lee nunca un audio a medio escribir.
+    """
+    os.makedirs(AUDIO_DIR, exist_ok=True)
+    return tempfile.mkstemp(dir=AUDIO_DIR, prefix=f"document_{document_id}.", suffix=".part")
+
+
+class AudioService:
+    def __init__(self, db: Session, pipeline: Optional[TTSPipeline] = None):
+        self.db = db
+        self._pipeline = pipeline
+
+    @property
+    def pipeline(self) -> TTSPipeline:
+        if self._pipeline is None:
+            self._pipeline = TTSPipeline()
+        return self._pipeline
+
+    def get_cached_audio(self, document: Document) -> Optional[str]:
+        """
+        Devuelve la ruta del audio ya generado para el documento, si existe en disco.
+        """
+        if document.audio_url and os.path.exists(document.audio_url):
+            return document.audio_url
+        return None
+
+    def _validate_text(self, document: Document) -> str:
+        text = DocumentService(self.db).get_text(document)
+        if not text or text.strip() == "":
+            raise ValueError("Document content is empty")
+        if len(text) > settings.TTS_MAX_CHARS:
+            raise ValueError(
+                f"El documento supera el límite de {settings.TTS_MAX_CHARS} caracteres para audio"
+            )
+        return text
+
+    async def stream_audio(self, document_id: int, text: str) -> AsyncIterator[bytes]:
+        """
+        Entrega el MP3 a medida que se sintetiza y, al terminar, lo guarda en disco
+        y actualiza `audio_url`. Si el cliente corta la descarga no se guarda nada,
+        pero los fragmentos ya sintetizados quedan en caché. `text` ya viene
+        validado por quien llama (ver text_to_speech).
+        """
+        audio_path = os.path.join(AUDIO_DIR, f"document_{document_id}.mp3")
+
+        # Temporal propio de esta síntesis: otra petición del mismo documento no lo pisa ni lo borra
+        fd, tmp_path = _audio_temp_file(document_id)
+        completed = False
+        try:
+            with os.fdopen(fd, "wb") as audio_file:
+                async for audio in self.pipeline.stream(text):
+                    audio_file.write(audio)
+                    yield audio
+            os.replace(tmp_path, audio_path)
+            invalidate_file_meta(audio_path)
+            completed = True
+        finally:
+            if not completed and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        # La sesión de la petición puede estar cerrada cuando termina el streaming
+        db = SessionLocal()
+        try:
+            db.query(Document).filter(Document.id == document_id).update({"audio_url": audio_path})
+            db.commit()
+        finally:
+            db.close()
+        cache.invalidate(document_key(document_id))
+        logger.info(f"✅ Audio guardado para documento {document_id}")
+
+    async def generate_audio(self, document: Document) -> str:
+        """
+        Convierte el contenido del documento a MP3 y guarda la ruta en `audio_url`.
+        La síntesis se hace por fragmentos en el pool de hilos de TTS; la lectura del
+        texto y la escritura del archivo y de la base de datos, en el de la aplicación.
+        """
+        text = await run_in_threadpool(self._validate_text, document)
+        audio = await self.pipeline.synthesize(text)
+        return await run_in_threadpool(self._store_audio, document, audio)
+
+    def _store_audio(self, document: Document, audio: bytes) -> str:
+        audio_path = os.path.join(AUDIO_DIR, f"document_{document.id}.mp3")
+        fd, tmp_path = _audio_temp_file(document.id)
+        try:
+            with os.fdopen(fd, "wb") as audio_file:
+                audio_file.write(audio)
+            os.replace(tmp_path, audio_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        invalidate_file_meta(audio_path)
+
+        document.audio_url = audio_path
+        self.db.commit()
+        self.db.refresh(document)
+        cache.invalidate(document_key(document.id))
+        return audio_path
@@ -0,0 +1,80 @@
+from collections import Counter
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from App.Models.models import Blob
+from App.Utils.blob_store import StagedBlob, blob_store
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BlobService:
+    """
+    Contadores de referencias de los blobs. Se actualizan en la misma transacción
+    que crea o borra los documentos, así que el contador nunca queda desalineado
+    con las filas que lo usan.
+
+    Orden para no perder archivos: al subir, la referencia se confirma antes de
+    mover el archivo a su sitio (BlobStore.commit); al borrar, el archivo solo se
+    elimina en `remove_unreferenced`, que borra la fila con el contador a 0 y el
+    archivo dentro de la misma transacción. Una subida concurrente del mismo
+    contenido espera a esa transacción y después vuelve a colocar el archivo.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def acquire(self, blobs: Iterable[StagedBlob]) -> None:
+        counts = Counter()
+        sizes: Dict[str, int] = {}
+        for blob in blobs:
+            counts[blob.hash] += 1
+            sizes[blob.hash] = blob.size
+        # Orden fijo de los bloqueos para no interbloquear subidas concurrentes
+        for blob_hash in sorted(counts):
+            if self._increment(blob_hash, counts[blob_hash]):
+                continue
+            try:
+                with self.db.begin_nested():
+                    self.db.add(Blob(hash=blob_hash, size=sizes[blob_hash], ref_count=counts[blob_hash]))
+            except IntegrityError:
+                # Otra transacción creó el blob a la vez
+                self._increment(blob_hash, counts[blob_hash])
+
+    def release(self, hashes: Iterable[str]) -> List[str]:
+        """
+        Resta una referencia por aparición. Devuelve las rutas de los blobs que se
+        han quedado sin referencias, para borrarlos con `remove_stored_files`.
+        """
+        counts = Counter(blob_hash for blob_hash in hashes if blob_hash)
+        for blob_hash in sorted(counts):
+            self._increment(blob_hash, -counts[blob_hash])
+        if not counts:
+            return []
+        orphans = self.db.scalars(select(Blob.hash).where(Blob.hash.in_(counts), Blob.ref_count <= 0))
+        return [blob_store.path(blob_hash) for blob_hash in orphans]
+
+    def remove_unreferenced(self, blob_hash: str) -> bool:
+        """
+        Borra el blob si sigue sin referencias (una subida posterior puede haberlo
+        vuelto a usar). Devuelve True si se ha borrado.
+        """
+        try:
+            removed = self.db.execute(
+                delete(Blob).where(Blob.hash == blob_hash, Blob.ref_count <= 0),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+            if removed:
+                blob_store.delete(blob_hash)
+            self.db.commit()
+            return bool(removed)
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def _increment(self, blob_hash: str, amount: int) -> bool:
+        return bool(self.db.execute(
+            update(Blob).where(Blob.hash == blob_hash).values(ref_count=Blob.ref_count + amount),
+            execution_options={"synchronize_session": False}
+        ).rowcount)
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from App.Core.config import settings
+from App.Models.models import ChatArchive, ChatHistory
+from App.Utils.chat_archive import pack_turns, resolve_codec, unpack_turns
+from App.Utils.pagination import Page, keyset_query, keyset_page
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_ORDER = (ChatArchive.last_timestamp, ChatArchive.id)
+ARCHIVE_PAGE_SIZE = 1  # bloques por página
+
+
+def retention_cutoff(retention_days: Optional[int] = None) -> datetime:
+    days = settings.CHAT_RETENTION_DAYS if retention_days is None else retention_days
+    return datetime.now() - timedelta(days=days)
+
+
+def _expired_conversations_query(cutoff: datetime, user_id: Optional[int] = None):
+    query = select(ChatHistory.user_id, ChatHistory.document_id).where(ChatHistory.timestamp < cutoff)
+    if user_id is not None:
+        query = query.where(ChatHistory.user_id == user_id)
+    return query.distinct().order_by(ChatHistory.user_id, ChatHistory.document_id)
+
+
+def _archive_page_query(user_id: int, document_id: int, cursor: Optional[str], limit: int):
+    query = select(ChatArchive).where(ChatArchive.user_id == user_id, ChatArchive.document_id == document_id)
+    return keyset_query(query, ARCHIVE_ORDER, cursor, limit, descending=True)
+
+
+def _archive_page(page: Page) -> Page:
+    # Mensajes del más reciente al más antiguo, como en el historial vivo
+    turns = []
+    for block in page.items:
+        turns.extend(reversed(unpack_turns(block.payload, block.codec)))
+    return Page(turns, page.next_cursor)
+
+
+class ChatArchiveService:
+    """
+    Retención del historial de chat. `archive_expired` mueve los mensajes anteriores
+    al corte a ChatArchive en bloques comprimidos y los borra de ChatHistory. Cada
+    bloque (como mucho `batch_size` mensajes de una conversación) se archiva y se
+    borra en su propia transacción, de modo que los bloqueos duran poco y una
+    interrupción deja el trabajo hecho hasta entonces sin duplicados.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def count_expired(self, cutoff: datetime, user_id: Optional[int] = None) -> int:
+        query = select(func.count()).select_from(ChatHistory).where(ChatHistory.timestamp < cutoff)
+        if user_id is not None:
+            query = query.where(ChatHistory.user_id == user_id)
+        return self.db.scalar(query)
+
+    def archive_expired(
+        self,
+        cutoff: Optional[datetime] = None,
+        batch_size: Optional[int] = None,
+        user_id: Optional[int] = None
+    ) -> Dict[str, int]:
+        cutoff = cutoff or retention_cutoff()
+        batch_size = batch_size or settings.CHAT_ARCHIVE_BATCH_SIZE
+        codec = resolve_codec(settings.CHAT_ARCHIVE_CODEC)
+
+        conversations = self.db.execute(_expired_conversations_query(cutoff, user_id)).all()
+        self.db.commit()
+        stats = {"conversations": len(conversations), "messages": 0, "blocks": 0}
+        for conversation in conversations:
+            while True:
+                archived = self._archive_block(conversation.user_id, conversation.document_id, cutoff, batch_size, codec)
+                if not archived:
+                    break
+                stats["messages"] += archived
+                stats["blocks"] += 1
+                if archived < batch_size:
+                    break
+
+        logger.info(
+            f"🗄️ Archivados {stats['messages']} mensajes de {stats['conversations']} conversaciones "
+            f"en {stats['blocks']} bloques ({codec})"
+        )
+        return stats
+
+    def _archive_block(self, user_id: int, document_id: int, cutoff: datetime, batch_size: int, codec: str) -> int:
+        try:
+            rows = self.db.execute(
+                select(ChatHistory.id, ChatHistory.message, ChatHistory.response, ChatHistory.timestamp)
+                .where(
+                    ChatHistory.user_id == user_id,
+                    ChatHistory.document_id == document_id,
+                    ChatHistory.timestamp < cutoff
+                )
+                .order_by(ChatHistory.timestamp, ChatHistory.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return 0
+
+            turns = [dict(row._mapping) for row in rows]
+            self.db.add(ChatArchive(
+                user_id=user_id,
+                document_id=document_id,
+                first_timestamp=rows[0].timestamp,
+                last_timestamp=rows[-1].timestamp,
+                message_count=len(rows),
+                codec=codec,
+                payload=pack_turns(turns, codec)
+            ))
+            self.db.execute(
+                delete(ChatHistory).where(ChatHistory.id.in_([row.id for row in rows])),
+                execution_options={"synchronize_session": False}
+            )
+            self.db.commit()
+            # No acumula en el identity map los bloques ya guardados
+            self.db.expunge_all()
+            return len(rows)
+
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error archiving chat history for user {user_id}, document {document_id}: {e}")
+            raise
+
+    def get_archived_history_page(
+        self, user_id: int, document_id: int, cursor: Optional[str] = None, limit: int = ARCHIVE_PAGE_SIZE
+    ) -> Page:
+        """
+        Mensajes archivados, del más reciente al más antiguo. `limit` cuenta bloques:
+        solo se descomprimen los bloques de la página pedida.
+        """
+        rows = self.db.scalars(_archive_page_query(user_id, document_id, cursor, limit)).all()
+        return _archive_page(keyset_page(rows, ARCHIVE_ORDER, limit))
+
+
+class AsyncChatArchiveService:
+    """
+    Lectura asíncrona del archivo de chats para los endpoints `async def`.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_archived_history_page(
+        self, user_id: int, document_id: int, cursor: Optional[str] = None, limit: int = ARCHIVE_PAGE_SIZE
+    ) -> Page:
+        rows = (await self.db.scalars(_archive_page_query(user_id, document_id, cursor, limit))).all()
+        return _archive_page(keyset_page(rows, ARCHIVE_ORDER, limit))
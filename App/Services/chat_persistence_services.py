@@ -0,0 +1,141 @@
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import DateTime, String, cast, insert, literal, null, select, type_coerce, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+from App.Core.config import settings
+from App.Database.database import AsyncSessionLocal
+from App.Models.models import ChatHistory, Document
+from App.Services.document_services import read_text_prefix
+from App.Utils.batch_writer import BatchWriter
+from App.Utils.open_ai import DOCUMENT_CONTEXT_CHARS
+
+# Tipo de fila en la consulta combinada de get_context
+_DOCUMENT_ROW = 0
+_HISTORY_ROW = 1
+
+
+class ChatTurn(NamedTuple):
+    user_id: int
+    document_id: int
+    message: str
+    response: str
+    timestamp: datetime
+
+
+class ChatContext(NamedTuple):
+    document_id: int
+    title: str
+    content: str  # inicio del texto: DOCUMENT_CONTEXT_CHARS + 1 caracteres como mucho
+    history: List[Dict[str, str]]  # del más antiguo al más reciente, formato de mensajes del modelo
+
+
+def _context_query(user_id: int, document_id: int, history_limit: int):
+    """
+    Documento y últimos mensajes en una sola sentencia: la primera fila trae el título
+    y el hash del texto del documento y las siguientes el historial. El texto se lee
+    después del blob, solo la parte que cabe en el contexto del modelo.
+    """
+    recent = (
+        select(ChatHistory.id, ChatHistory.message, ChatHistory.response, ChatHistory.timestamp)
+        .where(ChatHistory.document_id == document_id, ChatHistory.user_id == user_id)
+        .order_by(ChatHistory.timestamp.desc(), ChatHistory.id.desc())
+        .limit(history_limit)
+        .subquery()
+    )
+    document = select(
+        literal(_DOCUMENT_ROW).label("kind"),
+        Document.id.label("id"),
+        Document.title.label("first"),
+        # La primera SELECT fija los tipos de la unión: la respuesta se descomprime
+        type_coerce(null(), ChatHistory.response.type).label("second"),
+        cast(null(), DateTime).label("timestamp"),
+        Document.content_hash.label("content_hash")
+    ).where(Document.id == document_id)
+    history = select(
+        literal(_HISTORY_ROW).label("kind"),
+        recent.c.id,
+        recent.c.message,
+        recent.c.response,
+        recent.c.timestamp,
+        cast(null(), String)
+    )
+    combined = union_all(document, history).subquery()
+    return select(combined).order_by(combined.c.kind, combined.c.timestamp, combined.c.id)
+
+
+async def _write_turns(batch: List[ChatTurn]) -> List[Dict]:
+    """
+    Inserta un lote de mensajes en una transacción. El id y la fecha vuelven con
+    RETURNING en el orden de los parámetros (en Postgres, un único INSERT multi-fila).
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            insert(ChatHistory).returning(ChatHistory.id, ChatHistory.timestamp, sort_by_parameter_order=True),
+            [turn._asdict() for turn in batch]
+        )
+        rows = result.all()
+        await db.commit()
+        return [{"id": row.id, "timestamp": row.timestamp} for row in rows]
+
+
+chat_writer: BatchWriter[ChatTurn, Dict] = BatchWriter(
+    "chat_histories",
+    _write_turns,
+    max_batch=settings.CHAT_BATCH_SIZE,
+    max_delay=settings.CHAT_BATCH_MAX_DELAY,
+    max_pending=settings.CHAT_QUEUE_SIZE
+)
+
+
+class ChatPersistenceService:
+    """
+    Persistencia de los turnos de chat con una ida y vuelta a la base de datos por
+    operación: `get_context` lee documento e historial en una consulta y
+    `append_turn` delega la inserción en `chat_writer`, que agrupa los mensajes de
+    conversaciones concurrentes en un mismo INSERT.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_context(self, user_id: int, document_id: int, history_limit: int = 10) -> Optional[ChatContext]:
+        """
+        None si el documento no existe.
+        """
+        rows = (await self.db.execute(_context_query(user_id, document_id, history_limit))).all()
+        # Libera la conexión: la respuesta del modelo puede tardar varios segundos
+        await self.db.commit()
+        if not rows or rows[0].kind != _DOCUMENT_ROW:
+            return None
+
+        history = []
+        for row in rows[1:]:
+            history.append({"role": "user", "content": row.first})
+            history.append({"role": "assistant", "content": row.second})
+        content = await self._document_text(rows[0].id, rows[0].content_hash)
+        return ChatContext(document_id=rows[0].id, title=rows[0].first, content=content, history=history)
+
+    async def _document_text(self, document_id: int, content_hash: Optional[str]) -> str:
+        # Un carácter más que el límite para que el cliente sepa si el texto sigue
+        max_chars = DOCUMENT_CONTEXT_CHARS + 1
+        content = await asyncio.to_thread(read_text_prefix, content_hash, max_chars)
+        if content is None:
+            # Documento sin blob de texto (anterior al almacén por contenido)
+            content = await self.db.scalar(select(Document.content).where(Document.id == document_id))
+            await self.db.commit()
+            content = (content or "")[:max_chars]
+        return content
+
+    async def append_turn(self, user_id: int, document_id: int, message: str, response: str) -> Dict:
+        """
+        Guarda el turno y devuelve su id y fecha cuando el lote está confirmado.
+        """
+        if self.db.in_transaction():
+            await self.db.rollback()
+        return await chat_writer.submit(ChatTurn(
+            user_id=user_id,
+            document_id=document_id,
+            message=message,
+            response=response,
+            timestamp=datetime.now()
+        ))
@@ -1,10 +1,25 @@
 from sqlalchemy.orm import Session
-from App.Models.models import ChatHistory, Document
-from typing import List, Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from App.Models.models import ChatHistory, ChatArchive, Document
+from typing import List, Dict, Optional
+from App.Utils.pagination import Page, keyset_query, keyset_page, DEFAULT_PAGE_SIZE
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Orden del historial (más reciente primero); el id desempata mensajes con la misma fecha
+HISTORY_ORDER = (ChatHistory.timestamp, ChatHistory.id)
+
+
+def _history_page_query(user_id: int, document_id: int, cursor: Optional[str], limit: int):
+    query = select(ChatHistory).where(
+        ChatHistory.document_id == document_id,
+        ChatHistory.user_id == user_id
+    )
+    return keyset_query(query, HISTORY_ORDER, cursor, limit, descending=True)
+
+
 class ChatService: 
     def __init__(self, db: Session):
         self.db = db
@@ -40,6 +55,16 @@ class ChatService:
         except Exception as e:
             logger.error(f"Error retrieving chat history: {e}")
             raise
+
+    def get_chat_history_page(
+        self, user_id: int, document_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        """
+        Página del historial, del mensaje más reciente al más antiguo. `cursor` es el
+        `next_cursor` de la página anterior.
+        """
+        rows = self.db.scalars(_history_page_query(user_id, document_id, cursor, limit)).all()
+        return keyset_page(rows, HISTORY_ORDER, limit)
         
     def clear_chat_history(self, user_id:int, document_id:int) -> bool:
         try:
@@ -47,14 +72,83 @@ class ChatService:
                 ChatHistory.document_id == document_id,
                 ChatHistory.user_id == user_id
             ).delete()
+            self.db.query(ChatArchive).filter(
+                ChatArchive.document_id == document_id,
+                ChatArchive.user_id == user_id
+            ).delete()
             self.db.commit()
             return True
         
         except Exception as e:
             self.db.rollback()
             logger.error(f"Error clearing chat history: {e}")
-            return False    
-        
-            
-            
-                
\ No newline at end of file
+            return False
+
+
+class AsyncChatService:
+    """
+    Variante asíncrona de ChatService para los endpoints `async def`.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def save_message(self, user_id: int, document_id: int, message: str, response: str) -> ChatHistory:
+        try:
+            chat_entry = ChatHistory(
+                user_id=user_id,
+                document_id=document_id,
+                message=message,
+                response=response
+            )
+
+            self.db.add(chat_entry)
+            await self.db.commit()
+            await self.db.refresh(chat_entry)
+            return chat_entry
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error saving message: {e}")
+            raise
+
+    async def get_chat_history(self, user_id: int, document_id: int, limit: int = 20) -> List[ChatHistory]:
+        try:
+            result = await self.db.execute(
+                select(ChatHistory).where(
+                    ChatHistory.document_id == document_id,
+                    ChatHistory.user_id == user_id
+                ).order_by(ChatHistory.timestamp.desc()).limit(limit)
+            )
+            return list(result.scalars().all())
+
+        except Exception as e:
+            logger.error(f"Error retrieving chat history: {e}")
+            raise
+
+    async def get_chat_history_page(
+        self, user_id: int, document_id: int, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
+        rows = (await self.db.scalars(_history_page_query(user_id, document_id, cursor, limit))).all()
+        return keyset_page(rows, HISTORY_ORDER, limit)
+
+    async def clear_chat_history(self, user_id: int, document_id: int) -> bool:
+        try:
+            await self.db.execute(
+                delete(ChatHistory).where(
+                    ChatHistory.document_id == document_id,
+                    ChatHistory.user_id == user_id
+                )
+            )
+            await self.db.execute(
+                delete(ChatArchive).where(
+                    ChatArchive.document_id == document_id,
+                    ChatArchive.user_id == user_id
+                )
+            )
+            await self.db.commit()
+            return True
+
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Error clearing chat history: {e}")
+            return False
@@ -0,0 +1,187 @@
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import logging
+import os
+from App.Core.cache import invalidate_document
+from App.Database.database import SessionLocal
+from App.Models.models import User, Subject, Document, Quiz, QuizAttempt
+from App.Services.attempt_ingestion_services import invalidate_answer_key
+from App.Services.blob_services import BlobService
+from App.Services.stats_rollup_services import (
+    StatsRollupService, QuizStatsRollupService, SubjectStatsRollupService
+)
+from App.Utils.blob_store import blob_store
+from App.Utils.file_responses import invalidate_file_meta
+
+logger = logging.getLogger(__name__)
+
+# Solo se borran archivos dentro del directorio de subidas (documentos y audio)
+STORAGE_ROOT = Path("Public").resolve()
+
+
+def remove_stored_files(paths: List[str]) -> None:
+    """
+    Borra del disco los archivos de documentos eliminados. Se ejecuta en segundo
+    plano, después de confirmar el borrado en la base de datos. Los blobs solo se
+    borran si siguen sin referencias (ver BlobService.remove_unreferenced).
+    """
+    blob_paths = [path for path in paths if blob_store.hash_for_path(path)]
+    if blob_paths:
+        _remove_blobs(blob_paths)
+    for path in paths:
+        if path in blob_paths:
+            continue
+        resolved = Path(path).resolve()
+        if STORAGE_ROOT not in resolved.parents:
+            logger.warning(f"⚠️ No se borra {path}: está fuera de {STORAGE_ROOT}")
+            continue
+        try:
+            os.remove(resolved)
+            logger.info(f"🗑️ Archivo eliminado: {resolved}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"❌ No se pudo borrar {resolved}: {e}")
+        invalidate_file_meta(path)
+        invalidate_file_meta(str(resolved))
+
+
+def _remove_blobs(paths: List[str]) -> None:
+    db = SessionLocal()
+    try:
+        blobs = BlobService(db)
+        for path in paths:
+            try:
+                if blobs.remove_unreferenced(blob_store.hash_for_path(path)):
+                    logger.info(f"🗑️ Blob eliminado: {path}")
+            except Exception as e:
+                logger.error(f"❌ No se pudo borrar el blob {path}: {e}")
+            invalidate_file_meta(path)
+    finally:
+        db.close()
+
+
+class DeletionService:
+    """
+    Borrado de documentos, materias y usuarios con una sola sentencia DELETE: las
+    filas dependientes (quizzes, intentos, chats, planes...) las elimina la base de
+    datos con ON DELETE CASCADE, sin cargarlas en memoria.
+
+    Antes del borrado se anotan los resúmenes de estadísticas que quedarían
+    desalineados (de otros usuarios, quizzes o materias que sobreviven) para
+    recalcularlos en la misma transacción, y los archivos que hay que borrar del disco.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def delete_document(self, document_id: int, user_id: int) -> List[str]:
+        """
+        Borra un documento del usuario. Devuelve los archivos que hay que borrar del disco.
+        """
+        subject_id = self.db.scalar(
+            select(Document.subject_id)
+            .join(Subject, Document.subject_id == Subject.id)
+            .where(Document.id == document_id, Subject.user_id == user_id)
+        )
+        if subject_id is None:
+            raise ValueError(f"Documento con ID {document_id} no encontrado.")
+
+        documents = select(Document.id).where(Document.id == document_id)
+        return self._delete(
+            delete(Document).where(Document.id == document_id),
+            documents,
+            keep_subjects={subject_id}
+        )
+
+    def delete_subject(self, subject_id: int, user_id: int) -> List[str]:
+        owner = self.db.scalar(select(Subject.user_id).where(Subject.id == subject_id))
+        if owner is None or owner != user_id:
+            raise ValueError(f"Materia con ID {subject_id} no encontrada.")
+
+        documents = select(Document.id).where(Document.subject_id == subject_id)
+        return self._delete(delete(Subject).where(Subject.id == subject_id), documents)
+
+    def delete_user(self, user_id: int) -> List[str]:
+        if self.db.get(User, user_id) is None:
+            raise ValueError(f"Usuario con ID {user_id} no encontrado.")
+
+        documents = select(Document.id).join(Subject, Document.subject_id == Subject.id).where(Subject.user_id == user_id)
+        return self._delete(delete(User).where(User.id == user_id), documents, deleted_user_id=user_id)
+
+    def _delete(
+        self,
+        statement,
+        documents,
+        keep_subjects: Optional[Set[int]] = None,
+        deleted_user_id: Optional[int] = None
+    ) -> List[str]:
+        quizzes = select(Quiz.id).where(Quiz.document_id.in_(documents))
+        quiz_ids = list(self.db.scalars(quizzes))
+        document_ids = list(self.db.scalars(documents))
+        files, blob_hashes = self._stored_files(documents)
+        stale = self._stale_rollups(quizzes, keep_subjects or set(), deleted_user_id)
+
+        self.db.execute(statement, execution_options={"synchronize_session": False})
+        # Los objetos borrados en cascada pueden seguir en la sesión
+        self.db.expunge_all()
+
+        orphan_blobs = BlobService(self.db).release(blob_hashes)
+        for user_id in sorted(stale["users"]):
+            StatsRollupService(self.db).rebuild(user_id)
+        for quiz_id in sorted(stale["quizzes"]):
+            QuizStatsRollupService(self.db).rebuild(quiz_id)
+        for subject_id in sorted(stale["subjects"]):
+            SubjectStatsRollupService(self.db).rebuild(subject_id)
+        self.db.commit()
+
+        for quiz_id in quiz_ids:
+            invalidate_answer_key(quiz_id)
+        for document_id in document_ids:
+            invalidate_document(document_id)
+
+        # Un mismo archivo puede estar referenciado por otro documento (misma ruta de subida)
+        still_used = set(self.db.scalars(select(Document.file_path).where(Document.file_path.in_(files))))
+        return [path for path in files if path not in still_used] + orphan_blobs
+
+    def _stored_files(self, documents) -> Tuple[List[str], List[str]]:
+        """
+        Archivos sueltos (audio y subidas sin migrar al almacén por contenido) y
+        referencias a blobs (archivo y texto) de los documentos que se van a borrar.
+        """
+        files, blob_hashes = [], []
+        for file_path, file_hash, content_hash, audio_url in self.db.execute(
+            select(Document.file_path, Document.file_hash, Document.content_hash, Document.audio_url)
+            .where(Document.id.in_(documents))
+        ):
+            if file_hash:
+                blob_hashes.extend((file_hash, content_hash))
+            elif file_path:
+                files.append(file_path)
+            if audio_url:
+                files.append(audio_url)
+        return files, blob_hashes
+
+    def _stale_rollups(self, quizzes, keep_subjects: Set[int], deleted_user_id: Optional[int]) -> Dict[str, Set[int]]:
+        """
+        Resúmenes que sobreviven al borrado pero incluyen intentos que se van a borrar.
+        """
+        users = set(self.db.scalars(select(QuizAttempt.user_id).where(QuizAttempt.quiz_id.in_(quizzes)).distinct()))
+        stale_quizzes: Set[int] = set()
+        subjects = set(keep_subjects)
+        if deleted_user_id is not None:
+            users.discard(deleted_user_id)
+            # Intentos del usuario en quizzes de otros usuarios
+            rows = self.db.execute(
+                select(Quiz.id, Document.subject_id)
+                .join(Document, Quiz.document_id == Document.id)
+                .join(Subject, Document.subject_id == Subject.id)
+                .where(
+                    Quiz.id.in_(select(QuizAttempt.quiz_id).where(QuizAttempt.user_id == deleted_user_id)),
+                    Subject.user_id != deleted_user_id
+                )
+            ).all()
+            stale_quizzes = {row.id for row in rows}
+            subjects |= {row.subject_id for row in rows}
+        return {"users": users, "quizzes": stale_quizzes, "subjects": subjects}
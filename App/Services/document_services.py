@@ -1,44 +1,195 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached, undefer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import inspect, select
+from typing import BinaryIO, Optional
+import hashlib
 import os
+from App.Core.cache import cache, document_key
 from App.Models.models import Document
+from App.Services.blob_services import BlobService
+from App.Services.search_services import SearchIndexService
+from App.Utils.blob_store import blob_store
 from App.Utils.pdf_extract import pdf_extractor
 
+
+class DocumentNotFoundError(Exception):
+    """
+    El documento pedido no existe. Los controladores lo traducen en un 404; no
+    deriva de LookupError para no confundirse con un KeyError de datos mal formados.
+    """
+
+
+def hash_content(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Columnas para listados: todo menos el texto completo
+DOCUMENT_LIST_COLUMNS = (
+    Document.id,
+    Document.title,
+    Document.subject_id,
+    Document.file_path,
+    Document.file_name,
+    Document.audio_url,
+)
+
+
+# Columnas que se guardan en la caché: todas menos las diferidas (el texto)
+DOCUMENT_CACHE_FIELDS = tuple(prop.key for prop in inspect(Document).column_attrs if not prop.deferred)
+
+
+def document_snapshot(document: Document) -> dict:
+    return {field: getattr(document, field) for field in DOCUMENT_CACHE_FIELDS}
+
+
+def detached_document(snapshot: dict) -> Document:
+    """
+    Documento reconstruido desde la caché como si viniera de una consulta: al
+    unirlo a la sesión con merge(load=False) no se consulta la base de datos, y el
+    texto (diferido) se carga si se accede a él, igual que en un documento leído.
+    """
+    document = Document(**snapshot)
+    make_transient_to_detached(document)
+    return document
+
+
+def download_name(document) -> str:
+    """
+    Nombre con el que se sirve el archivo: el original de la subida. Los documentos
+    sin migrar al almacén por contenido conservan el nombre en la ruta.
+    """
+    return document.file_name or os.path.basename(document.file_path)
+
+
+def read_text_prefix(content_hash: Optional[str], max_chars: int) -> Optional[str]:
+    """
+    Primeros max_chars caracteres del texto de un documento leídos del blob de
+    texto (mmap), sin cargar ni descomprimir Document.content. None si el documento
+    no tiene blob de texto.
+    """
+    if not content_hash:
+        return None
+    return blob_store.read_text_prefix(content_hash, max_chars)
+
+
+def read_text(content_hash: Optional[str]) -> Optional[str]:
+    """
+    Texto completo de un documento leído del blob de texto (mmap). None si el
+    documento no tiene blob de texto.
+    """
+    if not content_hash:
+        return None
+    return blob_store.read_text(content_hash)
+
+
 class DocumentService():
     def __init__(self, db: Session):
         self.db = db
 
-    def save_document(self, file_path: str, subject_id: int) -> Document:
-        """
-        Procesa un archivo PDF ya guardado en disco y lo registra en la base de datos.
-        """
-        if not os.path.exists(file_path):
-            raise ValueError(f"El archivo no existe: {file_path}")
-
-        text, error, metadata = pdf_extractor.extract_text(file_path)
-        if error or not text:
-            raise ValueError(f"Error al extraer el texto del PDF: {error}")
-        
-        filename = os.path.basename(file_path)
-        title = os.path.splitext(filename)[0]
-        
-        doc = Document(
-            title= title,
-            content=text,
-            file_path=file_path,
-            subject_id=subject_id
-        )
-        
-        self.db.add(doc)
-        self.db.commit()
+    def save_upload(self, source: BinaryIO, file_name: str, subject_id: int) -> Document:
+        """
+        Guarda un archivo subido en el almacén por contenido, extrae su texto y
+        registra el documento. Subidas idénticas (de cualquier usuario) comparten el
+        blob del archivo y el del texto; el nombre original se guarda en `file_name`.
+        El texto solo se guarda en su blob: Document.content queda vacío.
+        """
+        file_name = os.path.basename(file_name or "")
+        if not file_name:
+            raise ValueError("El archivo no tiene nombre")
+
+        # El extractor elige el formato por la extensión del temporal
+        staged = [blob_store.stage(source, suffix=os.path.splitext(file_name)[1].lower())]
+        try:
+            text, error, metadata = pdf_extractor.extract_text(staged[0].temp_path)
+            if error or not text:
+                raise ValueError(f"Error al extraer el texto del PDF: {error}")
+            staged.append(blob_store.stage_bytes(text.encode("utf-8")))
+            file_blob, text_blob = staged
+
+            doc = Document(
+                title=os.path.splitext(file_name)[0],
+                content_hash=text_blob.hash,
+                file_path=blob_store.path(file_blob.hash),
+                file_hash=file_blob.hash,
+                file_name=file_name,
+                subject_id=subject_id
+            )
+            BlobService(self.db).acquire(staged)
+            self.db.add(doc)
+            SearchIndexService(self.db).index_document(doc, text)
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            for blob in staged:
+                blob_store.discard(blob)
+            raise
+
+        # Con la referencia ya confirmada, el archivo no puede borrarse por huérfano
+        for blob in staged:
+            blob_store.commit(blob)
         self.db.refresh(doc)
-        
         return doc
 
-    def get_document(self, doc_id: int) -> Document:
+    def get_document(self, doc_id: int, load_content: bool = False) -> Document:
         """
         Recupera un documento de la base de datos por su ID.
+        `load_content` trae Document.content, que solo tienen los documentos sin blob
+        de texto (ver get_text); si no, se carga al acceder a él.
+        Sin `load_content` los datos del documento se sirven desde la caché de lectura.
         """
-        return self.db.query(Document).filter(Document.id == doc_id).first()
+        query = self.db.query(Document).filter(Document.id == doc_id)
+        if load_content:
+            return query.options(undefer(Document.content)).first()
+
+        snapshot = cache.get(document_key(doc_id))
+        if snapshot is not None:
+            return self.db.merge(detached_document(snapshot), load=False)
+        version = cache.version()
+        document = query.first()
+        if document:
+            cache.set(document_key(doc_id), document_snapshot(document), version)
+        return document
+    
+    def get_file_paths(self, doc_id: int):
+        """
+        Devuelve solo las rutas del archivo y del audio, sin cargar el contenido del documento.
+        """
+        return (
+            self.db.query(Document.id, Document.file_path, Document.file_name, Document.audio_url)
+            .filter(Document.id == doc_id)
+            .first()
+        )
+
+    def get_content_hash(self, document: Document) -> str:
+        """
+        Devuelve el hash del contenido; se calcula y guarda para documentos antiguos.
+        """
+        if not document.content_hash:
+            document_id = document.id
+            document.content_hash = hash_content(document.content)
+            self.db.commit()
+            cache.invalidate(document_key(document_id))
+        return document.content_hash
+
+    def get_text(self, document: Document) -> str:
+        """
+        Texto completo del documento: del blob de texto o, en documentos anteriores
+        al almacén por contenido, de Document.content.
+        """
+        text = read_text(document.content_hash)
+        if text is None:
+            text = document.content or ""
+        return text
+
+    def get_text_prefix(self, document: Document, max_chars: int) -> str:
+        """
+        Inicio del texto del documento para el contexto del modelo. Se lee del blob
+        de texto; solo los documentos sin él cargan Document.content completo.
+        """
+        prefix = read_text_prefix(document.content_hash, max_chars)
+        if prefix is None:
+            prefix = (document.content or "")[:max_chars]
+        return prefix
     
     def get_document_with_path(self, file_path: str) -> Document:
         """
@@ -47,4 +198,34 @@ class DocumentService():
         return self.db.query(Document).filter(Document.file_path == file_path).first()
 
 
-    
+class AsyncDocumentService():
+    """
+    Variante asíncrona de las consultas de lectura de DocumentService.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_document(self, doc_id: int, load_content: bool = False) -> Document:
+        """
+        En AsyncSession no hay carga perezosa: sin `load_content` no se puede leer
+        `content` (el texto de los documentos sin blob; ver read_text).
+        """
+        query = select(Document).where(Document.id == doc_id)
+        if load_content:
+            result = await self.db.execute(query.options(undefer(Document.content)))
+            return result.scalars().first()
+
+        snapshot = cache.get(document_key(doc_id))
+        if snapshot is not None:
+            return await self.db.merge(detached_document(snapshot), load=False)
+        version = cache.version()
+        document = (await self.db.execute(query)).scalars().first()
+        if document:
+            cache.set(document_key(doc_id), document_snapshot(document), version)
+        return document
+
+    async def get_file_paths(self, doc_id: int):
+        result = await self.db.execute(
+            select(Document.id, Document.file_path, Document.file_name, Document.audio_url).where(Document.id == doc_id)
+        )
+        return result.first()
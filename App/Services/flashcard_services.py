@@ -1,22 +1,85 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from typing import Optional
+from App.Core.cache import cache, flashcards_key
 from App.Models.models import Flashcard
+from App.Services.search_services import SearchIndexService
 
 class FlashcardService:
     def __init__(self, db: Session):
         self.db = db
         
-    def save_flashcard(self, flashcard_data: list, document_id: int) -> list[Flashcard]:
-        flashcards_objects = []
-        for item in flashcard_data:
-            flashcard = Flashcard(
-                question=item['subject'],
-                answer=item['definition'],
-                document_id=document_id
-            )
-            self.db.add(flashcard)
-            flashcards_objects.append(flashcard)
+    def save_flashcard(
+        self,
+        flashcard_data: list,
+        document_id: int,
+        generation_key: Optional[str] = None,
+        replace: bool = False
+    ) -> list[Flashcard]:
+        """
+        Guarda las flashcards generadas. Con `replace` las anteriores del documento
+        se eliminan en la misma transacción.
+        """
+        if replace:
+            self.db.query(Flashcard).filter(Flashcard.document_id == document_id).delete(synchronize_session=False)
+        
+        if not flashcard_data:
+            if replace:
+                SearchIndexService(self.db).index_flashcards(document_id)
+            self.db.commit()
+            cache.invalidate(flashcards_key(document_id))
+            return []
+        
+        # Inserción en bloque; los ids se recuperan con RETURNING
+        flashcard_ids = self.db.scalars(
+            insert(Flashcard).returning(Flashcard.id),
+            [
+                {
+                    "question": item['subject'],
+                    "answer": item['definition'],
+                    "document_id": document_id,
+                    "generation_key": generation_key
+                }
+                for item in flashcard_data
+            ]
+        ).all()
+        SearchIndexService(self.db).index_flashcards(document_id)
         self.db.commit()
-        return flashcards_objects
+        cache.invalidate(flashcards_key(document_id))
+        
+        # Se leen todas de una vez en lugar de refrescar cada objeto expirado tras el commit
+        return (
+            self.db.query(Flashcard)
+            .filter(Flashcard.id.in_(flashcard_ids))
+            .order_by(Flashcard.id)
+            .all()
+        )
+    
+    def find_by_generation_key(self, document_id: int, generation_key: str) -> list[Flashcard]:
+        """
+        Devuelve las flashcards generadas con la misma clave. Las flashcards antiguas
+        sin clave se adoptan para no volver a llamar al modelo.
+        """
+        flashcards = (
+            self.db.query(Flashcard)
+            .filter(Flashcard.generation_key == generation_key)
+            .order_by(Flashcard.id)
+            .all()
+        )
+        if flashcards:
+            return flashcards
+        
+        legacy = (
+            self.db.query(Flashcard)
+            .filter(Flashcard.document_id == document_id, Flashcard.generation_key.is_(None))
+            .order_by(Flashcard.id)
+            .all()
+        )
+        if legacy:
+            for flashcard in legacy:
+                flashcard.generation_key = generation_key
+            self.db.commit()
+        return legacy
     
     def get_flashcards(self, document_id: int) -> list[Flashcard]:
         """
@@ -26,4 +89,18 @@ class FlashcardService:
             self.db.query(Flashcard)
             .filter(Flashcard.document_id == document_id)
             .all()
-        )
\ No newline at end of file
+        )
+    
+    def get_flashcard_payloads(self, document_id: int) -> list[dict]:
+        """
+        Flashcards del documento ya serializadas, desde la caché de lectura.
+        """
+        return cache.get_or_load(flashcards_key(document_id), lambda: [
+            {
+                "id": c.id,
+                "question": c.question,
+                "answer": c.answer,
+                "document_id": c.document_id
+            }
+            for c in self.get_flashcards(document_id)
+        ])
@@ -0,0 +1,330 @@
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from functools import partial
+from typing import Any, NamedTuple, Optional
+import hashlib
+import json
+import logging
+from App.Models.models import Job, CustomStudyPlan, Summary, Flashcard, Quiz
+from App.Services.document_services import DocumentService, DocumentNotFoundError
+from App.Services.summary_services import SummaryService
+from App.Services.flashcard_services import FlashcardService
+from App.Services.quiz_services import QuizService
+from App.Services.study_plan_services import StudyPlanService
+from App.Services.audio_services import AudioService
+from App.Utils.open_ai import OpenAIClient, DOCUMENT_CONTEXT_CHARS, GENERATION_INPUT_CHARS
+
+logger = logging.getLogger(__name__)
+
+VALID_STUDY_PLAN_LEVELS = ["basico", "intermedio", "avanzado"]
+
+FLASHCARD_COUNT = 5
+QUIZ_MIN_QUESTIONS = 5
+
+
+def generation_key(artifact_type: str, document_id: int, params: dict, content_hash: str) -> str:
+    """
+    Clave de unicidad de un artefacto: documento, tipo, parámetros y hash del contenido.
+    """
+    raw = json.dumps([artifact_type, document_id, params, content_hash], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class GenerationInput(NamedTuple):
+    key: str
+    title: str
+    cached: Optional[Any]  # artefacto ya generado, listo para devolver
+    text: Optional[str]  # entrada del modelo si hay que generarlo
+
+
+class GenerationService:
+    """
+    Genera artefactos de estudio con IA y los guarda en sus tablas.
+    Lo usan tanto los endpoints síncronos como los trabajos en segundo plano.
+    El trabajo con la Session síncrona se hace en el pool de hilos (run_in_threadpool);
+    en el bucle de eventos solo se espera la respuesta del modelo.
+    """
+
+    def __init__(self, db: Session, openai_client: Optional[OpenAIClient] = None):
+        self.db = db
+        self._openai_client = openai_client
+        self.document_service = DocumentService(db)
+
+    @property
+    def openai_client(self) -> OpenAIClient:
+        if self._openai_client is None:
+            self._openai_client = OpenAIClient()
+        return self._openai_client
+
+    def _get_document(self, document_id: int):
+        # Sin texto: si el artefacto ya existe no hace falta, y al generar se carga al acceder
+        document = self.document_service.get_document(document_id)
+        if not document:
+            raise DocumentNotFoundError("Document not found")
+        return document
+
+    def _save_generated(self, save, *args, **kwargs):
+        """
+        Guarda la salida del modelo. Si le faltan campos o no tiene la forma esperada,
+        el KeyError/TypeError de los servicios se convierte en un ValueError con un
+        mensaje útil (para la respuesta y para el error del trabajo).
+        """
+        try:
+            return save(*args, **kwargs)
+        except (KeyError, TypeError) as e:
+            self.db.rollback()
+            raise ValueError(f"La respuesta del modelo no tiene el formato esperado: {e!r}") from e
+
+    def _generation_key(self, artifact_type: str, document, params: dict) -> str:
+        content_hash = self.document_service.get_content_hash(document)
+        return generation_key(artifact_type, document.id, params, content_hash)
+
+    def artifact_exists(self, artifact_type: str, document_id: int) -> bool:
+        """
+        Indica si el documento ya tiene un artefacto generado del tipo indicado.
+        """
+        if artifact_type == "audio":
+            document = self._get_document(document_id)
+            return AudioService(self.db).get_cached_audio(document) is not None
+
+        model = {"summary": Summary, "flashcards": Flashcard, "quiz": Quiz}[artifact_type]
+        return self.db.query(model.id).filter(model.document_id == document_id).first() is not None
+
+    async def create_audio(self, document_id: int, force: bool = False) -> dict:
+        audio_service = AudioService(self.db)
+        document = await run_in_threadpool(self._get_document, document_id)
+
+        audio_path = None if force else await run_in_threadpool(audio_service.get_cached_audio, document)
+        if not audio_path:
+            audio_path = await audio_service.generate_audio(document)
+        return {"document_id": document_id, "audio_url": audio_path}
+
+    def _prepare(self, artifact_type: str, document_id: int, params: dict, find_cached, max_chars: int = GENERATION_INPUT_CHARS) -> GenerationInput:
+        """
+        Parte síncrona previa a la llamada al modelo, para el pool de hilos: la clave
+        de generación y el artefacto ya generado (find_cached) o, si no lo hay, el
+        texto que se envía al modelo.
+        """
+        document = self._get_document(document_id)
+        key = self._generation_key(artifact_type, document, params)
+        cached = find_cached(key)
+        if cached is not None:
+            return GenerationInput(key, document.title, cached, None)
+        # Un carácter más que el límite para que el cliente sepa si el texto sigue
+        return GenerationInput(key, document.title, None, self.document_service.get_text_prefix(document, max_chars + 1))
+
+    def _loaded(self, instance):
+        # Tras un commit el objeto queda expirado: se recarga aquí y no al leerlo desde el bucle de eventos
+        if instance is not None and inspect(instance).expired_attributes:
+            self.db.refresh(instance)
+        return instance
+
+    def _cached_summary(self, document_id: int, key: str) -> Optional[dict]:
+        existing = SummaryService(self.db).find_by_generation_key(document_id, key)
+        if not existing:
+            return None
+        logger.info(f"♻️ Resumen existente {existing.id} para documento {document_id}")
+        return _summary_result(self._loaded(existing), cached=True)
+
+    def _save_summary(self, summary: str, document_id: int, key: str, replace: bool) -> dict:
+        saved_summary = SummaryService(self.db).save_summary(summary, document_id, generation_key=key, replace=replace)
+        logger.info(f"✅ Resumen guardado exitosamente con ID {saved_summary.id}")
+        return _summary_result(self._loaded(saved_summary), cached=False)
+
+    async def create_summary(self, document_id: int, force: bool = False) -> dict:
+        """
+        Devuelve el resumen ya generado para el documento o lo genera.
+        Con `force` se regenera y reemplaza al anterior.
+        """
+        find_cached = (lambda key: None) if force else partial(self._cached_summary, document_id)
+        prepared = await run_in_threadpool(self._prepare, "summary", document_id, {}, find_cached)
+        if prepared.cached is not None:
+            return prepared.cached
+
+        logger.info(f"📝 Generando resumen para {prepared.title} ({len(prepared.text)} caracteres)")
+
+        result = await self.openai_client.generate_summary(prepared.text)
+        if not result or "data" not in result or "summary" not in result["data"]:
+            raise ValueError("El modelo no generó un resumen")
+
+        response = await run_in_threadpool(
+            self._save_summary, result["data"]["summary"], document_id, prepared.key, force
+        )
+        response["meta"] = {
+            "model": result.get("model"),
+            "response_time": result.get("response_time"),
+            "tokens_used": result.get("usage", {}).get("total_tokens", 0)
+        }
+        return response
+
+    def _cached_flashcards(self, document_id: int, key: str) -> Optional[dict]:
+        flashcards = FlashcardService(self.db).find_by_generation_key(document_id, key)
+        return _flashcards_result([self._loaded(fc) for fc in flashcards], cached=True) if flashcards else None
+
+    def _save_flashcards(self, flashcards: list, document_id: int, key: str, replace: bool) -> dict:
+        saved = self._save_generated(
+            FlashcardService(self.db).save_flashcard, flashcards, document_id, generation_key=key, replace=replace
+        )
+        return _flashcards_result(saved, cached=False)
+
+    async def create_flashcards(self, document_id: int, force: bool = False) -> dict:
+        find_cached = (lambda key: None) if force else partial(self._cached_flashcards, document_id)
+        prepared = await run_in_threadpool(
+            self._prepare, "flashcards", document_id, {"count": FLASHCARD_COUNT}, find_cached
+        )
+        if prepared.cached is not None:
+            return prepared.cached
+
+        result = await self.openai_client.generate_flashcards(prepared.text, count=FLASHCARD_COUNT)
+        if not result or "data" not in result or "flashcards" not in result["data"]:
+            raise ValueError("Error generating flashcards")
+
+        return await run_in_threadpool(
+            self._save_flashcards, result["data"]["flashcards"], document_id, prepared.key, force
+        )
+
+    def _cached_quiz(self, document_id: int, key: str) -> Optional[dict]:
+        quiz_service = QuizService(self.db)
+        quiz = quiz_service.find_by_generation_key(document_id, key)
+        return {"cached": True, "quiz": quiz_service.get_quiz_data(quiz)} if quiz is not None else None
+
+    def _save_quiz(self, quiz: dict, document_id: int, key: str, replace: bool) -> dict:
+        quiz_service = QuizService(self.db)
+        saved_quiz = self._save_generated(quiz_service.save_quiz, quiz, document_id, generation_key=key, replace=replace)
+        return {"cached": False, "quiz": quiz_service.get_quiz_data(saved_quiz)}
+
+    async def create_quiz(self, document_id: int, force: bool = False) -> dict:
+        find_cached = (lambda key: None) if force else partial(self._cached_quiz, document_id)
+        prepared = await run_in_threadpool(
+            self._prepare, "quiz", document_id, {"min_questions": QUIZ_MIN_QUESTIONS}, find_cached
+        )
+        if prepared.cached is not None:
+            return prepared.cached
+
+        result = await self.openai_client.generate_quiz(prepared.text, min_questions=QUIZ_MIN_QUESTIONS)
+        if not result or "data" not in result or "quiz" not in result["data"]:
+            raise ValueError("Error generating quiz")
+
+        return await run_in_threadpool(self._save_quiz, result["data"]["quiz"], document_id, prepared.key, force)
+
+    def _cached_study_plan(self, user_id: int, document_id: int, level: str, key: str) -> Optional[CustomStudyPlan]:
+        existing = StudyPlanService(self.db).find_by_generation_key(key, user_id, document_id, level)
+        if existing:
+            logger.info(f"♻️ Plan de estudio existente {existing.id} para documento {document_id}")
+        return self._loaded(existing)
+
+    def _save_study_plan(self, content: dict, level: str, user_id: int, document_id: int, key: str, replace: bool) -> CustomStudyPlan:
+        study_plan = StudyPlanService(self.db).create_study_plan(
+            title=f"Plan de estudio - {level.capitalize()}",
+            level=level,
+            content=content,
+            user_id=user_id,
+            document_id=document_id,
+            generation_key=key,
+            replace=replace
+        )
+        return self._loaded(study_plan)
+
+    async def create_study_plan(self, document_id: int, level: str, user_id: int, force: bool = False) -> CustomStudyPlan:
+        if level.lower() not in VALID_STUDY_PLAN_LEVELS:
+            raise ValueError(f"Nivel inválido. Debe ser uno de: {', '.join(VALID_STUDY_PLAN_LEVELS)}")
+
+        find_cached = (lambda key: None) if force else partial(self._cached_study_plan, user_id, document_id, level)
+        prepared = await run_in_threadpool(
+            self._prepare, "study_plan", document_id, {"level": level.lower(), "user_id": user_id},
+            find_cached, DOCUMENT_CONTEXT_CHARS
+        )
+        if prepared.cached is not None:
+            return prepared.cached
+
+        logger.info(f"Documento {document_id} encontrado, generando plan...")
+
+        ai_response = await self.openai_client.study_plan_personalized(
+            document_content=prepared.text,
+            level_plan=level
+        )
+
+        if not ai_response or "data" not in ai_response:
+            logger.error(f"Respuesta inválida de IA: {ai_response}")
+            raise ValueError("Respuesta inválida del servicio de IA")
+
+        if "study_plan" not in ai_response["data"]:
+            logger.error(f"Falta campo 'study_plan' en data: {ai_response['data']}")
+            raise ValueError("El plan de estudio no fue generado correctamente")
+
+        ai_response_data = ai_response["data"]["study_plan"]
+        logger.info(f"Plan de estudio extraído correctamente: {list(ai_response_data.keys())}")
+
+        return await run_in_threadpool(
+            self._save_study_plan, ai_response_data, level, user_id, document_id, prepared.key, force
+        )
+
+
+def _summary_result(summary: Summary, cached: bool) -> dict:
+    return {
+        "id": summary.id,
+        "content": summary.content,
+        "document_id": summary.document_id,
+        "cached": cached
+    }
+
+
+def _flashcards_result(flashcards: list, cached: bool) -> dict:
+    return {
+        "cached": cached,
+        "count": len(flashcards),
+        "flashcards": [
+            {
+                "id": fc.id,
+                "question": fc.question,
+                "answer": fc.answer
+            }
+            for fc in flashcards
+        ]
+    }
+
+
+def study_plan_payload(study_plan: CustomStudyPlan) -> dict:
+    return {
+        "id": study_plan.id,
+        "title": study_plan.title,
+        "level": study_plan.level,
+        "content": study_plan.content,
+        "user_id": study_plan.user_id,
+        "document_id": study_plan.document_id,
+        "created_at": study_plan.created_at.isoformat() if study_plan.created_at else None,
+        "updated_at": study_plan.updated_at.isoformat() if study_plan.updated_at else None
+    }
+
+
+def _artifact_job(artifact_type: str, create):
+    """
+    Envuelve un generador de artefactos como manejador de trabajos. Con el
+    parámetro `if_missing` (pre-generación) no se duplica un artefacto existente.
+    """
+    async def handler(db: Session, job: Job) -> dict:
+        service = GenerationService(db)
+        if job.params.get("if_missing") and await run_in_threadpool(service.artifact_exists, artifact_type, job.document_id):
+            logger.info(f"⏭️ {artifact_type} ya existe para el documento {job.document_id}, se omite")
+            return {"skipped": True, "document_id": job.document_id}
+        return await create(service, job.document_id, force=job.params.get("force", False))
+    return handler
+
+
+async def _study_plan_job(db: Session, job: Job) -> dict:
+    study_plan = await GenerationService(db).create_study_plan(
+        job.document_id, job.params["level"], job.user_id, force=job.params.get("force", False)
+    )
+    return study_plan_payload(study_plan)
+
+
+def register_generation_jobs(queue) -> None:
+    """
+    Registra los manejadores de generación en la cola de trabajos.
+    """
+    queue.register("summary", _artifact_job("summary", GenerationService.create_summary))
+    queue.register("flashcards", _artifact_job("flashcards", GenerationService.create_flashcards))
+    queue.register("quiz", _artifact_job("quiz", GenerationService.create_quiz))
+    queue.register("audio", _artifact_job("audio", GenerationService.create_audio))
+    queue.register("study_plan", _study_plan_job)
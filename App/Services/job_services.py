@@ -0,0 +1,153 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import update
+from datetime import datetime, timedelta
+from typing import Optional, List
+from App.Models.models import Job
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+TERMINAL_STATUSES = (COMPLETED, FAILED)
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class JobService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_job(
+        self,
+        job_type: str,
+        params: dict,
+        user_id: Optional[int] = None,
+        document_id: Optional[int] = None,
+        priority: int = PRIORITY_INTERACTIVE
+    ) -> Job:
+        """
+        Registra un nuevo trabajo en estado pendiente.
+        """
+        job = Job(
+            job_type=job_type,
+            status=PENDING,
+            params=params or {},
+            user_id=user_id,
+            document_id=document_id,
+            priority=priority
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get_job(self, job_id: int) -> Optional[Job]:
+        return self.db.query(Job).filter(Job.id == job_id).first()
+
+    def find_active_job(self, document_id: int, job_type: str) -> Optional[Job]:
+        """
+        Devuelve un trabajo pendiente o en ejecución del mismo tipo para el documento.
+        """
+        return (
+            self.db.query(Job)
+            .filter(
+                Job.document_id == document_id,
+                Job.job_type == job_type,
+                Job.status.in_((PENDING, RUNNING))
+            )
+            .first()
+        )
+
+    def claim_job(self, job_id: int) -> bool:
+        """
+        Marca un trabajo pendiente como en ejecución de forma atómica.
+        Devuelve False si otro worker ya lo tomó.
+        """
+        now = datetime.now()
+        result = self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == PENDING)
+            .values(status=RUNNING, started_at=now, updated_at=now, attempts=Job.attempts + 1)
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def heartbeat(self, job_id: int) -> bool:
+        """
+        Renueva updated_at de un trabajo en ejecución para que recover_stale_jobs no
+        lo dé por abandonado. Devuelve False si el trabajo ya no está en ejecución.
+        """
+        result = self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == RUNNING)
+            .values(updated_at=datetime.now())
+        )
+        self.db.commit()
+        return result.rowcount == 1
+
+    def complete_job(self, job_id: int, result: dict) -> None:
+        self._finish(job_id, COMPLETED, result=result)
+
+    def fail_job(self, job_id: int, error: str) -> None:
+        self._finish(job_id, FAILED, error=error)
+
+    def release_job(self, job_id: int) -> None:
+        """
+        Devuelve un trabajo en ejecución a la cola (por ejemplo, al apagar el worker).
+        """
+        self.db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == RUNNING)
+            .values(status=PENDING, updated_at=datetime.now())
+        )
+        self.db.commit()
+
+    def get_pending_job_ids(self, background: bool = False, limit: int = 100) -> List[int]:
+        """
+        Devuelve los IDs de los trabajos pendientes de una clase de prioridad.
+        """
+        if background:
+            priority_filter = Job.priority >= PRIORITY_BACKGROUND
+        else:
+            priority_filter = Job.priority < PRIORITY_BACKGROUND
+
+        rows = (
+            self.db.query(Job.id)
+            .filter(Job.status == PENDING, priority_filter)
+            .order_by(Job.id)
+            .limit(limit)
+            .all()
+        )
+        return [row.id for row in rows]
+
+    def recover_stale_jobs(self, stale_seconds: int, max_attempts: int) -> int:
+        """
+        Reencola los trabajos que quedaron en ejecución tras la caída de un worker:
+        los que llevan stale_seconds sin latido (ver heartbeat). Los que superan el
+        número máximo de intentos se marcan como fallidos.
+        """
+        cutoff = datetime.now() - timedelta(seconds=stale_seconds)
+        stale = (Job.status == RUNNING) & (Job.updated_at < cutoff)
+
+        self.db.execute(
+            update(Job)
+            .where(stale, Job.attempts >= max_attempts)
+            .values(status=FAILED, error="Máximo de intentos alcanzado", finished_at=datetime.now())
+        )
+        result = self.db.execute(
+            update(Job)
+            .where(stale, Job.attempts < max_attempts)
+            .values(status=PENDING, updated_at=datetime.now())
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def _finish(self, job_id: int, status: str, result: dict = None, error: str = None) -> None:
+        now = datetime.now()
+        self.db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(status=status, result=result, error=error, finished_at=now, updated_at=now)
+        )
+        self.db.commit()
@@ -0,0 +1,164 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from App.Models.models import QuizAttempt, Quiz, Document, Subject, QuizStatsRollup, SubjectStatsRollup
+from App.Services.stats_rollup_services import subject_scores_query
+from App.Utils.score_sketch import ScoreSketch, SKETCH_BIN_WIDTH
+
+QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+
+def _quiz_scores_query(quiz_id: int):
+    return select(QuizAttempt.score).where(QuizAttempt.quiz_id == quiz_id)
+
+
+def _latest_score_query(user_id: int, quiz_id: Optional[int] = None, subject_id: Optional[int] = None):
+    query = select(QuizAttempt.score).where(QuizAttempt.user_id == user_id)
+    if quiz_id is not None:
+        query = query.where(QuizAttempt.quiz_id == quiz_id)
+    if subject_id is not None:
+        query = (
+            query.join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+            .join(Document, Quiz.document_id == Document.id)
+            .where(Document.subject_id == subject_id)
+        )
+    return query.order_by(QuizAttempt.completed_at.desc(), QuizAttempt.id.desc()).limit(1)
+
+
+def _from_rollup(rollup) -> Tuple[ScoreSketch, float]:
+    return ScoreSketch(rollup.score_histogram), rollup.score_sum
+
+
+def _from_scores(scores: List[float]) -> Tuple[ScoreSketch, float]:
+    # Aún sin resumen (antes del backfill): se calcula en memoria sin guardarlo
+    return ScoreSketch.from_scores(scores), float(sum(scores))
+
+
+def _percentile_result(scope: str, scope_id: int, score: float, sketch: ScoreSketch) -> Dict:
+    return {
+        "scope": scope,
+        "scope_id": scope_id,
+        "score": score,
+        "percentile_rank": round(sketch.percentile_rank(score), 2),
+        "error_bound": round(sketch.rank_error(score), 2),
+        "total_attempts": sketch.total
+    }
+
+
+def _distribution_result(scope: str, scope_id: int, sketch: ScoreSketch, score_sum: float, bin_width: int) -> Dict:
+    total = sketch.total
+    return {
+        "scope": scope,
+        "scope_id": scope_id,
+        "total_attempts": total,
+        "average_score": score_sum / total if total else 0.0,
+        "quantiles": {f"p{int(q * 100)}": sketch.quantile(q) for q in QUANTILES},
+        "error_bound": SKETCH_BIN_WIDTH,
+        "histogram": sketch.histogram(bin_width)
+    }
+
+
+class PercentileService:
+    """
+    Percentil y distribución de puntuaciones por quiz y por materia a partir de los
+    ScoreSketch de QuizStatsRollup y SubjectStatsRollup: cada consulta lee una fila,
+    sin ordenar los intentos. Las cotas de error se documentan en ScoreSketch.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _quiz_sketch(self, quiz_id: int) -> Tuple[ScoreSketch, float]:
+        rollup = self.db.get(QuizStatsRollup, quiz_id)
+        if rollup is not None:
+            return _from_rollup(rollup)
+        if self.db.get(Quiz, quiz_id) is None:
+            raise ValueError(f"Quiz con ID {quiz_id} no encontrado.")
+        return _from_scores(list(self.db.scalars(_quiz_scores_query(quiz_id))))
+
+    def _subject_sketch(self, subject_id: int) -> Tuple[ScoreSketch, float]:
+        rollup = self.db.get(SubjectStatsRollup, subject_id)
+        if rollup is not None:
+            return _from_rollup(rollup)
+        if self.db.get(Subject, subject_id) is None:
+            raise ValueError(f"Materia con ID {subject_id} no encontrada.")
+        return _from_scores(list(self.db.scalars(subject_scores_query(subject_id))))
+
+    def _latest_score(self, user_id: int, **scope) -> float:
+        score = self.db.scalar(_latest_score_query(user_id, **scope))
+        if score is None:
+            raise ValueError("El usuario no tiene intentos registrados.")
+        return score
+
+    def get_quiz_percentile(self, quiz_id: int, user_id: int, score: Optional[float] = None) -> Dict:
+        """
+        Percentil de `score` (por defecto, el último intento del usuario) entre los intentos del quiz.
+        """
+        sketch, _ = self._quiz_sketch(quiz_id)
+        if score is None:
+            score = self._latest_score(user_id, quiz_id=quiz_id)
+        return _percentile_result("quiz", quiz_id, score, sketch)
+
+    def get_subject_percentile(self, subject_id: int, user_id: int, score: Optional[float] = None) -> Dict:
+        sketch, _ = self._subject_sketch(subject_id)
+        if score is None:
+            score = self._latest_score(user_id, subject_id=subject_id)
+        return _percentile_result("subject", subject_id, score, sketch)
+
+    def get_quiz_distribution(self, quiz_id: int, bin_width: int = 10) -> Dict:
+        sketch, score_sum = self._quiz_sketch(quiz_id)
+        return _distribution_result("quiz", quiz_id, sketch, score_sum, bin_width)
+
+    def get_subject_distribution(self, subject_id: int, bin_width: int = 10) -> Dict:
+        sketch, score_sum = self._subject_sketch(subject_id)
+        return _distribution_result("subject", subject_id, sketch, score_sum, bin_width)
+
+
+class AsyncPercentileService:
+    """
+    Variante asíncrona de PercentileService.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _quiz_sketch(self, quiz_id: int) -> Tuple[ScoreSketch, float]:
+        rollup = await self.db.get(QuizStatsRollup, quiz_id)
+        if rollup is not None:
+            return _from_rollup(rollup)
+        if await self.db.get(Quiz, quiz_id) is None:
+            raise ValueError(f"Quiz con ID {quiz_id} no encontrado.")
+        return _from_scores(list((await self.db.scalars(_quiz_scores_query(quiz_id))).all()))
+
+    async def _subject_sketch(self, subject_id: int) -> Tuple[ScoreSketch, float]:
+        rollup = await self.db.get(SubjectStatsRollup, subject_id)
+        if rollup is not None:
+            return _from_rollup(rollup)
+        if await self.db.get(Subject, subject_id) is None:
+            raise ValueError(f"Materia con ID {subject_id} no encontrada.")
+        return _from_scores(list((await self.db.scalars(subject_scores_query(subject_id))).all()))
+
+    async def _latest_score(self, user_id: int, **scope) -> float:
+        score = await self.db.scalar(_latest_score_query(user_id, **scope))
+        if score is None:
+            raise ValueError("El usuario no tiene intentos registrados.")
+        return score
+
+    async def get_quiz_percentile(self, quiz_id: int, user_id: int, score: Optional[float] = None) -> Dict:
+        sketch, _ = await self._quiz_sketch(quiz_id)
+        if score is None:
+            score = await self._latest_score(user_id, quiz_id=quiz_id)
+        return _percentile_result("quiz", quiz_id, score, sketch)
+
+    async def get_subject_percentile(self, subject_id: int, user_id: int, score: Optional[float] = None) -> Dict:
+        sketch, _ = await self._subject_sketch(subject_id)
+        if score is None:
+            score = await self._latest_score(user_id, subject_id=subject_id)
+        return _percentile_result("subject", subject_id, score, sketch)
+
+    async def get_quiz_distribution(self, quiz_id: int, bin_width: int = 10) -> Dict:
+        sketch, score_sum = await self._quiz_sketch(quiz_id)
+        return _distribution_result("quiz", quiz_id, sketch, score_sum, bin_width)
+
+    async def get_subject_distribution(self, subject_id: int, bin_width: int = 10) -> Dict:
+        sketch, score_sum = await self._subject_sketch(subject_id)
+        return _distribution_result("subject", subject_id, sketch, score_sum, bin_width)
@@ -0,0 +1,57 @@
+from sqlalchemy.orm import Session
+from typing import List
+import logging
+from App.Core.config import settings
+from App.Core.job_queue import submit_job
+from App.Models.models import Document, Job, Subject
+from App.Services.generation_services import GenerationService
+from App.Services.job_services import JobService, PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+PREGENERATED_ARTIFACTS = ("summary", "flashcards", "quiz", "audio")
+
+
+class PregenerationService:
+    """
+    Encola la generación anticipada de artefactos tras la ingesta de un documento,
+    para que la primera consulta de resumen, flashcards, quiz o audio ya esté lista.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def is_enabled(self, subject: Subject) -> bool:
+        """
+        La configuración de la materia tiene prioridad sobre la global.
+        """
+        if subject is not None and subject.pregenerate is not None:
+            return subject.pregenerate
+        return settings.PREGENERATE_ARTIFACTS
+
+    def schedule(self, document: Document, subject: Subject) -> List[Job]:
+        if not self.is_enabled(subject):
+            return []
+
+        generation_service = GenerationService(self.db)
+        job_service = JobService(self.db)
+        jobs = []
+
+        for artifact_type in PREGENERATED_ARTIFACTS:
+            if generation_service.artifact_exists(artifact_type, document.id):
+                continue
+            if job_service.find_active_job(document.id, artifact_type):
+                continue
+
+            jobs.append(submit_job(
+                self.db,
+                artifact_type,
+                {"if_missing": True},
+                user_id=subject.user_id,
+                document_id=document.id,
+                priority=PRIORITY_BACKGROUND
+            ))
+
+        if jobs:
+            logger.info(f"🗂️ Pre-generación encolada para documento {document.id}: {[job.job_type for job in jobs]}")
+        return jobs
@@ -0,0 +1,499 @@
+from sqlalchemy import delete, func, select, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from App.Models.models import QuizAttempt, Quiz, Document, Subject, ProgressRollup, UserStatsRollup
+
+# Los tramos se calculan en UTC, igual que QuizAttempt.completed_at
+PERIODS = ("day", "week")
+MAX_TIMELINE_POINTS = {"day": 366, "week": 260}
+
+BucketKey = Tuple[int, int, str, date]  # (user_id, document_id, period, period_start)
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """
+    QuizAttempt.completed_at es DateTime sin zona horaria: se guarda en UTC sin
+    tzinfo (asyncpg rechaza los valores con zona en columnas sin ella).
+    """
+    if moment.tzinfo:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def utc_now() -> datetime:
+    return naive_utc(datetime.now(timezone.utc))
+
+
+def period_start(moment: datetime, period: str) -> date:
+    day = naive_utc(moment).date()
+    return day - timedelta(days=day.weekday()) if period == "week" else day
+
+
+def _next_period(start: date, period: str) -> date:
+    return start + timedelta(days=7 if period == "week" else 1)
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _rollup_key(rollup: ProgressRollup) -> BucketKey:
+    return rollup.user_id, rollup.document_id, rollup.period, rollup.period_start
+
+
+def _apply_attempt(rollup: ProgressRollup, attempt: QuizAttempt) -> None:
+    rollup.attempts = (rollup.attempts or 0) + 1
+    rollup.score_sum = (rollup.score_sum or 0.0) + attempt.score
+    rollup.best_score = attempt.score if rollup.best_score is None else max(rollup.best_score, attempt.score)
+    rollup.total_time = (rollup.total_time or 0) + (attempt.time_taken or 0)
+
+
+def _fill_bucket(rollup: ProgressRollup, totals) -> None:
+    rollup.attempts = totals.attempts
+    rollup.score_sum = float(totals.score_sum or 0.0)
+    rollup.best_score = totals.best_score
+    rollup.total_time = int(totals.total_time or 0)
+
+
+def _group_by_bucket(attempts: Iterable[QuizAttempt], quizzes: Dict[int, tuple]) -> Dict[BucketKey, tuple]:
+    """
+    Agrupa intentos por tramo: {clave: (subject_id, [intentos])}.
+    """
+    buckets: Dict[BucketKey, tuple] = {}
+    for attempt in attempts:
+        quiz = quizzes.get(attempt.quiz_id)
+        if quiz is None:
+            continue
+        document_id, subject_id = quiz
+        for period in PERIODS:
+            key = (attempt.user_id, document_id, period, period_start(attempt.completed_at, period))
+            buckets.setdefault(key, (subject_id, []))[1].append(attempt)
+    return buckets
+
+
+def _quiz_documents_query(quiz_ids: List[int]):
+    return (
+        select(Quiz.id, Quiz.document_id, Document.subject_id)
+        .join(Document, Quiz.document_id == Document.id)
+        .where(Quiz.id.in_(quiz_ids))
+    )
+
+
+def _locked_buckets_query(keys: Iterable[BucketKey]):
+    keys = list(keys)
+    return (
+        select(ProgressRollup)
+        .where(
+            ProgressRollup.user_id.in_({key[0] for key in keys}),
+            ProgressRollup.document_id.in_({key[1] for key in keys}),
+            ProgressRollup.period.in_({key[2] for key in keys}),
+            ProgressRollup.period_start.in_({key[3] for key in keys})
+        )
+        .order_by(ProgressRollup.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def _bucket_locked_query(key: BucketKey):
+    user_id, document_id, period, start = key
+    return (
+        select(ProgressRollup)
+        .where(
+            ProgressRollup.user_id == user_id,
+            ProgressRollup.document_id == document_id,
+            ProgressRollup.period == period,
+            ProgressRollup.period_start == start
+        )
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def _bucket_totals_query(key: BucketKey):
+    user_id, document_id, period, start = key
+    return (
+        select(
+            func.count(QuizAttempt.id).label("attempts"),
+            func.sum(QuizAttempt.score).label("score_sum"),
+            func.max(QuizAttempt.score).label("best_score"),
+            func.sum(QuizAttempt.time_taken).label("total_time")
+        )
+        .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+        .where(
+            QuizAttempt.user_id == user_id,
+            Quiz.document_id == document_id,
+            QuizAttempt.completed_at >= datetime.combine(start, time.min),
+            QuizAttempt.completed_at < datetime.combine(_next_period(start, period), time.min)
+        )
+    )
+
+
+def _user_attempts_query(user_id: int):
+    return (
+        select(QuizAttempt, Document.id.label("document_id"), Document.subject_id)
+        .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+        .join(Document, Quiz.document_id == Document.id)
+        .where(QuizAttempt.user_id == user_id)
+    )
+
+
+def progress_user_ids_query():
+    """
+    Usuarios con intentos o con tramos existentes (para la compactación completa).
+    """
+    return union(
+        select(QuizAttempt.user_id.label("user_id")),
+        select(ProgressRollup.user_id.label("user_id")),
+    )
+
+
+def _compacted_rollups(user_id: int, rows) -> List[ProgressRollup]:
+    """
+    Tramos recalculados a partir de las filas de _user_attempts_query.
+    """
+    rollups: Dict[BucketKey, ProgressRollup] = {}
+    for attempt, document_id, subject_id in rows:
+        for period in PERIODS:
+            key = (user_id, document_id, period, period_start(attempt.completed_at, period))
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = ProgressRollup(
+                    user_id=user_id, subject_id=subject_id, document_id=document_id,
+                    period=period, period_start=key[3]
+                )
+            _apply_attempt(rollup, attempt)
+    return list(rollups.values())
+
+
+class ProgressRollupService:
+    """
+    Mantiene ProgressRollup en la transacción que registra los intentos (después de
+    los resúmenes de usuario, quiz y materia); no hace commit.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_attempts(self, attempts: List[QuizAttempt]) -> None:
+        self.db.flush()
+        quiz_ids = sorted({attempt.quiz_id for attempt in attempts})
+        quizzes = {row.id: (row.document_id, row.subject_id) for row in self.db.execute(_quiz_documents_query(quiz_ids))}
+        buckets = _group_by_bucket(attempts, quizzes)
+        if not buckets:
+            return
+        rollups = {_rollup_key(rollup): rollup for rollup in self.db.scalars(_locked_buckets_query(buckets))}
+        for key, (subject_id, bucket_attempts) in buckets.items():
+            rollup = rollups.get(key)
+            if rollup is None:
+                # Tramo nuevo (o anterior al backfill): se calcula desde el historial, que ya incluye estos intentos
+                self.rebuild_bucket(key, subject_id)
+                continue
+            for attempt in bucket_attempts:
+                _apply_attempt(rollup, attempt)
+
+    def rebuild_bucket(self, key: BucketKey, subject_id: int) -> ProgressRollup:
+        rollup = self.db.execute(_bucket_locked_query(key)).scalar_one_or_none()
+        if rollup is None:
+            user_id, document_id, period, start = key
+            rollup = ProgressRollup(
+                user_id=user_id, subject_id=subject_id, document_id=document_id, period=period, period_start=start
+            )
+            try:
+                with self.db.begin_nested():
+                    self.db.add(rollup)
+            except IntegrityError:
+                # Otra transacción creó el tramo a la vez: se recalcula sobre su fila
+                rollup = self.db.execute(_bucket_locked_query(key)).scalar_one()
+
+        _fill_bucket(rollup, self.db.execute(_bucket_totals_query(key)).one())
+        return rollup
+
+    def compact_user(self, user_id: int) -> List[ProgressRollup]:
+        """
+        Recalcula todos los tramos del usuario desde el historial (backfill y reparación).
+        """
+        self.db.execute(delete(ProgressRollup).where(ProgressRollup.user_id == user_id))
+        rollups = _compacted_rollups(user_id, self.db.execute(_user_attempts_query(user_id)).all())
+        self.db.add_all(rollups)
+        return rollups
+
+
+class AsyncProgressRollupService:
+    """
+    Variante asíncrona de ProgressRollupService.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply_attempts(self, attempts: List[QuizAttempt]) -> None:
+        await self.db.flush()
+        quiz_ids = sorted({attempt.quiz_id for attempt in attempts})
+        result = await self.db.execute(_quiz_documents_query(quiz_ids))
+        quizzes = {row.id: (row.document_id, row.subject_id) for row in result.all()}
+        buckets = _group_by_bucket(attempts, quizzes)
+        if not buckets:
+            return
+        rollups = {
+            _rollup_key(rollup): rollup for rollup in (await self.db.scalars(_locked_buckets_query(buckets))).all()
+        }
+        for key, (subject_id, bucket_attempts) in buckets.items():
+            rollup = rollups.get(key)
+            if rollup is None:
+                await self.rebuild_bucket(key, subject_id)
+                continue
+            for attempt in bucket_attempts:
+                _apply_attempt(rollup, attempt)
+
+    async def rebuild_bucket(self, key: BucketKey, subject_id: int) -> ProgressRollup:
+        rollup = (await self.db.execute(_bucket_locked_query(key))).scalar_one_or_none()
+        if rollup is None:
+            user_id, document_id, period, start = key
+            rollup = ProgressRollup(
+                user_id=user_id, subject_id=subject_id, document_id=document_id, period=period, period_start=start
+            )
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(rollup)
+            except IntegrityError:
+                rollup = (await self.db.execute(_bucket_locked_query(key))).scalar_one()
+
+        _fill_bucket(rollup, (await self.db.execute(_bucket_totals_query(key))).one())
+        return rollup
+
+
+def _validate_period(period: str) -> None:
+    if period not in PERIODS:
+        raise ValueError(f"Periodo no válido: {period}. Usa 'day' o 'week'.")
+
+
+def _range(period: str, points: int) -> Tuple[date, date]:
+    """
+    Primer y último tramo de una serie de `points` tramos que termina hoy.
+    """
+    points = min(max(points, 1), MAX_TIMELINE_POINTS[period])
+    end = period_start(datetime.now(timezone.utc), period)
+    step = 7 if period == "week" else 1
+    return end - timedelta(days=step * (points - 1)), end
+
+
+def _point(start: date, attempts: int, score_sum: float, best_score: Optional[float], total_time: int) -> Dict:
+    return {
+        "period_start": start.isoformat(),
+        "attempts": attempts,
+        "average_score": round(score_sum / attempts, 2) if attempts else None,
+        "best_score": best_score,
+        "total_time": total_time
+    }
+
+
+def _dense_series(rows, period: str, first: date, last: date) -> List[Dict]:
+    """
+    Serie continua de tramos; los periodos sin intentos aparecen con 0 intentos.
+    """
+    by_start = {row.period_start: row for row in rows}
+    series = []
+    current = first
+    while current <= last:
+        row = by_start.get(current)
+        if row is None:
+            series.append(_point(current, 0, 0.0, None, 0))
+        else:
+            series.append(_point(current, row.attempts, row.score_sum, row.best_score, row.total_time or 0))
+        current = _next_period(current, period)
+    return series
+
+
+def _timeline_query(user_id: int, period: str, first: date, last: date, subject_id: Optional[int] = None):
+    query = (
+        select(
+            ProgressRollup.period_start,
+            func.sum(ProgressRollup.attempts).label("attempts"),
+            func.sum(ProgressRollup.score_sum).label("score_sum"),
+            func.max(ProgressRollup.best_score).label("best_score"),
+            func.sum(ProgressRollup.total_time).label("total_time")
+        )
+        .where(
+            ProgressRollup.user_id == user_id,
+            ProgressRollup.period == period,
+            ProgressRollup.period_start >= first,
+            ProgressRollup.period_start <= last
+        )
+        .group_by(ProgressRollup.period_start)
+    )
+    if subject_id is not None:
+        query = query.where(ProgressRollup.subject_id == subject_id)
+    return query
+
+
+def _active_days_query(user_id: int):
+    return (
+        select(ProgressRollup.period_start)
+        .where(ProgressRollup.user_id == user_id, ProgressRollup.period == "day")
+        .distinct()
+        .order_by(ProgressRollup.period_start)
+    )
+
+
+def _streak(days: List[date]) -> Dict:
+    longest = current = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    # La racha sigue viva si el último día activo es hoy o ayer
+    if previous is None or (_today() - previous).days > 1:
+        current = 0
+    return {
+        "current_streak": current,
+        "longest_streak": longest,
+        "active_days": len(days),
+        "last_active_day": previous.isoformat() if previous else None
+    }
+
+
+def _trend_query(user_id: int, period: str, first: date, last: date):
+    return (
+        select(
+            ProgressRollup.subject_id,
+            Subject.name.label("subject_name"),
+            ProgressRollup.period_start,
+            func.sum(ProgressRollup.attempts).label("attempts"),
+            func.sum(ProgressRollup.score_sum).label("score_sum"),
+            func.max(ProgressRollup.best_score).label("best_score"),
+            func.sum(ProgressRollup.total_time).label("total_time")
+        )
+        .join(Subject, ProgressRollup.subject_id == Subject.id)
+        .where(
+            ProgressRollup.user_id == user_id,
+            ProgressRollup.period == period,
+            ProgressRollup.period_start >= first,
+            ProgressRollup.period_start <= last
+        )
+        .group_by(ProgressRollup.subject_id, Subject.name, ProgressRollup.period_start)
+    )
+
+
+def _slope(series: List[Dict]) -> Optional[float]:
+    """
+    Pendiente (puntos de nota por periodo) de la recta de mínimos cuadrados sobre
+    los periodos con intentos; None con menos de dos puntos.
+    """
+    points = [(index, item["average_score"]) for index, item in enumerate(series) if item["attempts"]]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return round(sum((x - mean_x) * (y - mean_y) for x, y in points) / variance, 3)
+
+
+def _trends(rows, period: str, first: date, last: date) -> List[Dict]:
+    subjects: Dict[int, tuple] = {}
+    for row in rows:
+        subjects.setdefault(row.subject_id, (row.subject_name, []))[1].append(row)
+    trends = []
+    for subject_id, (name, subject_rows) in sorted(subjects.items()):
+        series = _dense_series(subject_rows, period, first, last)
+        attempts = sum(item["attempts"] for item in series)
+        trends.append({
+            "subject_id": subject_id,
+            "subject_name": name,
+            "attempts": attempts,
+            "average_score": round(sum(row.score_sum for row in subject_rows) / attempts, 2) if attempts else None,
+            "slope": _slope(series),
+            "series": series
+        })
+    return trends
+
+
+def _by_document_query(user_id: int):
+    return (
+        select(
+            ProgressRollup.document_id,
+            ProgressRollup.subject_id,
+            func.sum(ProgressRollup.attempts).label("total_attempts"),
+            func.sum(ProgressRollup.score_sum).label("score_sum")
+        )
+        .where(ProgressRollup.user_id == user_id, ProgressRollup.period == "week")
+        .group_by(ProgressRollup.document_id, ProgressRollup.subject_id)
+    )
+
+
+def _by_document(rows, expected_attempts: Optional[int]) -> Optional[List[Dict]]:
+    """
+    Progreso por documento desde los tramos semanales, o None si los tramos no cubren
+    todos los intentos del usuario (aún sin compactar): se agrega desde el historial.
+    """
+    if expected_attempts is None or sum(row.total_attempts for row in rows) != expected_attempts:
+        return None
+    return [
+        {
+            "document_id": row.document_id,
+            "subject_id": row.subject_id,
+            "total_attempts": row.total_attempts,
+            "average_score": round(row.score_sum / row.total_attempts, 2)
+        }
+        for row in rows
+    ]
+
+
+class ProgressService:
+    """
+    Series de progreso (evolución, rachas y tendencia por materia) leídas solo de
+    ProgressRollup: el coste depende del número de tramos pedidos, no del historial.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_timeline(self, user_id: int, period: str = "day", points: int = 30, subject_id: Optional[int] = None) -> List[Dict]:
+        _validate_period(period)
+        first, last = _range(period, points)
+        rows = self.db.execute(_timeline_query(user_id, period, first, last, subject_id)).all()
+        return _dense_series(rows, period, first, last)
+
+    def get_streak(self, user_id: int) -> Dict:
+        return _streak(list(self.db.scalars(_active_days_query(user_id))))
+
+    def get_subject_trends(self, user_id: int, period: str = "week", points: int = 12) -> List[Dict]:
+        _validate_period(period)
+        first, last = _range(period, points)
+        return _trends(self.db.execute(_trend_query(user_id, period, first, last)).all(), period, first, last)
+
+    def get_progress_by_document(self, user_id: int) -> Optional[List[Dict]]:
+        rows = self.db.execute(_by_document_query(user_id)).all()
+        expected = self.db.scalar(select(UserStatsRollup.total_attempts).where(UserStatsRollup.user_id == user_id))
+        return _by_document(rows, expected)
+
+
+class AsyncProgressService:
+    """
+    Variante asíncrona de ProgressService.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_timeline(self, user_id: int, period: str = "day", points: int = 30, subject_id: Optional[int] = None) -> List[Dict]:
+        _validate_period(period)
+        first, last = _range(period, points)
+        rows = (await self.db.execute(_timeline_query(user_id, period, first, last, subject_id))).all()
+        return _dense_series(rows, period, first, last)
+
+    async def get_streak(self, user_id: int) -> Dict:
+        return _streak(list((await self.db.scalars(_active_days_query(user_id))).all()))
+
+    async def get_subject_trends(self, user_id: int, period: str = "week", points: int = 12) -> List[Dict]:
+        _validate_period(period)
+        first, last = _range(period, points)
+        rows = (await self.db.execute(_trend_query(user_id, period, first, last))).all()
+        return _trends(rows, period, first, last)
+
+    async def get_progress_by_document(self, user_id: int) -> Optional[List[Dict]]:
+        rows = (await self.db.execute(_by_document_query(user_id))).all()
+        expected = await self.db.scalar(
+            select(UserStatsRollup.total_attempts).where(UserStatsRollup.user_id == user_id)
+        )
+        return _by_document(rows, expected)
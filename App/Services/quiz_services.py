@@ -1,40 +1,246 @@
-from sqlalchemy.orm import Session, joinedload
-from App.Models.models import Quiz, Question, Option
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+import hashlib
+import json
+from App.Core.cache import cache, quiz_key
+from App.Models.models import Quiz, Question, Option, QuizAttempt
+from App.Services.attempt_ingestion_services import invalidate_answer_key
+from App.Services.search_services import SearchIndexService
+
+# Versión del formato de Quiz.payload: al cambiar quiz_payload se incrementa y los
+# quizzes guardados con otra versión se vuelven a serializar la próxima vez que se leen
+QUIZ_PAYLOAD_VERSION = 1
+
+
+class QuizSnapshot(NamedTuple):
+    quiz_id: int
+    payload: str  # JSON del quiz completo, listo para enviar
+    etag: str
+
+
+def quiz_payload(quiz: Quiz) -> dict:
+    return {
+        "id": quiz.id,
+        "title": quiz.title,
+        "document_id": quiz.document_id,
+        "questions": [
+            {
+                "id": q.id,
+                "question_text": q.question_text,
+                "correct_option": q.correct_option,
+                "options": [opt.text for opt in q.options]
+            }
+            for q in quiz.questions
+        ]
+    }
+
+
+def encode_quiz_payload(data: dict) -> QuizSnapshot:
+    """
+    Serialización canónica (mismo orden de claves, sin espacios): el mismo quiz
+    produce siempre los mismos bytes y, por tanto, el mismo ETag.
+    """
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return QuizSnapshot(data["id"], payload, hashlib.sha256(payload.encode("utf-8")).hexdigest())
+
 
 class QuizService:
     def __init__(self, db: Session):
         self.db = db
         
-    def save_quiz(self, quiz_data: dict, document_id: int) -> Quiz:
+    def save_quiz(
+        self,
+        quiz_data: dict,
+        document_id: int,
+        generation_key: Optional[str] = None,
+        replace: bool = False
+    ) -> Quiz:
+        if replace:
+            self._retire_quizzes(document_id)
+        
         quiz_obj = Quiz(
             title=quiz_data["title"],
-            document_id=document_id
+            document_id=document_id,
+            generation_key=generation_key
         )
         
         self.db.add(quiz_obj)
-        self.db.flush()   
-        
-        for q in quiz_data["questions"]:
-            question = Question(
-                question_text=q["question_text"],
-                correct_option=q["correct_option"],
-                quiz_id=quiz_obj.id
-            )
-            self.db.add(question)
+        try:
             self.db.flush()
-            for opt in q["options"]:
-                option = Option(text=opt, question_id=question.id)
-                self.db.add(option)
-            
+        except IntegrityError:
+            # Otra petición generó el mismo quiz a la vez: se devuelve el suyo
+            self.db.rollback()
+            existing = self.find_by_generation_key(document_id, generation_key) if generation_key else None
+            if not existing:
+                raise
+            return existing
+        
+        quiz_id = quiz_obj.id
+        question_ids = self._insert_questions(quiz_id, quiz_data["questions"])
+        # El quiz serializado se guarda en la misma transacción que sus preguntas,
+        # a partir de los datos insertados (sin volver a leerlos)
+        self._store_payload(quiz_obj, {
+            "id": quiz_id,
+            "title": quiz_obj.title,
+            "document_id": document_id,
+            "questions": [
+                {
+                    "id": question_id,
+                    "question_text": str(q["question_text"]),
+                    "correct_option": str(q["correct_option"]),
+                    "options": [str(opt) for opt in q["options"]]
+                }
+                for question_id, q in zip(question_ids, quiz_data["questions"])
+            ]
+        })
+        SearchIndexService(self.db).index_questions(document_id)
         self.db.commit()
-        self.db.refresh(quiz_obj)
+        cache.invalidate(quiz_key(document_id))
         return quiz_obj
     
+    def _insert_questions(self, quiz_id: int, questions: list) -> List[int]:
+        """
+        Inserta preguntas y opciones en bloque: un INSERT ... RETURNING para las
+        preguntas y un executemany para las opciones, en lugar de un flush por pregunta.
+        Devuelve los ids de las preguntas en el orden de `questions`.
+        """
+        if not questions:
+            return []
+        
+        # sort_by_parameter_order garantiza que los ids vuelven en el orden de las filas.
+        # Postgres lo hace en lotes; SQLite no puede ordenar el RETURNING de un lote
+        # y SQLAlchemy inserta esas filas de una en una
+        question_ids = self.db.scalars(
+            insert(Question).returning(Question.id, sort_by_parameter_order=True),
+            [
+                {
+                    "question_text": q["question_text"],
+                    "correct_option": q["correct_option"],
+                    "quiz_id": quiz_id
+                }
+                for q in questions
+            ]
+        ).all()
+        
+        option_rows = [
+            {"text": opt, "question_id": question_id}
+            for question_id, q in zip(question_ids, questions)
+            for opt in q["options"]
+        ]
+        if option_rows:
+            self.db.execute(insert(Option), option_rows)
+        return question_ids
+    
+    def _store_payload(self, quiz: Quiz, data: dict) -> QuizSnapshot:
+        snapshot = encode_quiz_payload(data)
+        quiz.payload = snapshot.payload
+        quiz.payload_version = QUIZ_PAYLOAD_VERSION
+        quiz.payload_etag = snapshot.etag
+        return snapshot
+    
+    def _rebuild_payload(self, quiz_id: int) -> QuizSnapshot:
+        """
+        Serializa de nuevo un quiz desde sus tablas: quizzes anteriores a la columna
+        payload o guardados con otra versión del formato. Preguntas y opciones se
+        leen con selectinload (tres consultas, sin el producto preguntas x opciones).
+        """
+        quiz = (
+            self.db.query(Quiz)
+            .options(selectinload(Quiz.questions).selectinload(Question.options))
+            .filter(Quiz.id == quiz_id)
+            .one()
+        )
+        snapshot = encode_quiz_payload(quiz_payload(quiz))
+        self.db.execute(
+            update(Quiz)
+            .where(Quiz.id == quiz_id)
+            .values(payload=snapshot.payload, payload_version=QUIZ_PAYLOAD_VERSION, payload_etag=snapshot.etag),
+            execution_options={"synchronize_session": False}
+        )
+        self.db.commit()
+        return snapshot
+    
+    def _retire_quizzes(self, document_id: int) -> None:
+        """
+        Quita de circulación los quizzes actuales del documento. Los que ya tienen
+        intentos se conservan (retirados) para no perder las estadísticas.
+        """
+        current = (
+            self.db.query(Quiz)
+            .filter(Quiz.document_id == document_id, Quiz.retired_at.is_(None))
+            .all()
+        )
+        for quiz in current:
+            has_attempts = self.db.query(QuizAttempt.id).filter(QuizAttempt.quiz_id == quiz.id).first()
+            if has_attempts:
+                quiz.retired_at = datetime.now()
+                quiz.generation_key = None
+            else:
+                self.db.delete(quiz)
+                invalidate_answer_key(quiz.id)
+        self.db.flush()
+    
+    def find_by_generation_key(self, document_id: int, generation_key: str) -> Optional[Quiz]:
+        """
+        Busca un quiz vigente generado con la misma clave. Los quizzes antiguos
+        sin clave se adoptan para no volver a llamar al modelo.
+        """
+        quiz = self.db.query(Quiz).filter(Quiz.generation_key == generation_key).first()
+        if quiz:
+            return quiz
+        
+        legacy = (
+            self.db.query(Quiz)
+            .filter(
+                Quiz.document_id == document_id,
+                Quiz.generation_key.is_(None),
+                Quiz.retired_at.is_(None)
+            )
+            .order_by(Quiz.id.desc())
+            .first()
+        )
+        if legacy:
+            legacy.generation_key = generation_key
+            self.db.commit()
+        return legacy
+    
     def get_quiz(self, document_id:int) -> Quiz:
         quiz = (
             self.db.query(Quiz)
             .options(joinedload(Quiz.questions).joinedload(Question.options))
-            .filter(Quiz.document_id == document_id)
+            .filter(Quiz.document_id == document_id, Quiz.retired_at.is_(None))
+            .order_by(Quiz.id.desc())
             .first()
         )
-        return quiz
\ No newline at end of file
+        return quiz
+    
+    def get_quiz_snapshot(self, document_id: int) -> Optional[QuizSnapshot]:
+        """
+        Quiz vigente del documento ya serializado, con su ETag. Se lee de la caché o
+        de una sola fila de `quizzes`, sin cargar preguntas ni opciones.
+        """
+        def load() -> Optional[dict]:
+            row = self.db.execute(
+                select(Quiz.id, Quiz.payload, Quiz.payload_version, Quiz.payload_etag)
+                .where(Quiz.document_id == document_id, Quiz.retired_at.is_(None))
+                .order_by(Quiz.id.desc())
+                .limit(1)
+            ).first()
+            if not row:
+                return None
+            if row.payload is None or row.payload_version != QUIZ_PAYLOAD_VERSION:
+                return self._rebuild_payload(row.id)._asdict()
+            return QuizSnapshot(row.id, row.payload, row.payload_etag)._asdict()
+        snapshot = cache.get_or_load(quiz_key(document_id), load)
+        return QuizSnapshot(**snapshot) if snapshot else None
+    
+    def get_quiz_data(self, quiz: Quiz) -> dict:
+        """
+        Quiz completo como dict, desde su payload, para incluirlo en otras respuestas.
+        """
+        if quiz.payload is None or quiz.payload_version != QUIZ_PAYLOAD_VERSION:
+            return json.loads(self._rebuild_payload(quiz.id).payload)
+        return json.loads(quiz.payload)
@@ -0,0 +1,328 @@
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import delete, desc, func, insert, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import html
+import re
+import unicodedata
+from App.Core.config import settings
+from App.Database.database import engine
+from App.Database.search_index import FTS_TABLE, SEARCH_CONFIG
+from App.Models.models import Document, Flashcard, Question, Quiz, SearchEntry, Subject, Summary
+
+SOURCE_DOCUMENT = "document"
+SOURCE_SUMMARY = "summary"
+SOURCE_FLASHCARD = "flashcard"
+SOURCE_QUESTION = "question"
+SOURCES = (SOURCE_DOCUMENT, SOURCE_SUMMARY, SOURCE_FLASHCARD, SOURCE_QUESTION)
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_RESULTS = 50
+MAX_QUERY_TERMS = 10
+
+SNIPPET_START = "<mark>"
+SNIPPET_STOP = "</mark>"
+SNIPPET_WORDS = 24
+# La base de datos marca las coincidencias con estos caracteres de control; el
+# snippet se escapa como HTML y después se sustituyen por SNIPPET_START/STOP.
+# Se eliminan del texto al indexarlo para que nadie pueda falsear una marca.
+_MATCH_START = "\x02"
+_MATCH_STOP = "\x03"
+_MATCH_MARKERS = re.compile("[\x02\x03]")
+# En SQLite el título pesa la mitad que el texto (se repite en todos los fragmentos);
+# user_id y source solo sirven de filtro
+_BM25 = f"bm25({FTS_TABLE}, 0.5, 1.0, 0.0, 0.0)"
+
+
+class SearchHit(NamedTuple):
+    source: str
+    source_id: int
+    document_id: int
+    title: str
+    snippet: str
+    rank: float
+
+
+def chunk_text(content: str, size: int) -> List[str]:
+    """
+    Parte el texto en fragmentos de como mucho `size` caracteres, cortando en un
+    espacio si hay uno en la segunda mitad del fragmento. Los fragmentos cortos
+    mantienen rápido el cálculo del snippet y la puntuación.
+    """
+    chunks = []
+    start, length = 0, len(content)
+    while start < length:
+        end = min(start + size, length)
+        if end < length:
+            cut = content.rfind(" ", start + size // 2, end)
+            if cut != -1:
+                end = cut
+        piece = content[start:end].strip()
+        if piece:
+            chunks.append(piece)
+        start = end
+    return chunks
+
+
+def search_terms(query: str) -> List[str]:
+    return re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+
+
+def render_snippet(snippet: str) -> str:
+    """
+    El texto indexado viene de subidas y del modelo: se escapa como HTML y solo
+    las marcas de coincidencia se convierten en <mark>.
+    """
+    return html.escape(snippet or "", quote=False).replace(_MATCH_START, SNIPPET_START).replace(_MATCH_STOP, SNIPPET_STOP)
+
+
+def _postgres_statement(user_id: int, query: str, sources: Optional[Sequence[str]], limit: int):
+    # websearch_to_tsquery admite "frases", OR y -exclusiones, y nunca falla por sintaxis
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    tsquery = func.websearch_to_tsquery(config, query)
+    tsv = literal_column("search_entries.tsv")
+    score = func.ts_rank_cd(tsv, tsquery)
+    # Un resultado por elemento (su fragmento mejor puntuado), antes del LIMIT
+    ranked = select(
+        SearchEntry.id,
+        score.label("rank"),
+        func.row_number().over(
+            partition_by=(SearchEntry.source, SearchEntry.source_id),
+            order_by=(desc(score), SearchEntry.id)
+        ).label("position")
+    ).where(SearchEntry.user_id == user_id, tsv.bool_op("@@")(tsquery))
+    if sources:
+        ranked = ranked.where(SearchEntry.source.in_(sources))
+    ranked = ranked.subquery()
+    best = (
+        select(ranked.c.id, ranked.c.rank)
+        .where(ranked.c.position == 1)
+        .order_by(ranked.c.rank.desc(), ranked.c.id)
+        .limit(limit)
+        .subquery()
+    )
+
+    # ts_headline es lo más caro: solo se calcula para los fragmentos de la página
+    headline_options = (
+        f'StartSel="{_MATCH_START}", StopSel="{_MATCH_STOP}", '
+        f"MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=1"
+    )
+    return (
+        select(
+            SearchEntry.source,
+            SearchEntry.source_id,
+            SearchEntry.document_id,
+            SearchEntry.title,
+            func.ts_headline(config, SearchEntry.body, tsquery, headline_options).label("snippet"),
+            best.c.rank
+        )
+        .join(best, best.c.id == SearchEntry.id)
+        .order_by(best.c.rank.desc(), SearchEntry.id)
+    )
+
+
+def _fts_query(user_id: int, terms: List[str], sources: Optional[Sequence[str]]) -> str:
+    # Términos entre comillas (sin sintaxis FTS5 del usuario) y como prefijo, lo que
+    # suple en parte la falta de stemming: "document" encuentra "documentos"
+    match = " ".join(f'"{term}"*' for term in terms)
+    query = f'user_id:"{user_id}" AND {{title body}}:({match})'
+    if sources:
+        query += " AND source:(" + " OR ".join(f'"{source}"' for source in sources) + ")"
+    return query
+
+
+def _sqlite_statement(match: str, limit: int):
+    """
+    Mejores resultados de FTS5, uno por elemento: las coincidencias se puntúan en
+    la tabla FTS5, se unen por clave primaria con search_entries para agrupar por
+    (source, source_id) y se quedan las `limit` primeras. El texto solo se lee para
+    esas filas; el snippet se calcula en Python (sqlite_snippet): snippet() de FTS5
+    no puede usarse junto a la función de ventana y repetir la búsqueda por id
+    recorre de nuevo todas las coincidencias.
+    """
+    return text(f"""
+        WITH matches AS (
+            SELECT rowid AS id, -{_BM25} AS rank
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH :query
+        ),
+        ranked AS (
+            SELECT m.id, m.rank, e.source, e.source_id, e.document_id, e.title,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY e.source, e.source_id ORDER BY m.rank DESC, m.id
+                   ) AS position
+            FROM matches m
+            JOIN search_entries e ON e.id = m.id
+        ),
+        page AS (
+            SELECT id, rank, source, source_id, document_id, title
+            FROM ranked
+            WHERE position = 1
+            ORDER BY rank DESC, id
+            LIMIT :limit
+        )
+        SELECT page.id, page.rank, page.source, page.source_id, page.document_id, page.title, e.body
+        FROM page
+        JOIN search_entries e ON e.id = page.id
+        ORDER BY page.rank DESC, page.id
+    """).bindparams(query=match, limit=limit)
+
+
+def _fold(word: str) -> str:
+    # Igual que el tokenizador de FTS5 (unicode61 remove_diacritics): sin mayúsculas ni tildes
+    decomposed = unicodedata.normalize("NFKD", word.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def sqlite_snippet(body: str, terms: List[str]) -> str:
+    """
+    Equivalente a snippet() de FTS5: la ventana de SNIPPET_WORDS palabras con más
+    coincidencias (por prefijo, como la consulta) y cada coincidencia entre marcas.
+    """
+    words = list(re.finditer(r"\w+", body or ""))
+    if not words:
+        return ""
+    prefixes = tuple(_fold(term) for term in terms)
+    matches = [index for index, word in enumerate(words) if _fold(word.group()).startswith(prefixes)]
+    start, best = 0, -1
+    for index in matches:
+        candidate = max(0, min(index - 2, len(words) - SNIPPET_WORDS))
+        count = sum(1 for other in matches if candidate <= other < candidate + SNIPPET_WORDS)
+        if count > best:
+            start, best = candidate, count
+    end = min(start + SNIPPET_WORDS, len(words))
+
+    marked = set(matches)
+    parts = ["…" if start > 0 else ""]
+    position = words[start].start()
+    for index in range(start, end):
+        word = words[index]
+        parts.append(body[position:word.start()])
+        parts.append(f"{_MATCH_START}{word.group()}{_MATCH_STOP}" if index in marked else word.group())
+        position = word.end()
+    parts.append("…" if end < len(words) else body[position:])
+    return "".join(parts)
+
+
+def _hits(rows, terms: Optional[List[str]] = None) -> List[SearchHit]:
+    """
+    Filas ya agrupadas y ordenadas por la base de datos. En SQLite (`terms`) el
+    snippet se calcula aquí a partir del texto del fragmento.
+    """
+    return [
+        SearchHit(
+            row.source, row.source_id, row.document_id, row.title,
+            render_snippet(sqlite_snippet(row.body, terms) if terms is not None else row.snippet),
+            float(row.rank)
+        )
+        for row in rows
+    ]
+
+
+class SearchIndexService:
+    """
+    Mantiene search_entries. Cada método sustituye las entradas de un documento para
+    un tipo de origen, dentro de la transacción de quien lo llama (subida o
+    generación), así que el índice se confirma junto con los datos.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def index_document(self, document: Document, content: str) -> None:
+        # El texto lo pasa quien llama: está en el blob de texto (DocumentService.get_text)
+        self.db.flush()
+        self._replace(document.id, SOURCE_DOCUMENT, [(document.id, content)])
+
+    def index_summaries(self, document_id: int) -> None:
+        self.db.flush()
+        rows = self.db.execute(select(Summary.id, Summary.content).where(Summary.document_id == document_id)).all()
+        self._replace(document_id, SOURCE_SUMMARY, rows)
+
+    def index_flashcards(self, document_id: int) -> None:
+        self.db.flush()
+        rows = self.db.execute(
+            select(Flashcard.id, Flashcard.question, Flashcard.answer).where(Flashcard.document_id == document_id)
+        ).all()
+        self._replace(document_id, SOURCE_FLASHCARD, [(row.id, f"{row.question}\n{row.answer}") for row in rows])
+
+    def index_questions(self, document_id: int) -> None:
+        # Solo las preguntas de los quizzes vigentes
+        self.db.flush()
+        rows = self.db.execute(
+            select(Question.id, Question.question_text)
+            .join(Quiz, Question.quiz_id == Quiz.id)
+            .where(Quiz.document_id == document_id, Quiz.retired_at.is_(None))
+        ).all()
+        self._replace(document_id, SOURCE_QUESTION, rows)
+
+    def reindex(self, document: Document, content: str) -> None:
+        self.index_document(document, content)
+        self.index_summaries(document.id)
+        self.index_flashcards(document.id)
+        self.index_questions(document.id)
+
+    def _replace(self, document_id: int, source: str, items: Iterable[Tuple[int, str]]) -> None:
+        owner = self.db.execute(
+            select(Subject.user_id, Document.title)
+            .join(Subject, Document.subject_id == Subject.id)
+            .where(Document.id == document_id)
+        ).one()
+        self.db.execute(
+            delete(SearchEntry).where(SearchEntry.document_id == document_id, SearchEntry.source == source),
+            execution_options={"synchronize_session": False}
+        )
+        rows = [
+            {
+                "user_id": owner.user_id,
+                "document_id": document_id,
+                "source": source,
+                "source_id": source_id,
+                "chunk": position,
+                "title": owner.title[:255],
+                "body": _MATCH_MARKERS.sub(" ", piece)
+            }
+            for source_id, content in items
+            for position, piece in enumerate(chunk_text(content or "", settings.SEARCH_CHUNK_CHARS))
+        ]
+        if rows:
+            self.db.execute(insert(SearchEntry), rows)
+
+
+class SearchService:
+    """
+    Búsqueda de texto sobre el contenido de un usuario, ordenada por relevancia y
+    con el fragmento coincidente resaltado. Postgres usa tsvector/GIN con la
+    configuración SEARCH_LANGUAGE (con stemming); SQLite, FTS5 con bm25.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def search(
+        self, user_id: int, query: str, sources: Optional[Sequence[str]] = None, limit: int = SEARCH_PAGE_SIZE
+    ) -> List[SearchHit]:
+        if engine.dialect.name == "postgresql":
+            return _hits(self.db.execute(_postgres_statement(user_id, query, sources, limit)))
+        terms = search_terms(query)
+        if not terms:
+            return []
+        rows = self.db.execute(_sqlite_statement(_fts_query(user_id, terms, sources), limit)).all()
+        return _hits(rows, terms)
+
+
+class AsyncSearchService:
+    """
+    Variante asíncrona de SearchService para el endpoint de búsqueda.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def search(
+        self, user_id: int, query: str, sources: Optional[Sequence[str]] = None, limit: int = SEARCH_PAGE_SIZE
+    ) -> List[SearchHit]:
+        if engine.dialect.name == "postgresql":
+            return _hits(await self.db.execute(_postgres_statement(user_id, query, sources, limit)))
+        terms = search_terms(query)
+        if not terms:
+            return []
+        rows = (await self.db.execute(_sqlite_statement(_fts_query(user_id, terms, sources), limit))).all()
+        return _hits(rows, terms)
@@ -1,8 +1,94 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, Integer
-from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, Integer, select
 from typing import List, Dict, Optional
 from App.Models.models import QuizAttempt, Quiz, QuizAnswer, Question, User, Option, Document
+from App.Services.stats_rollup_services import (
+    StatsRollupService, AsyncStatsRollupService, QuizStatsRollupService, AsyncQuizStatsRollupService,
+    SubjectStatsRollupService, AsyncSubjectStatsRollupService,
+    format_difficult_questions
+)
+from App.Services.progress_services import (
+    ProgressRollupService, AsyncProgressRollupService, ProgressService, AsyncProgressService, utc_now
+)
+
+def _score_answers(questions: List[Question], answers: List[Dict[str, str]], attempt_id: int):
+    """
+    Corrige las respuestas de un intento. Devuelve las respuestas a guardar y los aciertos.
+    """
+    questions_by_id = {qst.id: qst for qst in questions}
+    quiz_answers = []
+    correct_answers = 0
+    for data in answers:
+        question_id = data["question_id"]
+        selected_option = data["selected_option"]
+
+        question = questions_by_id.get(question_id)
+        if not question:
+            continue
+
+        is_correct = question.correct_option == selected_option
+        if is_correct:
+            correct_answers += 1
+
+        quiz_answers.append(QuizAnswer(
+            attempt_id=attempt_id,
+            question_id=question_id,
+            selected_option=selected_option,
+            is_correct=is_correct
+        ))
+    return quiz_answers, correct_answers
+
+
+def _progress_rows(rows) -> List[Dict]:
+    return [
+        {
+            "document_id": row.document_id,
+            "subject_id": row.subject_id,
+            "total_attempts": row.total_attempts,
+            "average_score": round(row.average_score, 2)
+        }
+        for row in rows
+    ]
+
+
+def _quiz_statistics(scores: List[float], difficult_questions: List[Dict]) -> Dict:
+    if not scores:
+        return {
+            "total_attempts": 0,
+            "average_score": 0.0,
+            "pass_rate": 0.0,
+            "difficult_questions": []
+        }
+
+    pass_rate = len([s for s in scores if s >= 70]) / len(scores) * 100
+    return {
+        "total_attempts": len(scores),
+        "average_score": sum(scores) / len(scores),
+        "pass_rate": pass_rate,
+        "difficult_questions": difficult_questions
+    }
+
+
+def _progress_query():
+    return select(
+        Quiz.document_id,
+        Document.subject_id,
+        func.count(QuizAttempt.id).label('total_attempts'),
+        func.avg(QuizAttempt.score).label('average_score'),
+    ).join(QuizAttempt).join(Document, Quiz.document_id == Document.id)
+
+
+def _difficult_questions_query(quiz_id: int):
+    return select(
+        Question.id,
+        Question.question_text,
+        func.count(QuizAnswer.id).label('total_answers'),
+        func.sum(func.cast(QuizAnswer.is_correct, Integer)).label('correct_answers')
+    ).join(QuizAnswer).where(
+        Question.quiz_id == quiz_id
+    ).group_by(Question.id, Question.question_text)
+
 
 class StatisticsService:
     def __init__(self, db: Session):
@@ -21,7 +107,6 @@ class StatisticsService:
         
         questions = self.db.query(Question).filter(Question.quiz_id == quiz_id).all()
         total_questions = len(questions)
-        correct_answers = 0
         
         attempt = QuizAttempt(
             user_id=user_id,
@@ -30,135 +115,128 @@ class StatisticsService:
             correct_answers=0,
             score=0.0,
             time_taken=time_taken,
-            completed_at= datetime.now(timezone.utc)
+            completed_at=utc_now()
         )
         
         self.db.add(attempt)
         self.db.flush()
         
-        quiz_answers = []
-        for data in answers:
-            question_id = data["question_id"]
-            selected_option = data["selected_option"]
-            
-            question = next((qst for qst in questions if qst.id == question_id), None)
-            if not question:
-                continue
-            
-            is_correct = question.correct_option == selected_option
-            if is_correct:
-                correct_answers += 1
-                
-            quiz_answer = QuizAnswer(
-                attempt_id=attempt.id,
-                question_id=question_id,
-                selected_option=selected_option,
-                is_correct=is_correct
-            )
-            quiz_answers.append(quiz_answer)
+        quiz_answers, correct_answers = _score_answers(questions, answers, attempt.id)
         
         score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
         attempt.correct_answers = correct_answers
         attempt.score = score
         
         self.db.add_all(quiz_answers)
+        # Mismo orden de bloqueo (usuario, quiz) en todas las transacciones
+        StatsRollupService(self.db).apply_attempt(attempt)
+        QuizStatsRollupService(self.db).apply_attempt(attempt, quiz_answers)
+        SubjectStatsRollupService(self.db).apply_attempts([attempt])
+        ProgressRollupService(self.db).apply_attempts([attempt])
         self.db.commit()
         
         return attempt
     
     def get_user_statistics(self, user_id: int) -> Dict:
-        attempts = self.db.query(QuizAttempt).filter(QuizAttempt.user_id == user_id).all()
-        if not attempts:
-            return {
-                "total_quizzes": 0,
-                "average_score": 0.0,
-                "total_time": 0,
-                "best_score": 0.0,
-                "worst_score": 0.0,
-                "recent_attempts": []
-            }
-            
-        scores = [attempt.score for attempt in attempts]
-        times = [attempt.time_taken for attempt in attempts if attempt.time_taken]
-        
-        return {
-            "total_quizzes": len(attempts),
-            "average_score": sum(scores) / len(scores),
-            "total_time": sum(times) if times else 0,
-            "best_score": max(scores),
-            "worst_score": min(scores),
-            "recent_attempts": self.__format__recent_attempts(attempts[-5:])
-        }
+        return StatsRollupService(self.db).get_statistics(user_id)
         
     def get_user_progress_by_subject(self,user_id:int)->List[Dict]:
-        query = self.db.query(
-            Quiz.document_id,
-            Document.subject_id,
-            func.count(QuizAttempt.id).label('total_attempts'),
-            func.avg(QuizAttempt.score).label('average_score'),
-        ).join(QuizAttempt).join(Document, Quiz.document_id == Document.id).filter(
-            QuizAttempt.user_id == user_id
-        ).group_by(Quiz.document_id, Document.subject_id).all()
-        
-        return [
-            {
-                "document_id":row.document_id,
-                "subject_id":row.subject_id,
-                "total_attempts":row.total_attempts,
-                "average_score":round(row.average_score,2)
-            }
-            for row in query
-        ]
+        progress = ProgressService(self.db).get_progress_by_document(user_id)
+        if progress is not None:
+            return progress
+
+        # Tramos aún sin compactar para este usuario: se agrega el historial
+        query = self.db.execute(
+            _progress_query().where(QuizAttempt.user_id == user_id).group_by(Quiz.document_id, Document.subject_id)
+        ).all()
+        return _progress_rows(query)
         
     def get_quiz_statistics(self,quiz_id:int)->Dict:
-        attemps = self.db.query(QuizAttempt).filter(QuizAttempt.quiz_id == quiz_id).all()
-        if not attemps:
-            return {
-                "total_attempts": 0,
-                "average_score": 0.0,
-                "pass_rate": 0.0,
-                "difficult_questions": []
-            }
-            
-        scores = [attempt.score for attempt in attemps]
-        pass_rate = len([s for s in scores if s >= 70]) / len(scores) * 100
-        
-        return {
-            "total_attempts": len(attemps),
-            "average_score": sum(scores) / len(scores),
-            "pass_rate": pass_rate,
-            "difficult_questions": self.__identify_difficult_questions(quiz_id)
-        }
+        stats = QuizStatsRollupService(self.db).get_statistics(quiz_id)
+        if stats is not None:
+            return stats
         
-    def __identify_difficult_questions(self,quiz_id:int)->List[Dict]:
-        query = self.db.query(
-            Question.id,
-            Question.question_text,
-            func.count(QuizAnswer.id).label('total_answers'),
-            func.sum(func.cast(QuizAnswer.is_correct, Integer)).label('correct_answers')
-        ).join(QuizAnswer).filter(
-            Question.quiz_id == quiz_id
-        ).group_by(Question.id, Question.question_text).all()
+        # Quiz aún sin contadores (anterior a la tabla y sin reparar): se agrega el historial
+        attemps = self.db.query(QuizAttempt.score).filter(QuizAttempt.quiz_id == quiz_id).all()
+        scores = [attempt.score for attempt in attemps]
+        if not scores:
+            return _quiz_statistics(scores, [])
         
-        difficult_questions = []
-        for row in query:
-            error_rate = (row.total_answers - row.correct_answers) / row.total_answers * 100
-            if error_rate > 50:
-                difficult_questions.append({
-                    "question_id": row.id,
-                    "question_text": row.question_text[:100] + "...",
-                    "error_rate": round(error_rate, 2)
-                })
-                
-        return sorted(difficult_questions, key=lambda x: x["error_rate"], reverse=True)
-    
-    def __format__recent_attempts(self, attempts: List[QuizAttempt]) -> List[Dict]:
-        return [
-            {
-                "quiz_id": attempt.quiz_id,
-                "score": attempt.score,
-                "time_taken": attempt.time_taken,
-                "completed_at": attempt.completed_at.isoformat() if attempt.completed_at.tzinfo else attempt.completed_at.replace(tzinfo=timezone.utc).isoformat()
-            }
-            for attempt in attempts
-        ]
\ No newline at end of file
+        difficult_questions = format_difficult_questions(self.db.execute(_difficult_questions_query(quiz_id)).all())
+        return _quiz_statistics(scores, difficult_questions)
+
+
+class AsyncStatisticsService:
+    """
+    Variante asíncrona de StatisticsService para los endpoints `async def`.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record_quiz_attempt(
+        self,
+        user_id: int,
+        quiz_id: int,
+        answers: List[Dict[str, str]],
+        time_taken: Optional[int] = None) -> QuizAttempt:
+
+        quiz = await self.db.get(Quiz, quiz_id)
+        if not quiz:
+            raise ValueError(f"Quiz con ID {quiz_id} no encontrado.")
+
+        result = await self.db.execute(select(Question).where(Question.quiz_id == quiz_id))
+        questions = list(result.scalars().all())
+        total_questions = len(questions)
+
+        attempt = QuizAttempt(
+            user_id=user_id,
+            quiz_id=quiz_id,
+            total_questions=total_questions,
+            correct_answers=0,
+            score=0.0,
+            time_taken=time_taken,
+            completed_at=utc_now()
+        )
+
+        self.db.add(attempt)
+        await self.db.flush()
+
+        quiz_answers, correct_answers = _score_answers(questions, answers, attempt.id)
+
+        attempt.correct_answers = correct_answers
+        attempt.score = (correct_answers / total_questions) * 100 if total_questions > 0 else 0
+
+        self.db.add_all(quiz_answers)
+        await AsyncStatsRollupService(self.db).apply_attempt(attempt)
+        await AsyncQuizStatsRollupService(self.db).apply_attempt(attempt, quiz_answers)
+        await AsyncSubjectStatsRollupService(self.db).apply_attempts([attempt])
+        await AsyncProgressRollupService(self.db).apply_attempts([attempt])
+        await self.db.commit()
+
+        return attempt
+
+    async def get_user_statistics(self, user_id: int) -> Dict:
+        return await AsyncStatsRollupService(self.db).get_statistics(user_id)
+
+    async def get_user_progress_by_subject(self, user_id: int) -> List[Dict]:
+        progress = await AsyncProgressService(self.db).get_progress_by_document(user_id)
+        if progress is not None:
+            return progress
+
+        result = await self.db.execute(
+            _progress_query().where(QuizAttempt.user_id == user_id).group_by(Quiz.document_id, Document.subject_id)
+        )
+        return _progress_rows(result.all())
+
+    async def get_quiz_statistics(self, quiz_id: int) -> Dict:
+        stats = await AsyncQuizStatsRollupService(self.db).get_statistics(quiz_id)
+        if stats is not None:
+            return stats
+
+        result = await self.db.execute(select(QuizAttempt.score).where(QuizAttempt.quiz_id == quiz_id))
+        scores = [row.score for row in result.all()]
+        if not scores:
+            return _quiz_statistics(scores, [])
+
+        rows = await self.db.execute(_difficult_questions_query(quiz_id))
+        return _quiz_statistics(scores, format_difficult_questions(rows.all()))
@@ -0,0 +1,637 @@
+from sqlalchemy import Integer, func, select, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from datetime import timezone
+from typing import Dict, List, Optional, Tuple
+from App.Models.models import (
+    QuizAttempt, QuizAnswer, Question, Quiz, Document,
+    UserStatsRollup, QuizStatsRollup, QuestionStats, SubjectStatsRollup
+)
+from App.Utils.score_sketch import ScoreSketch
+
+RECENT_ATTEMPTS = 5
+# El aprobado cae en un borde de tramo del ScoreSketch, así que pass_rate es exacto
+PASS_SCORE = 70
+
+
+def _attempt_entry(attempt: QuizAttempt) -> Dict:
+    completed_at = attempt.completed_at
+    if not completed_at.tzinfo:
+        completed_at = completed_at.replace(tzinfo=timezone.utc)
+    return {
+        "id": attempt.id,
+        "quiz_id": attempt.quiz_id,
+        "score": attempt.score,
+        "time_taken": attempt.time_taken,
+        "completed_at": completed_at.isoformat()
+    }
+
+
+def _apply_attempt(rollup: UserStatsRollup, attempt: QuizAttempt) -> None:
+    """
+    Suma un intento al resumen sin volver a leer el historial.
+    """
+    rollup.total_attempts = (rollup.total_attempts or 0) + 1
+    rollup.score_sum = (rollup.score_sum or 0.0) + attempt.score
+    rollup.best_score = attempt.score if rollup.best_score is None else max(rollup.best_score, attempt.score)
+    rollup.worst_score = attempt.score if rollup.worst_score is None else min(rollup.worst_score, attempt.score)
+    rollup.total_time = (rollup.total_time or 0) + (attempt.time_taken or 0)
+    # Se asigna una lista nueva para que SQLAlchemy detecte el cambio en la columna JSON
+    rollup.recent_attempts = (list(rollup.recent_attempts or []) + [_attempt_entry(attempt)])[-RECENT_ATTEMPTS:]
+
+
+def _fill_rollup(rollup: UserStatsRollup, totals, recent: List[QuizAttempt]) -> None:
+    rollup.total_attempts = totals.total_attempts
+    rollup.score_sum = totals.score_sum
+    rollup.best_score = totals.best_score
+    rollup.worst_score = totals.worst_score
+    rollup.total_time = totals.total_time
+    rollup.recent_attempts = [_attempt_entry(attempt) for attempt in reversed(recent)]
+
+
+def _rollup_statistics(rollup: Optional[UserStatsRollup]) -> Dict:
+    if not rollup or not rollup.total_attempts:
+        return {
+            "total_quizzes": 0,
+            "average_score": 0.0,
+            "total_time": 0,
+            "best_score": 0.0,
+            "worst_score": 0.0,
+            "recent_attempts": []
+        }
+
+    return {
+        "total_quizzes": rollup.total_attempts,
+        "average_score": rollup.score_sum / rollup.total_attempts,
+        "total_time": rollup.total_time,
+        "best_score": rollup.best_score,
+        "worst_score": rollup.worst_score,
+        "recent_attempts": rollup.recent_attempts
+    }
+
+
+def _totals_query(user_id: int):
+    return select(
+        func.count(QuizAttempt.id).label("total_attempts"),
+        func.coalesce(func.sum(QuizAttempt.score), 0.0).label("score_sum"),
+        func.max(QuizAttempt.score).label("best_score"),
+        func.min(QuizAttempt.score).label("worst_score"),
+        func.coalesce(func.sum(QuizAttempt.time_taken), 0).label("total_time"),
+    ).where(QuizAttempt.user_id == user_id)
+
+
+def _recent_query(user_id: int):
+    return (
+        select(QuizAttempt)
+        .where(QuizAttempt.user_id == user_id)
+        .order_by(QuizAttempt.completed_at.desc(), QuizAttempt.id.desc())
+        .limit(RECENT_ATTEMPTS)
+    )
+
+
+def _locked_query(user_id: int):
+    # populate_existing: bajo el bloqueo se quiere la fila de la base de datos, no la del identity map
+    return (
+        select(UserStatsRollup)
+        .where(UserStatsRollup.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def _locked_many_query(user_ids: List[int]):
+    # Orden fijo de bloqueo para que lotes concurrentes no se interbloqueen
+    return (
+        select(UserStatsRollup)
+        .where(UserStatsRollup.user_id.in_(user_ids))
+        .order_by(UserStatsRollup.user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def rollup_user_ids_query():
+    """
+    Usuarios con intentos o con un resumen existente (para la reconstrucción completa).
+    """
+    return union(
+        select(QuizAttempt.user_id.label("user_id")),
+        select(UserStatsRollup.user_id.label("user_id")),
+    )
+
+
+def _apply_quiz_attempt(
+    rollup: QuizStatsRollup,
+    question_stats: Dict[int, QuestionStats],
+    attempt: QuizAttempt,
+    answers: List[QuizAnswer]
+) -> None:
+    """
+    Suma un intento y sus respuestas a los contadores del quiz.
+    """
+    _add_score(rollup, attempt.score)
+
+    for answer in answers:
+        stats = question_stats.get(answer.question_id)
+        if stats is None:
+            continue
+        stats.total_answers += 1
+        stats.correct_answers += int(answer.is_correct)
+
+
+def _add_score(rollup, score: float) -> None:
+    """
+    Suma una puntuación a un resumen con histograma (QuizStatsRollup o SubjectStatsRollup).
+    """
+    sketch = ScoreSketch(rollup.score_histogram)
+    sketch.add(score)
+    # Se asigna una lista nueva para que SQLAlchemy detecte el cambio en la columna JSON
+    rollup.score_histogram = sketch.counts
+    rollup.total_attempts = (rollup.total_attempts or 0) + 1
+    rollup.score_sum = (rollup.score_sum or 0.0) + score
+
+
+def _fill_scores(rollup, scores: List[float]) -> None:
+    rollup.score_histogram = ScoreSketch.from_scores(scores).counts
+    rollup.total_attempts = len(scores)
+    rollup.score_sum = float(sum(scores))
+
+
+def _fill_question_stats(
+    quiz_id: int,
+    existing: Dict[int, QuestionStats],
+    rows
+) -> List[QuestionStats]:
+    """
+    Ajusta los contadores a las filas agregadas (id, total, aciertos).
+    Devuelve los QuestionStats nuevos que hay que añadir a la sesión.
+    """
+    created = []
+    for row in rows:
+        stats = existing.get(row.id)
+        if stats is None:
+            stats = QuestionStats(question_id=row.id, quiz_id=quiz_id)
+            created.append(stats)
+        stats.total_answers = row.total_answers
+        stats.correct_answers = row.correct_answers or 0
+    return created
+
+
+def format_difficult_questions(rows) -> List[Dict]:
+    difficult_questions = []
+    for row in rows:
+        error_rate = (row.total_answers - row.correct_answers) / row.total_answers * 100
+        if error_rate > 50:
+            difficult_questions.append({
+                "question_id": row.id,
+                "question_text": row.question_text[:100] + "...",
+                "error_rate": round(error_rate, 2)
+            })
+
+    return sorted(difficult_questions, key=lambda x: x["error_rate"], reverse=True)
+
+
+def _quiz_rollup_statistics(rollup: QuizStatsRollup, difficult_questions: List[Dict]) -> Dict:
+    if not rollup.total_attempts:
+        return {
+            "total_attempts": 0,
+            "average_score": 0.0,
+            "pass_rate": 0.0,
+            "difficult_questions": []
+        }
+
+    passed = ScoreSketch(rollup.score_histogram).count_at_least(PASS_SCORE)
+    return {
+        "total_attempts": rollup.total_attempts,
+        "average_score": rollup.score_sum / rollup.total_attempts,
+        "pass_rate": passed / rollup.total_attempts * 100,
+        "difficult_questions": difficult_questions
+    }
+
+
+def _quiz_scores_query(quiz_id: int):
+    return select(QuizAttempt.score).where(QuizAttempt.quiz_id == quiz_id)
+
+
+def _question_totals_query(quiz_id: int):
+    # LEFT JOIN: las preguntas sin respuestas también tienen contador
+    return (
+        select(
+            Question.id,
+            func.count(QuizAnswer.id).label("total_answers"),
+            func.sum(func.cast(QuizAnswer.is_correct, Integer)).label("correct_answers")
+        )
+        .outerjoin(QuizAnswer, QuizAnswer.question_id == Question.id)
+        .where(Question.quiz_id == quiz_id)
+        .group_by(Question.id)
+    )
+
+
+def _question_stats_query(quiz_id: int):
+    return select(QuestionStats).where(QuestionStats.quiz_id == quiz_id).execution_options(populate_existing=True)
+
+
+def difficult_questions_query(quiz_id: int):
+    """
+    Preguntas con más de un 50% de errores según los contadores.
+    """
+    return (
+        select(
+            Question.id,
+            Question.question_text,
+            QuestionStats.total_answers,
+            QuestionStats.correct_answers
+        )
+        .join(QuestionStats, QuestionStats.question_id == Question.id)
+        .where(
+            QuestionStats.quiz_id == quiz_id,
+            (QuestionStats.total_answers - QuestionStats.correct_answers) * 2 > QuestionStats.total_answers
+        )
+    )
+
+
+def _quiz_locked_query(quiz_id: int):
+    return (
+        select(QuizStatsRollup)
+        .where(QuizStatsRollup.quiz_id == quiz_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def _quiz_locked_many_query(quiz_ids: List[int]):
+    return (
+        select(QuizStatsRollup)
+        .where(QuizStatsRollup.quiz_id.in_(quiz_ids))
+        .order_by(QuizStatsRollup.quiz_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def _question_stats_many_query(quiz_ids: List[int]):
+    return select(QuestionStats).where(QuestionStats.quiz_id.in_(quiz_ids)).execution_options(populate_existing=True)
+
+
+def quiz_rollup_ids_query():
+    """
+    Quizzes con intentos o con un resumen existente (para la reparación completa).
+    """
+    return union(
+        select(QuizAttempt.quiz_id.label("quiz_id")),
+        select(QuizStatsRollup.quiz_id.label("quiz_id")),
+    )
+
+
+def _quiz_subjects_query(quiz_ids: List[int]):
+    return select(Quiz.id, Document.subject_id).join(Document, Quiz.document_id == Document.id).where(Quiz.id.in_(quiz_ids))
+
+
+def subject_scores_query(subject_id: int):
+    return (
+        select(QuizAttempt.score)
+        .join(Quiz, QuizAttempt.quiz_id == Quiz.id)
+        .join(Document, Quiz.document_id == Document.id)
+        .where(Document.subject_id == subject_id)
+    )
+
+
+def _subject_locked_query(subject_id: int):
+    return (
+        select(SubjectStatsRollup)
+        .where(SubjectStatsRollup.subject_id == subject_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def _subject_locked_many_query(subject_ids: List[int]):
+    return (
+        select(SubjectStatsRollup)
+        .where(SubjectStatsRollup.subject_id.in_(subject_ids))
+        .order_by(SubjectStatsRollup.subject_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def subject_rollup_ids_query():
+    """
+    Materias con intentos o con un resumen existente (para la reparación completa).
+    """
+    return union(
+        select(Document.subject_id.label("subject_id"))
+        .join(Quiz, Quiz.document_id == Document.id)
+        .join(QuizAttempt, QuizAttempt.quiz_id == Quiz.id),
+        select(SubjectStatsRollup.subject_id.label("subject_id")),
+    )
+
+
+class StatsRollupService:
+    """
+    Mantiene UserStatsRollup. Los métodos no hacen commit: se ejecutan dentro de la
+    transacción que registra el intento para que resumen e intento se guarden juntos.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_attempt(self, attempt: QuizAttempt) -> None:
+        self.apply_attempts([attempt])
+
+    def apply_attempts(self, attempts: List[QuizAttempt]) -> None:
+        """
+        Suma intentos ya añadidos a la sesión, bloqueando los resúmenes de una vez.
+        """
+        self.db.flush()
+        user_ids = sorted({attempt.user_id for attempt in attempts})
+        rollups = {rollup.user_id: rollup for rollup in self.db.scalars(_locked_many_query(user_ids))}
+        for user_id in user_ids:
+            if user_id not in rollups:
+                # Usuario sin resumen (nuevo o anterior a la tabla): el historial ya incluye estos intentos
+                self.rebuild(user_id)
+        for attempt in attempts:
+            rollup = rollups.get(attempt.user_id)
+            if rollup is not None:
+                _apply_attempt(rollup, attempt)
+
+    def rebuild(self, user_id: int) -> UserStatsRollup:
+        """
+        Recalcula el resumen del usuario a partir de sus intentos.
+        """
+        rollup = self.db.execute(_locked_query(user_id)).scalar_one_or_none()
+        if rollup is None:
+            rollup = UserStatsRollup(user_id=user_id)
+            self._fill(rollup)
+            try:
+                with self.db.begin_nested():
+                    self.db.add(rollup)
+                return rollup
+            except IntegrityError:
+                # Otra transacción creó el resumen a la vez: se recalcula sobre su fila
+                rollup = self.db.execute(_locked_query(user_id)).scalar_one()
+        self._fill(rollup)
+        return rollup
+
+    def _fill(self, rollup: UserStatsRollup) -> None:
+        totals = self.db.execute(_totals_query(rollup.user_id)).one()
+        recent = self.db.scalars(_recent_query(rollup.user_id)).all()
+        _fill_rollup(rollup, totals, recent)
+
+    def get_statistics(self, user_id: int) -> Dict:
+        rollup = self.db.get(UserStatsRollup, user_id)
+        if rollup is None:
+            # Aún sin backfill: se agrega en la base de datos sin guardar el resultado
+            rollup = UserStatsRollup(user_id=user_id)
+            self._fill(rollup)
+        return _rollup_statistics(rollup)
+
+
+class QuizStatsRollupService:
+    """
+    Mantiene QuizStatsRollup y QuestionStats. El bloqueo de la fila del quiz serializa
+    los intentos concurrentes sobre el mismo quiz; no hace commit.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_attempt(self, attempt: QuizAttempt, answers: List[QuizAnswer]) -> None:
+        self.apply_attempts([(attempt, answers)])
+
+    def apply_attempts(self, attempts: List[Tuple[QuizAttempt, List[QuizAnswer]]]) -> None:
+        """
+        Suma intentos y sus respuestas, bloqueando los resúmenes de los quizzes de una vez.
+        """
+        self.db.flush()
+        quiz_ids = sorted({attempt.quiz_id for attempt, _ in attempts})
+        rollups = {rollup.quiz_id: rollup for rollup in self.db.scalars(_quiz_locked_many_query(quiz_ids))}
+        for quiz_id in quiz_ids:
+            if quiz_id not in rollups:
+                # Quiz sin resumen: se construye desde las respuestas, que ya incluyen estos intentos
+                self.rebuild(quiz_id)
+        if not rollups:
+            return
+        question_stats = {qs.question_id: qs for qs in self.db.scalars(_question_stats_many_query(list(rollups)))}
+        for attempt, answers in attempts:
+            rollup = rollups.get(attempt.quiz_id)
+            if rollup is not None:
+                _apply_quiz_attempt(rollup, question_stats, attempt, answers)
+
+    def rebuild(self, quiz_id: int) -> QuizStatsRollup:
+        """
+        Recalcula el resumen y los contadores por pregunta a partir de intentos y respuestas.
+        """
+        rollup = self.db.execute(_quiz_locked_query(quiz_id)).scalar_one_or_none()
+        if rollup is None:
+            rollup = QuizStatsRollup(quiz_id=quiz_id, score_histogram=ScoreSketch().counts)
+            try:
+                with self.db.begin_nested():
+                    self.db.add(rollup)
+            except IntegrityError:
+                # Otra transacción creó el resumen a la vez: se recalcula sobre su fila
+                rollup = self.db.execute(_quiz_locked_query(quiz_id)).scalar_one()
+
+        _fill_scores(rollup, list(self.db.scalars(_quiz_scores_query(quiz_id))))
+        existing = {qs.question_id: qs for qs in self.db.scalars(_question_stats_query(quiz_id))}
+        rows = self.db.execute(_question_totals_query(quiz_id)).all()
+        self.db.add_all(_fill_question_stats(quiz_id, existing, rows))
+        return rollup
+
+    def get_rollup(self, quiz_id: int) -> Optional[QuizStatsRollup]:
+        return self.db.get(QuizStatsRollup, quiz_id)
+
+    def get_statistics(self, quiz_id: int) -> Optional[Dict]:
+        """
+        Estadísticas desde los contadores; None si el quiz aún no tiene resumen.
+        """
+        rollup = self.get_rollup(quiz_id)
+        if rollup is None:
+            return None
+        rows = self.db.execute(difficult_questions_query(quiz_id)).all() if rollup.total_attempts else []
+        return _quiz_rollup_statistics(rollup, format_difficult_questions(rows))
+
+
+class SubjectStatsRollupService:
+    """
+    Mantiene SubjectStatsRollup (distribución de puntuaciones de todos los quizzes de
+    una materia). Se llama después de QuizStatsRollupService para bloquear siempre en
+    el mismo orden (usuario, quiz, materia); no hace commit.
+    """
+    def __init__(self, db: Session):
+        self.db = db
+
+    def apply_attempts(self, attempts: List[QuizAttempt]) -> None:
+        self.db.flush()
+        quiz_ids = sorted({attempt.quiz_id for attempt in attempts})
+        subjects = dict(self.db.execute(_quiz_subjects_query(quiz_ids)).all())
+        subject_ids = sorted(set(subjects.values()))
+        if not subject_ids:
+            return
+        rollups = {
+            rollup.subject_id: rollup for rollup in self.db.scalars(_subject_locked_many_query(subject_ids))
+        }
+        for subject_id in subject_ids:
+            if subject_id not in rollups:
+                # Sin resumen: se construye desde los intentos, que ya incluyen estos
+                self.rebuild(subject_id)
+        for attempt in attempts:
+            rollup = rollups.get(subjects.get(attempt.quiz_id))
+            if rollup is not None:
+                _add_score(rollup, attempt.score)
+
+    def rebuild(self, subject_id: int) -> SubjectStatsRollup:
+        rollup = self.db.execute(_subject_locked_query(subject_id)).scalar_one_or_none()
+        if rollup is None:
+            rollup = SubjectStatsRollup(subject_id=subject_id, score_histogram=ScoreSketch().counts)
+            try:
+                with self.db.begin_nested():
+                    self.db.add(rollup)
+            except IntegrityError:
+                rollup = self.db.execute(_subject_locked_query(subject_id)).scalar_one()
+
+        _fill_scores(rollup, list(self.db.scalars(subject_scores_query(subject_id))))
+        return rollup
+
+
+class AsyncStatsRollupService:
+    """
+    Variante asíncrona de StatsRollupService.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply_attempt(self, attempt: QuizAttempt) -> None:
+        await self.apply_attempts([attempt])
+
+    async def apply_attempts(self, attempts: List[QuizAttempt]) -> None:
+        await self.db.flush()
+        user_ids = sorted({attempt.user_id for attempt in attempts})
+        rollups = {rollup.user_id: rollup for rollup in (await self.db.scalars(_locked_many_query(user_ids))).all()}
+        for user_id in user_ids:
+            if user_id not in rollups:
+                await self.rebuild(user_id)
+        for attempt in attempts:
+            rollup = rollups.get(attempt.user_id)
+            if rollup is not None:
+                _apply_attempt(rollup, attempt)
+
+    async def rebuild(self, user_id: int) -> UserStatsRollup:
+        result = await self.db.execute(_locked_query(user_id))
+        rollup = result.scalar_one_or_none()
+        if rollup is None:
+            rollup = UserStatsRollup(user_id=user_id)
+            await self._fill(rollup)
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(rollup)
+                return rollup
+            except IntegrityError:
+                result = await self.db.execute(_locked_query(user_id))
+                rollup = result.scalar_one()
+        await self._fill(rollup)
+        return rollup
+
+    async def _fill(self, rollup: UserStatsRollup) -> None:
+        totals = (await self.db.execute(_totals_query(rollup.user_id))).one()
+        recent = (await self.db.scalars(_recent_query(rollup.user_id))).all()
+        _fill_rollup(rollup, totals, recent)
+
+    async def get_statistics(self, user_id: int) -> Dict:
+        rollup = await self.db.get(UserStatsRollup, user_id)
+        if rollup is None:
+            rollup = UserStatsRollup(user_id=user_id)
+            await self._fill(rollup)
+        return _rollup_statistics(rollup)
+
+
+class AsyncQuizStatsRollupService:
+    """
+    Variante asíncrona de QuizStatsRollupService.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply_attempt(self, attempt: QuizAttempt, answers: List[QuizAnswer]) -> None:
+        await self.apply_attempts([(attempt, answers)])
+
+    async def apply_attempts(self, attempts: List[Tuple[QuizAttempt, List[QuizAnswer]]]) -> None:
+        await self.db.flush()
+        quiz_ids = sorted({attempt.quiz_id for attempt, _ in attempts})
+        rollups = {
+            rollup.quiz_id: rollup for rollup in (await self.db.scalars(_quiz_locked_many_query(quiz_ids))).all()
+        }
+        for quiz_id in quiz_ids:
+            if quiz_id not in rollups:
+                await self.rebuild(quiz_id)
+        if not rollups:
+            return
+        question_stats = {
+            qs.question_id: qs for qs in (await self.db.scalars(_question_stats_many_query(list(rollups)))).all()
+        }
+        for attempt, answers in attempts:
+            rollup = rollups.get(attempt.quiz_id)
+            if rollup is not None:
+                _apply_quiz_attempt(rollup, question_stats, attempt, answers)
+
+    async def rebuild(self, quiz_id: int) -> QuizStatsRollup:
+        rollup = (await self.db.execute(_quiz_locked_query(quiz_id))).scalar_one_or_none()
+        if rollup is None:
+            rollup = QuizStatsRollup(quiz_id=quiz_id, score_histogram=ScoreSketch().counts)
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(rollup)
+            except IntegrityError:
+                rollup = (await self.db.execute(_quiz_locked_query(quiz_id))).scalar_one()
+
+        _fill_scores(rollup, list((await self.db.scalars(_quiz_scores_query(quiz_id))).all()))
+        existing = {qs.question_id: qs for qs in (await self.db.scalars(_question_stats_query(quiz_id))).all()}
+        rows = (await self.db.execute(_question_totals_query(quiz_id))).all()
+        self.db.add_all(_fill_question_stats(quiz_id, existing, rows))
+        return rollup
+
+    async def get_statistics(self, quiz_id: int) -> Optional[Dict]:
+        rollup = await self.db.get(QuizStatsRollup, quiz_id)
+        if rollup is None:
+            return None
+        rows = (await self.db.execute(difficult_questions_query(quiz_id))).all() if rollup.total_attempts else []
+        return _quiz_rollup_statistics(rollup, format_difficult_questions(rows))
+
+
+class AsyncSubjectStatsRollupService:
+    """
+    Variante asíncrona de SubjectStatsRollupService.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def apply_attempts(self, attempts: List[QuizAttempt]) -> None:
+        await self.db.flush()
+        quiz_ids = sorted({attempt.quiz_id for attempt in attempts})
+        subjects = dict((await self.db.execute(_quiz_subjects_query(quiz_ids))).all())
+        subject_ids = sorted(set(subjects.values()))
+        if not subject_ids:
+            return
+        rollups = {
+            rollup.subject_id: rollup
+            for rollup in (await self.db.scalars(_subject_locked_many_query(subject_ids))).all()
+        }
+        for subject_id in subject_ids:
+            if subject_id not in rollups:
+                await self.rebuild(subject_id)
+        for attempt in attempts:
+            rollup = rollups.get(subjects.get(attempt.quiz_id))
+            if rollup is not None:
+                _add_score(rollup, attempt.score)
+
+    async def rebuild(self, subject_id: int) -> SubjectStatsRollup:
+        rollup = (await self.db.execute(_subject_locked_query(subject_id))).scalar_one_or_none()
+        if rollup is None:
+            rollup = SubjectStatsRollup(subject_id=subject_id, score_histogram=ScoreSketch().counts)
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(rollup)
+            except IntegrityError:
+                rollup = (await self.db.execute(_subject_locked_query(subject_id))).scalar_one()
+
+        _fill_scores(rollup, list((await self.db.scalars(subject_scores_query(subject_id))).all()))
+        return rollup
@@ -1,7 +1,14 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
 from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import defer
 from App.Models.models import CustomStudyPlan, Document, User
+from App.Utils.pagination import Page, keyset_query, keyset_page, DEFAULT_PAGE_SIZE
+
+# Más recientes primero; el id desempata planes creados en el mismo instante
+PLANS_ORDER = (CustomStudyPlan.created_at, CustomStudyPlan.id)
 
 class StudyPlanService:
     def __init__(self, db: Session):
@@ -13,7 +20,9 @@ class StudyPlanService:
         level: str,
         content: dict,
         user_id: int,
-        document_id: Optional[int] = None
+        document_id: Optional[int] = None,
+        generation_key: Optional[str] = None,
+        replace: bool = False
     ) -> CustomStudyPlan:
         """
         Crea un nuevo plan de estudio personalizado.
@@ -24,6 +33,9 @@ class StudyPlanService:
             content: Diccionario con la estructura del plan
             user_id: ID del usuario que crea el plan
             document_id: ID del documento relacionado (opcional)
+            generation_key: Clave de generación para evitar duplicados (opcional)
+            replace: Si es True, sustituye en la misma transacción los planes del
+                usuario para el mismo documento y nivel
         
         Returns:
             El plan de estudio creado
@@ -39,6 +51,13 @@ class StudyPlanService:
             if not document:
                 raise ValueError("Documento no encontrado")
         
+        if replace:
+            self.db.query(CustomStudyPlan).filter(
+                CustomStudyPlan.user_id == user_id,
+                CustomStudyPlan.document_id == document_id,
+                CustomStudyPlan.level == level.lower()
+            ).delete(synchronize_session=False)
+        
         # Crear el plan de estudio
         study_plan = CustomStudyPlan(
             title=title,
@@ -46,14 +65,60 @@ class StudyPlanService:
             content=content,
             user_id=user_id,
             document_id=document_id,
+            generation_key=generation_key,
         )
         
         self.db.add(study_plan)
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError:
+            # Otra petición generó el mismo plan a la vez: se devuelve el suyo
+            self.db.rollback()
+            existing = self.find_by_generation_key(generation_key, user_id, document_id, level) if generation_key else None
+            if not existing:
+                raise
+            return existing
         self.db.refresh(study_plan)
         
         return study_plan
     
+    def find_by_generation_key(
+        self,
+        generation_key: str,
+        user_id: int,
+        document_id: int,
+        level: str
+    ) -> Optional[CustomStudyPlan]:
+        """
+        Busca un plan ya generado con la misma clave. Los planes antiguos sin clave
+        del mismo usuario, documento y nivel se adoptan.
+        
+        Args:
+            generation_key: Clave de generación
+            user_id: ID del usuario
+            document_id: ID del documento
+            level: Nivel del plan
+        
+        Returns:
+            El plan de estudio o None si no existe
+        """
+        study_plan = self.db.query(CustomStudyPlan).filter(
+            CustomStudyPlan.generation_key == generation_key
+        ).first()
+        if study_plan:
+            return study_plan
+        
+        legacy = self.db.query(CustomStudyPlan).filter(
+            CustomStudyPlan.user_id == user_id,
+            CustomStudyPlan.document_id == document_id,
+            CustomStudyPlan.level == level.lower(),
+            CustomStudyPlan.generation_key.is_(None)
+        ).order_by(CustomStudyPlan.created_at.desc()).first()
+        if legacy:
+            legacy.generation_key = generation_key
+            self.db.commit()
+        return legacy
+    
     def get_study_plan_by_id(self, plan_id: int) -> Optional[CustomStudyPlan]:
         """
         Obtiene un plan de estudio por su ID.
@@ -71,24 +136,24 @@ class StudyPlanService:
     def get_study_plans_by_user(
         self,
         user_id: int,
-        active_only: bool = True
-    ) -> List[CustomStudyPlan]:
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE
+    ) -> Page:
         """
-        Obtiene todos los planes de estudio de un usuario.
+        Obtiene los planes de estudio de un usuario por páginas, del más reciente al más antiguo.
+        Es un listado: el contenido (comprimido) no se carga; se pide con get_study_plan_by_id.
         
         Args:
             user_id: ID del usuario
-            active_only: Si es True, solo devuelve planes activos
+            cursor: `next_cursor` de la página anterior (None para la primera)
+            limit: Número máximo de planes por página
         
         Returns:
-            Lista de planes de estudio
+            Página con los planes y el cursor de la siguiente (None si es la última)
         """
-        query = self.db.query(CustomStudyPlan).filter(
-            CustomStudyPlan.user_id == user_id
-        )
-        
-        
-        return query.order_by(CustomStudyPlan.created_at.desc()).all()
+        query = select(CustomStudyPlan).options(defer(CustomStudyPlan.content)).where(CustomStudyPlan.user_id == user_id)
+        rows = self.db.scalars(keyset_query(query, PLANS_ORDER, cursor, limit, descending=True)).all()
+        return keyset_page(rows, PLANS_ORDER, limit)
     
     def get_study_plans_by_document(
         self,
@@ -1,11 +1,25 @@
 from sqlalchemy.orm import Session
-from App.Models.models import Subject
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
+from App.Models.models import Subject, Document
+from App.Services.document_services import DOCUMENT_LIST_COLUMNS
+from App.Utils.pagination import Page, keyset_query, keyset_page
+
+DOCUMENTS_PAGE_SIZE = 100
+DOCUMENTS_ORDER = (Document.id,)
+
+
+def _documents_page_query(subject_id: int, cursor: Optional[str], limit: int):
+    query = select(*DOCUMENT_LIST_COLUMNS).where(Document.subject_id == subject_id)
+    return keyset_query(query, DOCUMENTS_ORDER, cursor, limit)
+
 
 class SubjectService():
     def __init__(self, db: Session):
         self.db = db
         
-    def create_subject(self, name: str, description:str, user_id: int) -> Subject:
+    def create_subject(self, name: str, description:str, user_id: int, pregenerate: Optional[bool] = None) -> Subject:
         existing_subject = self.db.query(Subject).filter(Subject.name == name).first()
         if existing_subject:
             raise ValueError("Subject name already exists")
@@ -13,7 +27,8 @@ class SubjectService():
         new_subject = Subject(
             name=name,
             description=description,
-            user_id=user_id
+            user_id=user_id,
+            pregenerate=pregenerate
         )
         
         self.db.add(new_subject)
@@ -25,11 +40,17 @@ class SubjectService():
         subjects = self.db.query(Subject).filter(Subject.user_id == user_id).all()
         return subjects
     
-    def get_documents_by_subject(self, subject_id: int) -> list[Subject]:
-        subject = self.db.query(Subject).filter(Subject.id == subject_id).first()
+    def get_documents_by_subject(
+        self, subject_id: int, cursor: Optional[str] = None, limit: int = DOCUMENTS_PAGE_SIZE
+    ) -> Page:
+        """
+        Lista los documentos de la materia sin su texto completo, por páginas en orden de id.
+        """
+        subject = self.db.query(Subject.id).filter(Subject.id == subject_id).first()
         if not subject:
             raise ValueError("Subject not found")
-        return subject.documents
+        rows = self.db.execute(_documents_page_query(subject_id, cursor, limit)).all()
+        return keyset_page(rows, DOCUMENTS_ORDER, limit)
     
     def get_subject_by_id(self, subject_id: int) -> Subject:
         subject = self.db.query(Subject).filter(Subject.id == subject_id).first()
@@ -52,4 +73,92 @@ class SubjectService():
         self.db.commit()
         self.db.refresh(subject)
         return subject
-    
+
+    def set_pregenerate(self, subject_id: int, pregenerate: Optional[bool]) -> Subject:
+        """
+        Activa o desactiva la pre-generación de artefactos para la materia.
+        None vuelve a usar la configuración global.
+        """
+        subject = self.db.query(Subject).filter(Subject.id == subject_id).first()
+        if not subject:
+            raise ValueError("Subject not found")
+        
+        subject.pregenerate = pregenerate
+        self.db.commit()
+        self.db.refresh(subject)
+        return subject
+
+
+class AsyncSubjectService():
+    """
+    Variante asíncrona de SubjectService para los endpoints `async def`.
+    """
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _get_by_name(self, name: str) -> Optional[Subject]:
+        result = await self.db.execute(select(Subject).where(Subject.name == name))
+        return result.scalars().first()
+
+    async def create_subject(self, name: str, description: str, user_id: int, pregenerate: Optional[bool] = None) -> Subject:
+        if await self._get_by_name(name):
+            raise ValueError("Subject name already exists")
+
+        new_subject = Subject(
+            name=name,
+            description=description,
+            user_id=user_id,
+            pregenerate=pregenerate
+        )
+
+        self.db.add(new_subject)
+        await self.db.commit()
+        await self.db.refresh(new_subject)
+        return new_subject
+
+    async def get_subjects_by_user(self, user_id: int) -> list[Subject]:
+        result = await self.db.execute(select(Subject).where(Subject.user_id == user_id))
+        return list(result.scalars().all())
+
+    async def get_subject_by_id(self, subject_id: int) -> Subject:
+        result = await self.db.execute(select(Subject).where(Subject.id == subject_id))
+        return result.scalars().first()
+
+    async def get_documents_by_subject(
+        self, subject_id: int, cursor: Optional[str] = None, limit: int = DOCUMENTS_PAGE_SIZE
+    ) -> Page:
+        """
+        Lista los documentos de la materia sin su texto completo, por páginas en orden de id.
+        """
+        subject = await self.get_subject_by_id(subject_id)
+        if not subject:
+            raise ValueError("Subject not found")
+        result = await self.db.execute(_documents_page_query(subject_id, cursor, limit))
+        return keyset_page(result.all(), DOCUMENTS_ORDER, limit)
+
+    async def edit_subject(self, subject_id: int, name: str, description: str) -> Subject:
+        subject = await self.get_subject_by_id(subject_id)
+        if not subject:
+            raise ValueError("Subject not found")
+
+        if name and name != subject.name:
+            if await self._get_by_name(name):
+                raise ValueError("Subject name already exists")
+            subject.name = name
+
+        if description is not None:
+            subject.description = description
+
+        await self.db.commit()
+        await self.db.refresh(subject)
+        return subject
+
+    async def set_pregenerate(self, subject_id: int, pregenerate: Optional[bool]) -> Subject:
+        subject = await self.get_subject_by_id(subject_id)
+        if not subject:
+            raise ValueError("Subject not found")
+
+        subject.pregenerate = pregenerate
+        await self.db.commit()
+        await self.db.refresh(subject)
+        return subject
@@ -1,23 +1,88 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from typing import Optional
+from App.Core.cache import cache, summary_key
 from App.Models.models import Summary
+from App.Services.search_services import SearchIndexService
 
 class SummaryService:
     def __init__(self, db: Session):
         self.db = db
 
-    def save_summary(self, content: str, document_id: int) -> Summary:
+    def save_summary(
+        self,
+        content: str,
+        document_id: int,
+        generation_key: Optional[str] = None,
+        replace: bool = False
+    ) -> Summary:
         """
         Guarda un resumen en la base de datos.
+        Con `replace` los resúmenes anteriores del documento se sustituyen en la misma transacción.
         """
-        summary = Summary(content=content, document_id=document_id)
+        if replace:
+            self.db.query(Summary).filter(Summary.document_id == document_id).delete(synchronize_session=False)
+        
+        summary = Summary(content=content, document_id=document_id, generation_key=generation_key)
         self.db.add(summary)
-        self.db.commit()
+        try:
+            SearchIndexService(self.db).index_summaries(document_id)
+            self.db.commit()
+        except IntegrityError:
+            # Otra petición generó el mismo resumen a la vez: se devuelve el suyo
+            self.db.rollback()
+            existing = self.find_by_generation_key(document_id, generation_key) if generation_key else None
+            if not existing:
+                raise
+            return existing
+        cache.invalidate(summary_key(document_id))
         self.db.refresh(summary)
         return summary
     
+    def find_by_generation_key(self, document_id: int, generation_key: str) -> Optional[Summary]:
+        """
+        Busca un resumen ya generado con la misma clave. Los resúmenes antiguos
+        sin clave se adoptan para no volver a llamar al modelo.
+        """
+        summary = self.db.query(Summary).filter(Summary.generation_key == generation_key).first()
+        if summary:
+            return summary
+        
+        legacy = (
+            self.db.query(Summary)
+            .filter(Summary.document_id == document_id, Summary.generation_key.is_(None))
+            .order_by(Summary.id.desc())
+            .first()
+        )
+        if legacy:
+            legacy.generation_key = generation_key
+            self.db.commit()
+            cache.invalidate(summary_key(document_id))
+        return legacy
+    
     def get_summary(self, summary_id: int) -> Summary:
         return self.db.query(Summary).filter(Summary.id == summary_id).first()
     
     def get_summary_document_id(self, document_id:int) -> Summary:
-        resumen = self.db.query(Summary).filter(Summary.document_id == document_id).first()
-        return resumen
\ No newline at end of file
+        resumen = (
+            self.db.query(Summary)
+            .filter(Summary.document_id == document_id)
+            .order_by(Summary.id.desc())
+            .first()
+        )
+        return resumen
+    
+    def get_summary_payload(self, document_id: int) -> Optional[dict]:
+        """
+        Último resumen del documento ya serializado, desde la caché de lectura.
+        """
+        def load() -> Optional[dict]:
+            summary = self.get_summary_document_id(document_id)
+            if not summary:
+                return None
+            return {
+                "id": summary.id,
+                "content": summary.content,
+                "document_id": summary.document_id
+            }
+        return cache.get_or_load(summary_key(document_id), load)
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+from App.Core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 200, 500, 1000)
+
+flush_size = metrics.histogram(
+    "batch_writer_flush_size",
+    "Elementos escritos por transacción",
+    buckets=BATCH_SIZE_BUCKETS
+)
+flush_seconds = metrics.histogram(
+    "batch_writer_flush_seconds",
+    "Duración de cada escritura en lote"
+)
+flush_errors = metrics.counter(
+    "batch_writer_flush_errors_total",
+    "Lotes que fallaron y se reintentaron elemento a elemento"
+)
+
+
+class BatchWriter(Generic[T, R]):
+    """
+    Cola de escritura diferida con commit agrupado.
+
+    `submit` encola un elemento y espera a que se escriba: la petición sigue
+    respondiendo solo cuando sus datos están confirmados, pero las escrituras que
+    llegan a la vez comparten una transacción. Un lote se escribe al alcanzar
+    `max_batch` elementos o `max_delay` segundos desde el primero, lo que acota la
+    latencia añadida. La cola tiene tamaño máximo: si se llena, `submit` espera
+    (contrapresión) en lugar de acumular memoria.
+
+    `write` recibe los elementos de un lote y devuelve un resultado por elemento,
+    en el mismo orden. Si un lote falla se reintenta elemento a elemento para que
+    un dato inválido no arrastre a los demás.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write: Callable[[List[T]], Awaitable[List[R]]],
+        max_batch: int = 200,
+        max_delay: float = 0.05,
+        max_pending: int = 5000
+    ):
+        self.name = name
+        self.write = write
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._labels = {"writer": name}
+        metrics.gauge("batch_writer_pending", "Elementos en cola pendientes de escribir").set_function(
+            lambda: self._queue.qsize() if self._queue else 0, self._labels
+        )
+
+    def start(self) -> None:
+        if self._task and not self._task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Escritura en lote '{self.name}' iniciada (lotes de {self.max_batch}, {self.max_delay * 1000:.0f} ms)")
+
+    async def stop(self) -> None:
+        """
+        Escribe lo pendiente y detiene el worker.
+        """
+        if not self._task:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._queue = None
+
+    async def submit(self, item: T) -> R:
+        # Arranque perezoso: sirve también sin los eventos de startup (scripts, TestClient sin lifespan)
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def submit_many(self, items: List[T]) -> List[R]:
+        """
+        Encola varios elementos; devuelve resultados o excepciones en el mismo orden.
+        """
+        return await asyncio.gather(*(self.submit(item) for item in items), return_exceptions=True)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error inesperado en la escritura en lote '{self.name}': {e}", exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        start = asyncio.get_running_loop().time()
+        try:
+            results = await self.write([item for item, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                _resolve(batch[0][1], error=e)
+                return
+            flush_errors.inc(labels=self._labels)
+            logger.warning(f"⚠️ Lote de {len(batch)} en '{self.name}' falló ({e}); reintento individual")
+            for entry in batch:
+                await self._flush([entry])
+            return
+
+        flush_size.observe(len(batch), labels=self._labels)
+        flush_seconds.observe(asyncio.get_running_loop().time() - start, labels=self._labels)
+        for (_, future), result in zip(batch, results):
+            _resolve(future, result=result)
+
+
+def _resolve(future: asyncio.Future, result=None, error: Optional[BaseException] = None) -> None:
+    # La petición pudo cancelarse (cliente desconectado); el dato se escribe igualmente
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
@@ -0,0 +1,156 @@
+import hashlib
+import mmap
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+from App.Core.config import settings
+
+READ_CHUNK_SIZE = 1024 * 1024
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class StagedBlob(NamedTuple):
+    hash: str
+    size: int
+    temp_path: str
+
+
+class BlobStore:
+    """
+    Almacén de archivos direccionado por contenido: cada archivo se guarda una sola
+    vez con su sha256 como nombre, en subdirectorios `ab/cd/` (los dos primeros
+    bytes del hash) para que ningún directorio crezca sin límite.
+
+    La escritura va en dos pasos: `stage` copia los datos a un temporal calculando
+    el hash y `commit` lo mueve a su sitio con un rename atómico. Entre ambos se
+    confirma la referencia en la base de datos (ver BlobService), así que un
+    archivo que se está borrando por falta de referencias no puede pisar uno que
+    se acaba de volver a subir. Los temporales tienen la extensión original porque
+    el extractor de texto elige el formato por ella.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+
+    def path(self, blob_hash: str) -> str:
+        return str(self.root / blob_hash[:2] / blob_hash[2:4] / blob_hash)
+
+    def hash_for_path(self, path: str) -> Optional[str]:
+        """
+        Hash del blob si `path` es un archivo del almacén; None si no lo es.
+        """
+        candidate = Path(path)
+        name = candidate.name
+        if not _HASH_RE.match(name) or candidate.parent != self.root / name[:2] / name[2:4]:
+            return None
+        return name
+
+    def exists(self, blob_hash: str) -> bool:
+        return os.path.exists(self.path(blob_hash))
+
+    def _temp_path(self, suffix: str) -> str:
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        return str(self.tmp_dir / f"{uuid.uuid4().hex}{suffix}")
+
+    def stage(self, source: BinaryIO, suffix: str = "") -> StagedBlob:
+        temp_path = self._temp_path(suffix)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as f:
+                for block in iter(lambda: source.read(READ_CHUNK_SIZE), b""):
+                    digest.update(block)
+                    size += len(block)
+                    f.write(block)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        return StagedBlob(hash=digest.hexdigest(), size=size, temp_path=temp_path)
+
+    def stage_bytes(self, data: bytes, suffix: str = "") -> StagedBlob:
+        temp_path = self._temp_path(suffix)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        return StagedBlob(hash=hashlib.sha256(data).hexdigest(), size=len(data), temp_path=temp_path)
+
+    def commit(self, staged: StagedBlob) -> str:
+        """
+        Mueve el temporal a su sitio. Si el blob ya existe el contenido es idéntico y
+        el rename lo sustituye sin ventana en la que falte.
+        """
+        target = self.path(staged.hash)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(staged.temp_path, target)
+        return target
+
+    def discard(self, staged: StagedBlob) -> None:
+        self._remove(staged.temp_path)
+
+    def delete(self, blob_hash: str) -> bool:
+        return self._remove(self.path(blob_hash))
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def open_mmap(self, blob_hash: str) -> Iterator[memoryview]:
+        """
+        Vista de solo lectura del blob sobre un mmap: los cortes no copian el archivo
+        completo en memoria y el sistema operativo comparte las páginas entre procesos.
+        """
+        with open(self.path(blob_hash), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap no admite archivos vacíos
+                yield memoryview(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    def read_range(self, blob_hash: str, start: int, end: int, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Bytes [start, end] del blob en trozos de chunk_size (para respuestas Range).
+        """
+        with self.open_mmap(blob_hash) as view:
+            for offset in range(start, end + 1, chunk_size):
+                yield bytes(view[offset:min(offset + chunk_size, end + 1)])
+
+    def read_text_prefix(self, blob_hash: str, max_chars: int) -> Optional[str]:
+        """
+        Primeros max_chars caracteres de un blob de texto UTF-8 sin leer el resto.
+        None si el blob no existe.
+        """
+        try:
+            with self.open_mmap(blob_hash) as view:
+                # Un carácter ocupa como mucho 4 bytes; el corte puede partir el último
+                head = bytes(view[:max_chars * 4])
+        except FileNotFoundError:
+            return None
+        return head.decode("utf-8", errors="ignore")[:max_chars]
+
+    def read_text(self, blob_hash: str) -> Optional[str]:
+        """
+        Texto UTF-8 completo de un blob, decodificado directamente desde el mmap.
+        None si el blob no existe.
+        """
+        try:
+            with self.open_mmap(blob_hash) as view:
+                return str(view, "utf-8")
+        except FileNotFoundError:
+            return None
+
+
+blob_store = BlobStore(settings.BLOB_STORE_ROOT)
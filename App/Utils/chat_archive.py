@@ -0,0 +1,56 @@
+import gzip
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+try:
+    import zstandard
+except ImportError:
+    # Dependencia opcional: sin ella los bloques se comprimen con gzip
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+
+
+def resolve_codec(preferred: str) -> str:
+    """
+    Códec para los bloques nuevos: el configurado si está disponible, si no gzip.
+    Los bloques existentes se leen con el códec con el que se guardaron.
+    """
+    if preferred == CODEC_ZSTD and zstandard is None:
+        logger.warning("⚠️ zstandard no está instalado: el archivo de chats usa gzip")
+        return CODEC_GZIP
+    if preferred not in (CODEC_GZIP, CODEC_ZSTD):
+        raise ValueError(f"Códec de archivo no soportado: {preferred}")
+    return preferred
+
+
+def pack_turns(turns: List[Dict], codec: str) -> bytes:
+    """
+    Serializa y comprime una lista de mensajes {id, message, response, timestamp}.
+    """
+    raw = json.dumps(
+        [{**turn, "timestamp": turn["timestamp"].isoformat()} for turn in turns],
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode()
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    return gzip.compress(raw, compresslevel=6)
+
+
+def unpack_turns(payload: bytes, codec: str) -> List[Dict]:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("El bloque está comprimido con zstd y zstandard no está instalado")
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    else:
+        raw = gzip.decompress(payload)
+    turns = json.loads(raw)
+    for turn in turns:
+        turn["timestamp"] = datetime.fromisoformat(turn["timestamp"])
+    return turns
@@ -0,0 +1,85 @@
+import threading
+import zlib
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    # Dependencia opcional: sin ella se comprime con zlib
+    zstandard = None
+
+from App.Core.config import settings
+
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+# Formato en la base de datos: MARKER + etiqueta del códec + datos comprimidos.
+# Los valores sin MARKER son texto UTF-8 sin comprimir (valores pequeños, que no
+# compensan, y filas anteriores a la compresión). Un texto válido nunca empieza
+# por NUL, así que no hay ambigüedad.
+MARKER = b"\x00"
+_TAGS = {CODEC_ZLIB: b"z", CODEC_ZSTD: b"s"}
+_CODECS = {tag: codec for codec, tag in _TAGS.items()}
+
+_local = threading.local()
+
+
+def _zstd_compressor(level: int):
+    # Los (de)compresores de zstandard no son seguros entre hilos: uno por hilo
+    compressor = getattr(_local, "zstd_compressor", None)
+    if compressor is None or _local.zstd_level != level:
+        compressor = _local.zstd_compressor = zstandard.ZstdCompressor(level=level)
+        _local.zstd_level = level
+    return compressor
+
+
+def _zstd_decompressor():
+    decompressor = getattr(_local, "zstd_decompressor", None)
+    if decompressor is None:
+        decompressor = _local.zstd_decompressor = zstandard.ZstdDecompressor()
+    return decompressor
+
+
+def default_codec() -> str:
+    if settings.COMPRESSION_CODEC == CODEC_ZSTD and zstandard is not None:
+        return CODEC_ZSTD
+    return CODEC_ZLIB
+
+
+def compress_bytes(
+    raw: bytes, codec: Optional[str] = None, level: Optional[int] = None, min_size: Optional[int] = None
+) -> bytes:
+    """
+    Comprime `raw` si es mayor que `min_size` y la compresión ahorra espacio;
+    si no, lo devuelve tal cual. Un texto que empieza por NUL se comprime siempre
+    para que no se confunda con un valor comprimido.
+    """
+    codec = codec or default_codec()
+    min_size = settings.COMPRESSION_MIN_SIZE if min_size is None else min_size
+    keep_raw = not is_compressed(raw)
+    if keep_raw and len(raw) < min_size:
+        return raw
+    if codec == CODEC_ZSTD:
+        body = _zstd_compressor(level or 10).compress(raw)
+    else:
+        body = zlib.compress(raw, level or 6)
+    if keep_raw and len(body) + 2 >= len(raw):
+        return raw
+    return MARKER + _TAGS[codec] + body
+
+
+def is_compressed(payload: bytes) -> bool:
+    return payload[:1] == MARKER
+
+
+def decompress_bytes(payload: bytes) -> bytes:
+    if not is_compressed(payload):
+        return payload
+    codec = _CODECS.get(payload[1:2])
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload[2:])
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("El valor está comprimido con zstd y zstandard no está instalado")
+        return _zstd_decompressor().decompress(payload[2:])
+    raise ValueError(f"Códec de compresión desconocido: {payload[1:2]!r}")
@@ -1,4 +1,4 @@
-from App.Database.database import SessionLocal
+from App.Database.database import SessionLocal, AsyncSessionLocal
 
 def get_db():
     db = SessionLocal()
@@ -6,3 +6,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("No hay driver asíncrono instalado para DATABASE_URL")
+    async with AsyncSessionLocal() as db:
+        yield db
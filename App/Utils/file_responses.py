@@ -0,0 +1,212 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from App.Core.config import settings
+from App.Utils.blob_store import blob_store
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class FileMeta(NamedTuple):
+    stat: os.stat_result
+    etag: str
+    last_modified: str
+
+
+_meta_cache: "OrderedDict[str, Tuple[FileMeta, float]]" = OrderedDict()
+_meta_lock = threading.Lock()
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_file_meta(path: str) -> Optional[FileMeta]:
+    """
+    Devuelve tamaño, ETag y fecha de modificación del archivo, o None si no existe.
+    Se guardan en caché durante FILE_META_CACHE_TTL segundos para no hacer stat en cada
+    petición; el hash del contenido solo se recalcula si cambian tamaño o mtime. Los
+    archivos del almacén por contenido ya tienen el hash en el nombre.
+    """
+    now = time.monotonic()
+    with _meta_lock:
+        cached = _meta_cache.get(path)
+        if cached and now - cached[1] < settings.FILE_META_CACHE_TTL:
+            _meta_cache.move_to_end(path)
+            return cached[0]
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        invalidate_file_meta(path)
+        return None
+
+    if cached and (cached[0].stat.st_size, cached[0].stat.st_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+        meta = cached[0]._replace(stat=stat)
+    else:
+        meta = FileMeta(
+            stat=stat,
+            etag=f'"{blob_store.hash_for_path(path) or _hash_file(path)}"',
+            last_modified=formatdate(stat.st_mtime, usegmt=True)
+        )
+
+    with _meta_lock:
+        _meta_cache[path] = (meta, now)
+        _meta_cache.move_to_end(path)
+        while len(_meta_cache) > settings.FILE_META_CACHE_SIZE:
+            _meta_cache.popitem(last=False)
+    return meta
+
+
+def invalidate_file_meta(path: str) -> None:
+    """
+    Descarta los metadatos en caché de un archivo que se ha reescrito o borrado.
+    """
+    with _meta_lock:
+        _meta_cache.pop(path, None)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag in candidates
+
+
+def _not_modified(request: Request, meta: FileMeta) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, meta.etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(meta.stat.st_mtime) <= since
+    return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta un único rango `bytes=inicio-fin`. Devuelve None si la cabecera
+    no es válida o pide varios rangos (se sirve el archivo completo).
+    Lanza 416 si el rango no es satisfacible.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_str, sep, end_str = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start_str == "":
+            # Sufijo: los últimos N bytes
+            length = int(end_str)
+            if length <= 0:
+                raise ValueError
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _iter_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    blob_hash = blob_store.hash_for_path(path)
+    if blob_hash:
+        # Blobs: trozos del mmap, sin seek/read por petición
+        yield from blob_store.read_range(blob_hash, start, end, READ_CHUNK_SIZE)
+        return
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(READ_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def cached_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    content_disposition: Optional[str] = None
+) -> Response:
+    """
+    Sirve un archivo con ETag fuerte (hash del contenido), GET condicional
+    (304 con If-None-Match / If-Modified-Since) y peticiones Range (206 / 416).
+    """
+    meta = get_file_meta(path)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+    headers = {
+        "ETag": meta.etag,
+        "Last-Modified": meta.last_modified,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache"
+    }
+    if content_disposition:
+        headers["Content-Disposition"] = content_disposition
+
+    if _not_modified(request, meta):
+        return Response(status_code=304, headers=headers)
+
+    size = meta.stat.st_size
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == meta.etag):
+        byte_range = _parse_range(range_header, size)
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _iter_range(path, start, end),
+                status_code=206,
+                media_type=media_type,
+                headers=headers
+            )
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=meta.stat)
+
+
+def cached_json_response(request: Request, payload: str, etag: str) -> Response:
+    """
+    Responde con un JSON ya serializado y su ETag: 304 sin cuerpo si el cliente
+    envía el mismo ETag en If-None-Match.
+    """
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type="application/json", headers=headers)
@@ -9,6 +9,11 @@ from App.Core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Caracteres del documento que se envían como contexto en el chat y en los planes de estudio
+DOCUMENT_CONTEXT_CHARS = 8000
+# Caracteres del documento que se envían para generar resúmenes, flashcards y quizzes
+GENERATION_INPUT_CHARS = 10000
+
 class OpenAIClient:
     def __init__(self):
         if not settings.OPENAI_API_KEY:
@@ -134,7 +139,7 @@ class OpenAIClient:
                 "model": str
             }
         """
-        max_length = 10000
+        max_length = GENERATION_INPUT_CHARS
         truncated_text = text[:max_length] + ("..." if len(text) > max_length else "")
         
         logger.info(f"🔄 Generando resumen de texto ({len(truncated_text)} caracteres)")
@@ -189,7 +194,7 @@ class OpenAIClient:
                 "model": str
             }
         """
-        max_length = 10000
+        max_length = GENERATION_INPUT_CHARS
         truncated_text = text[:max_length] + ("..." if len(text) > max_length else "")
         
         prompt = f"""
@@ -254,7 +259,7 @@ class OpenAIClient:
                 "model": str
             }
         """
-        max_length = 10000
+        max_length = GENERATION_INPUT_CHARS
         truncated_text = text[:max_length] + ("..." if len(text) > max_length else "")
         
         prompt = f"""
@@ -318,9 +323,8 @@ class OpenAIClient:
             str: Respuesta del asistente
         """
         try:
-            max_document_length = 8000
-            truncated_content = document_content[:max_document_length] + (
-                "..." if len(document_content) > max_document_length else ""
+            truncated_content = document_content[:DOCUMENT_CONTEXT_CHARS] + (
+                "..." if len(document_content) > DOCUMENT_CONTEXT_CHARS else ""
             )
             
             system_prompt = f"""
@@ -368,9 +372,8 @@ class OpenAIClient:
         
     async def study_plan_personalized(self, document_content: str, level_plan: str):
         try:
-            max_document_length = 8000
-            truncated_content = document_content[:max_document_length] + (
-                "..." if len(document_content) > max_document_length else ""
+            truncated_content = document_content[:DOCUMENT_CONTEXT_CHARS] + (
+                "..." if len(document_content) > DOCUMENT_CONTEXT_CHARS else ""
             )
             
             logger.info(f"🔄 Generando plan de estudio nivel {level_plan}")
@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Todos los listados paginados devuelven el cuerpo de siempre y el cursor de la
+# página siguiente solo en esta cabecera (sin cabecera, no hay más páginas)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """
+    Cursor manipulado o de otro listado: los endpoints responden 400.
+    """
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Cursor opaco (base64url sin relleno) con los valores de ordenación de la última fila.
+    """
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(value) for value in json.loads(raw)]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor("Cursor de paginación no válido.")
+    if len(values) != size:
+        raise InvalidCursor("Cursor de paginación no válido.")
+    return values
+
+
+def keyset_query(query, columns: Sequence, cursor: Optional[str], limit: int, descending: bool = False):
+    """
+    Aplica paginación por clave (keyset) a un select: ordena por `columns` (la última
+    debe ser única, normalmente el id) y, con cursor, continúa tras la última fila vista
+    con una comparación de tuplas. Con un índice que cubra el filtro y `columns` cada
+    página es un recorrido de índice de `limit` filas, sin OFFSET: la página 1000
+    cuesta lo mismo que la primera.
+
+    Pide limit + 1 filas para saber si hay página siguiente (ver `keyset_page`).
+    """
+    if cursor:
+        position = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, len(columns)))
+        query = query.where(position < values if descending else position > values)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def keyset_page(rows: Sequence, columns: Sequence, limit: int) -> Page:
+    """
+    Recorta el resultado de `keyset_query` y genera el cursor de la página siguiente.
+    """
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return Page(items, None)
+    last = items[-1]
+    return Page(items, encode_cursor([getattr(last, column.key) for column in columns]))
@@ -0,0 +1,106 @@
+from typing import Dict, Iterable, List, Optional
+
+# Las puntuaciones están acotadas a [0, 100]: un histograma de tramos fijos es un
+# resumen de cuantiles exacto salvo por la resolución del tramo y se combina sumando.
+SKETCH_MIN = 0.0
+SKETCH_MAX = 100.0
+SKETCH_BIN_WIDTH = 1.0
+SKETCH_BINS = int((SKETCH_MAX - SKETCH_MIN) / SKETCH_BIN_WIDTH)
+
+
+def score_bin(score: float) -> int:
+    # El redondeo evita que 69.99999... por error de coma flotante caiga en el tramo anterior;
+    # 100 va en el último tramo ([99, 100])
+    index = int((round(score, 6) - SKETCH_MIN) // SKETCH_BIN_WIDTH)
+    return min(max(index, 0), SKETCH_BINS - 1)
+
+
+class ScoreSketch:
+    """
+    Distribución de puntuaciones en SKETCH_BINS tramos de SKETCH_BIN_WIDTH puntos.
+
+    Se guarda como la lista de conteos (JSON) y todas las consultas recorren como
+    mucho SKETCH_BINS posiciones, independientemente del número de intentos.
+    Cotas de error frente a ordenar todas las puntuaciones:
+      - percentile_rank: la única incertidumbre son los intentos del mismo tramo que
+        la puntuación consultada; se cuenta la mitad y el error es como mucho la
+        mitad de ese tramo (`rank_error`, en puntos porcentuales).
+      - quantile: el valor devuelto está a menos de SKETCH_BIN_WIDTH puntos del real.
+    """
+
+    def __init__(self, counts: Optional[List[int]] = None):
+        if counts and len(counts) == SKETCH_BINS:
+            self.counts = list(counts)
+        else:
+            self.counts = [0] * SKETCH_BINS
+
+    @classmethod
+    def from_scores(cls, scores: Iterable[float]) -> "ScoreSketch":
+        sketch = cls()
+        for score in scores:
+            sketch.add(score)
+        return sketch
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def add(self, score: float, count: int = 1) -> None:
+        self.counts[score_bin(score)] += count
+
+    def merge(self, other: "ScoreSketch") -> "ScoreSketch":
+        return ScoreSketch([a + b for a, b in zip(self.counts, other.counts)])
+
+    def count_at_least(self, score: float) -> int:
+        """
+        Intentos con puntuación >= score; exacto cuando score cae en un borde de tramo.
+        """
+        return sum(self.counts[score_bin(score):])
+
+    def percentile_rank(self, score: float) -> float:
+        """
+        Porcentaje de intentos con peor puntuación (los del mismo tramo cuentan la mitad).
+        """
+        total = self.total
+        if not total:
+            return 0.0
+        index = score_bin(score)
+        below = sum(self.counts[:index])
+        return (below + self.counts[index] / 2) / total * 100
+
+    def rank_error(self, score: float) -> float:
+        total = self.total
+        if not total:
+            return 0.0
+        return self.counts[score_bin(score)] / total / 2 * 100
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Puntuación por debajo de la cual queda la fracción q de los intentos,
+        interpolando dentro del tramo. None si no hay intentos.
+        """
+        total = self.total
+        if not total:
+            return None
+        target = min(max(q, 0.0), 1.0) * total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= target:
+                fraction = (target - seen) / count
+                return round(SKETCH_MIN + (index + fraction) * SKETCH_BIN_WIDTH, 2)
+            seen += count
+        return SKETCH_MAX
+
+    def histogram(self, bin_width: int = 10) -> List[Dict]:
+        """
+        Agrupa los tramos en intervalos de bin_width puntos (múltiplo de SKETCH_BIN_WIDTH).
+        """
+        step = max(1, int(bin_width // SKETCH_BIN_WIDTH))
+        return [
+            {
+                "min_score": SKETCH_MIN + start * SKETCH_BIN_WIDTH,
+                "max_score": min(SKETCH_MIN + (start + step) * SKETCH_BIN_WIDTH, SKETCH_MAX),
+                "count": sum(self.counts[start:start + step])
+            }
+            for start in range(0, SKETCH_BINS, step)
+        ]
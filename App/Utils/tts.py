@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Type
+
+from App.Core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fin de oración: signo de cierre seguido de espacio, o salto de párrafo
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n{2,}")
+
+# Trama MPEG-1 Layer III (128 kbps, 44.1 kHz, sin padding) rellena de ceros: silencio válido
+_SILENT_FRAME = b"\xff\xfb\x90\x64" + b"\x00" * 413
+
+
+class TTSBackend(ABC):
+    """
+    Motor de síntesis. Recibe un fragmento de texto y devuelve audio MP3.
+    Debe ser seguro llamarlo desde varios hilos a la vez.
+    """
+    name = "base"
+
+    def __init__(self, lang: str = "es"):
+        self.lang = lang
+
+    @abstractmethod
+    def synthesize(self, text: str) -> bytes:
+        ...
+
+
+class GTTSBackend(TTSBackend):
+    name = "gtts"
+
+    def synthesize(self, text: str) -> bytes:
+        from gtts import gTTS
+
+        buffer = io.BytesIO()
+        gTTS(text, lang=self.lang).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class OfflineBackend(TTSBackend):
+    """
+    Motor local sin red: genera silencio con duración proporcional al texto.
+    Útil en desarrollo y pruebas.
+    """
+    name = "offline"
+
+    def synthesize(self, text: str) -> bytes:
+        # ~26 ms por trama; unas 12 tramas por palabra
+        frames = max(1, len(text.split()) * 12)
+        return _SILENT_FRAME * frames
+
+
+TTS_BACKENDS: Dict[str, Type[TTSBackend]] = {
+    GTTSBackend.name: GTTSBackend,
+    OfflineBackend.name: OfflineBackend,
+}
+
+
+def get_backend(name: Optional[str] = None, lang: Optional[str] = None) -> TTSBackend:
+    name = (name or settings.TTS_BACKEND).lower()
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Motor TTS desconocido: {name}. Opciones: {', '.join(TTS_BACKENDS)}")
+    return TTS_BACKENDS[name](lang or settings.TTS_LANG)
+
+
+def split_sentences(text: str, max_chars: int) -> List[str]:
+    """
+    Divide el texto en fragmentos de hasta `max_chars` caracteres sin cortar oraciones.
+    Una oración más larga que el límite se corta por espacios.
+    """
+    chunks: List[str] = []
+    current = ""
+
+    for sentence in _SENTENCE_END.split(text):
+        sentence = " ".join(sentence.split())
+        if not sentence:
+            continue
+
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.TTS_MAX_WORKERS, thread_name_prefix="tts")
+    return _executor
+
+
+class TTSPipeline:
+    """
+    Sintetiza texto largo por fragmentos alineados a oraciones, en paralelo en un pool
+    de hilos, y guarda el audio de cada fragmento en caché por hash de su contenido.
+    Al editar un documento solo se vuelven a sintetizar los fragmentos que cambiaron.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[TTSBackend] = None,
+        cache_dir: Optional[Path] = None,
+        chunk_chars: int = settings.TTS_CHUNK_CHARS
+    ):
+        self.backend = backend or get_backend()
+        self.cache_dir = Path(cache_dir or settings.TTS_CACHE_DIR)
+        self.chunk_chars = chunk_chars
+
+    def chunk_key(self, text: str) -> str:
+        raw = f"{self.backend.name}:{self.backend.lang}:{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def synthesize_chunk(self, text: str) -> bytes:
+        """
+        Devuelve el audio del fragmento desde la caché o lo sintetiza (bloqueante).
+        """
+        key = self.chunk_key(text)
+        path = self.cache_dir / key[:2] / f"{key}.mp3"
+        if path.exists():
+            return path.read_bytes()
+
+        audio = self.backend.synthesize(text)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(audio)
+        os.replace(tmp_path, path)
+        return audio
+
+    async def stream(self, text: str) -> AsyncIterator[bytes]:
+        """
+        Entrega el MP3 fragmento a fragmento y en orden, a medida que terminan.
+        Los frames MP3 se pueden concatenar, así que el resultado es un archivo válido.
+        """
+        chunks = split_sentences(text, self.chunk_chars)
+        loop = asyncio.get_running_loop()
+        executor = _get_executor()
+        futures = [loop.run_in_executor(executor, self.synthesize_chunk, chunk) for chunk in chunks]
+        logger.info(f"🔊 Sintetizando {len(chunks)} fragmentos con {self.backend.name}")
+
+        try:
+            for future in futures:
+                yield await future
+        finally:
+            # Si el cliente se desconecta se cancelan los fragmentos no iniciados;
+            # los que ya están en curso terminan y quedan en caché
+            for future in futures:
+                if not future.done():
+                    future.cancel()
+
+    async def synthesize(self, text: str) -> bytes:
+        return b"".join([audio async for audio in self.stream(text)])
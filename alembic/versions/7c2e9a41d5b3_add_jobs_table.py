@@ -0,0 +1,56 @@
+"""add jobs table
+
+Revision ID: 7c2e9a41d5b3
+Revises: 45586e9cbe96
+Create Date: 2026-10-19 10:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7c2e9a41d5b3'
+down_revision: Union[str, None] = '45586e9cbe96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    # Crear tabla jobs solo si no existe
+    if 'jobs' not in inspector.get_table_names():
+        op.create_table('jobs',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('job_type', sa.String(length=50), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('params', sa.JSON(), nullable=False),
+            sa.Column('result', sa.JSON(), nullable=True),
+            sa.Column('error', sa.String(), nullable=True),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('document_id', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        # El worker sondea por estado; los pendientes siempre son pocos
+        op.create_index('ix_jobs_status_id', 'jobs', ['status', 'id'])
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    if 'jobs' in inspector.get_table_names():
+        op.drop_index('ix_jobs_status_id', table_name='jobs')
+        op.drop_table('jobs')
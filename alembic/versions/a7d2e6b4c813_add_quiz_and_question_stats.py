@@ -0,0 +1,59 @@
+"""add quiz and question stats counters
+
+Revision ID: a7d2e6b4c813
+Revises: f1c3a9d27b65
+Create Date: 2026-10-19 16:10:37.552019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a7d2e6b4c813'
+down_revision: Union[str, None] = 'f1c3a9d27b65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    # Los contadores existentes se rellenan con `python -m scripts.repair_quiz_stats`;
+    # mientras tanto las estadísticas de esos quizzes se agregan desde el historial
+    if 'quiz_stats_rollups' not in tables:
+        op.create_table(
+            'quiz_stats_rollups',
+            sa.Column('quiz_id', sa.Integer(), sa.ForeignKey('quizzes.id'), primary_key=True),
+            sa.Column('total_attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('score_histogram', sa.JSON(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+    if 'question_stats' not in tables:
+        op.create_table(
+            'question_stats',
+            sa.Column('question_id', sa.Integer(), sa.ForeignKey('questions.id'), primary_key=True),
+            sa.Column('quiz_id', sa.Integer(), sa.ForeignKey('quizzes.id'), nullable=False),
+            sa.Column('total_answers', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('correct_answers', sa.Integer(), nullable=False, server_default='0'),
+        )
+        op.create_index('ix_question_stats_quiz_id', 'question_stats', ['quiz_id'])
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    if 'question_stats' in tables:
+        op.drop_index('ix_question_stats_quiz_id', table_name='question_stats')
+        op.drop_table('question_stats')
+    if 'quiz_stats_rollups' in tables:
+        op.drop_table('quiz_stats_rollups')
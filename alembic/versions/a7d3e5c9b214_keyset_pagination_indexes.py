@@ -0,0 +1,74 @@
+"""keyset pagination indexes
+
+Revision ID: a7d3e5c9b214
+Revises: d8b2f6c4a1e7
+Create Date: 2026-10-19 21:48:05.193362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'a7d3e5c9b214'
+down_revision: Union[str, None] = 'd8b2f6c4a1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nuevo índice, índice al que sustituye, tabla, columnas del nuevo, columnas del anterior)
+# El id al final sigue el orden de la paginación, de modo que cada página es un
+# recorrido de índice acotado aunque haya muchas filas con la misma fecha.
+INDEXES = [
+    ('ix_chat_histories_user_document_timestamp_id', 'ix_chat_histories_user_document_timestamp',
+     'chat_histories', ['user_id', 'document_id', 'timestamp', 'id'], ['user_id', 'document_id', 'timestamp']),
+    ('ix_custom_study_plans_user_created_id', 'ix_custom_study_plans_user_created',
+     'custom_study_plans', ['user_id', 'created_at', 'id'], ['user_id', 'created_at']),
+    ('ix_documents_subject_id_id', 'ix_documents_subject_id',
+     'documents', ['subject_id', 'id'], ['subject_id']),
+]
+
+
+def _create_index(is_postgres: bool, name: str, table: str, columns: list) -> None:
+    if is_postgres:
+        # CONCURRENTLY evita bloquear escrituras en tablas grandes; no admite transacción
+        with op.get_context().autocommit_block():
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+    else:
+        op.create_index(name, table, columns)
+
+
+def _drop_index(is_postgres: bool, name: str, table: str) -> None:
+    if is_postgres:
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    else:
+        op.drop_index(name, table_name=table)
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    is_postgres = conn.dialect.name == 'postgresql'
+
+    for name, replaced, table, columns, _ in INDEXES:
+        existing = [ix['name'] for ix in inspector.get_indexes(table)]
+        # El nuevo índice se crea antes de borrar el anterior para no dejar la tabla sin índice
+        if name not in existing:
+            _create_index(is_postgres, name, table, columns)
+        if replaced in existing:
+            _drop_index(is_postgres, replaced, table)
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    is_postgres = conn.dialect.name == 'postgresql'
+
+    for name, replaced, table, _, replaced_columns in reversed(INDEXES):
+        existing = [ix['name'] for ix in inspector.get_indexes(table)]
+        if replaced not in existing:
+            _create_index(is_postgres, replaced, table, replaced_columns)
+        if name in existing:
+            _drop_index(is_postgres, name, table)
@@ -0,0 +1,47 @@
+"""add quiz payload
+
+Revision ID: a9e2c4f6b813
+Revises: d3a7c5e1f829
+Create Date: 2026-10-20 04:05:37.518240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a9e2c4f6b813'
+down_revision: Union[str, None] = 'd3a7c5e1f829'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    # Los quizzes existentes quedan con payload NULL: se serializan desde sus
+    # preguntas y opciones la primera vez que se leen (QuizService.get_quiz_snapshot)
+    columns = [c['name'] for c in inspector.get_columns('quizzes')]
+    if 'payload' not in columns:
+        op.add_column('quizzes', sa.Column('payload', sa.Text(), nullable=True))
+    if 'payload_version' not in columns:
+        op.add_column('quizzes', sa.Column('payload_version', sa.Integer(), nullable=True))
+    if 'payload_etag' not in columns:
+        op.add_column('quizzes', sa.Column('payload_etag', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    columns = [c['name'] for c in inspector.get_columns('quizzes')]
+    if 'payload_etag' in columns:
+        op.drop_column('quizzes', 'payload_etag')
+    if 'payload_version' in columns:
+        op.drop_column('quizzes', 'payload_version')
+    if 'payload' in columns:
+        op.drop_column('quizzes', 'payload')
@@ -0,0 +1,52 @@
+"""add subject stats rollups and finer score histograms
+
+Revision ID: b3e9c4f17a26
+Revises: a7d2e6b4c813
+Create Date: 2026-10-19 19:05:12.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b3e9c4f17a26'
+down_revision: Union[str, None] = 'a7d2e6b4c813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    if 'subject_stats_rollups' not in tables:
+        op.create_table(
+            'subject_stats_rollups',
+            sa.Column('subject_id', sa.Integer(), sa.ForeignKey('subjects.id'), primary_key=True),
+            sa.Column('total_attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('score_histogram', sa.JSON(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+    # El histograma de quiz pasa de tramos de 5 puntos a los de ScoreSketch (1 punto) y no
+    # se puede refinar: se descartan y se reconstruyen con `python -m scripts.repair_quiz_stats`
+    # (mientras tanto las estadísticas se agregan desde el historial)
+    if 'quiz_stats_rollups' in tables:
+        op.execute("DELETE FROM quiz_stats_rollups")
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    if 'subject_stats_rollups' in tables:
+        op.drop_table('subject_stats_rollups')
+    if 'quiz_stats_rollups' in tables:
+        op.execute("DELETE FROM quiz_stats_rollups")
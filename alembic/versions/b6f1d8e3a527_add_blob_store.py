@@ -0,0 +1,68 @@
+"""add blob store
+
+Revision ID: b6f1d8e3a527
+Revises: e4a9c1f7b358
+Create Date: 2026-10-20 00:42:05.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b6f1d8e3a527'
+down_revision: Union[str, None] = 'e4a9c1f7b358'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    if 'blobs' not in tables:
+        op.create_table(
+            'blobs',
+            sa.Column('hash', sa.String(length=64), primary_key=True),
+            sa.Column('size', sa.BigInteger(), nullable=False),
+            sa.Column('ref_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+
+    # Los documentos existentes quedan con file_hash NULL (se siguen sirviendo desde
+    # su ruta). Los archivos de Public/ se mueven al almacén por contenido con
+    # `python -m scripts.migrate_blob_store`, que rellena estas columnas.
+    columns = [c['name'] for c in inspector.get_columns('documents')]
+    if 'file_hash' not in columns:
+        op.add_column('documents', sa.Column('file_hash', sa.String(length=64), nullable=True))
+    if 'file_name' not in columns:
+        op.add_column('documents', sa.Column('file_name', sa.String(length=255), nullable=True))
+
+    indexes = [ix['name'] for ix in inspector.get_indexes('documents')]
+    if 'ix_documents_file_hash' not in indexes:
+        op.create_index('ix_documents_file_hash', 'documents', ['file_hash'])
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    # Los documentos migrados conservan en file_path la ruta de su blob, que sigue
+    # siendo válida; solo se pierde el nombre original de la subida
+    indexes = [ix['name'] for ix in inspector.get_indexes('documents')]
+    if 'ix_documents_file_hash' in indexes:
+        op.drop_index('ix_documents_file_hash', table_name='documents')
+
+    columns = [c['name'] for c in inspector.get_columns('documents')]
+    if 'file_name' in columns:
+        op.drop_column('documents', 'file_name')
+    if 'file_hash' in columns:
+        op.drop_column('documents', 'file_hash')
+
+    if 'blobs' in tables:
+        op.drop_table('blobs')
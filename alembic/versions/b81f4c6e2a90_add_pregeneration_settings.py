@@ -0,0 +1,47 @@
+"""add pregeneration settings and job priority
+
+Revision ID: b81f4c6e2a90
+Revises: 7c2e9a41d5b3
+Create Date: 2026-10-19 11:02:17.664120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b81f4c6e2a90'
+down_revision: Union[str, None] = '7c2e9a41d5b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    # 1. Pre-generación configurable por materia (NULL = configuración global)
+    columns = [col['name'] for col in inspector.get_columns('subjects')]
+    if 'pregenerate' not in columns:
+        op.add_column('subjects', sa.Column('pregenerate', sa.Boolean(), nullable=True))
+
+    # 2. Prioridad de los trabajos (0 = interactivo, 10 = segundo plano)
+    columns = [col['name'] for col in inspector.get_columns('jobs')]
+    if 'priority' not in columns:
+        op.add_column('jobs', sa.Column('priority', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    columns = [col['name'] for col in inspector.get_columns('jobs')]
+    if 'priority' in columns:
+        op.drop_column('jobs', 'priority')
+
+    columns = [col['name'] for col in inspector.get_columns('subjects')]
+    if 'pregenerate' in columns:
+        op.drop_column('subjects', 'pregenerate')
@@ -0,0 +1,55 @@
+"""add chat archives
+
+Revision ID: c2e8f4a6d913
+Revises: a7d3e5c9b214
+Create Date: 2026-10-19 22:31:17.640512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c2e8f4a6d913'
+down_revision: Union[str, None] = 'a7d3e5c9b214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    # Los mensajes antiguos se mueven aquí con `python -m scripts.archive_chat_history`
+    if 'chat_archives' not in tables:
+        op.create_table(
+            'chat_archives',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('document_id', sa.Integer(), sa.ForeignKey('documents.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('first_timestamp', sa.DateTime(), nullable=False),
+            sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+            sa.Column('message_count', sa.Integer(), nullable=False),
+            sa.Column('codec', sa.String(length=10), nullable=False),
+            sa.Column('payload', sa.LargeBinary(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index(
+            'ix_chat_archives_user_document_last', 'chat_archives',
+            ['user_id', 'document_id', 'last_timestamp', 'id']
+        )
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    # Los mensajes archivados se pierden: restaurarlos antes si hacen falta
+    if 'chat_archives' in tables:
+        op.drop_index('ix_chat_archives_user_document_last', table_name='chat_archives')
+        op.drop_table('chat_archives')
@@ -0,0 +1,57 @@
+"""add daily and weekly progress rollups
+
+Revision ID: c5f1a8d3e902
+Revises: b3e9c4f17a26
+Create Date: 2026-10-19 20:12:48.104377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c5f1a8d3e902'
+down_revision: Union[str, None] = 'b3e9c4f17a26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    # Los tramos del historial existente se rellenan con `python -m scripts.compact_progress_rollups`;
+    # hasta entonces el progreso por materia se agrega desde QuizAttempt
+    if 'progress_rollups' not in tables:
+        op.create_table(
+            'progress_rollups',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('subject_id', sa.Integer(), sa.ForeignKey('subjects.id'), nullable=False),
+            sa.Column('document_id', sa.Integer(), sa.ForeignKey('documents.id'), nullable=False),
+            sa.Column('period', sa.String(length=10), nullable=False),
+            sa.Column('period_start', sa.Date(), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('best_score', sa.Float(), nullable=True),
+            sa.Column('total_time', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index(
+            'ux_progress_rollups_bucket', 'progress_rollups',
+            ['user_id', 'period', 'period_start', 'document_id'], unique=True
+        )
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    if 'progress_rollups' in tables:
+        op.drop_index('ux_progress_rollups_bucket', table_name='progress_rollups')
+        op.drop_table('progress_rollups')
@@ -0,0 +1,101 @@
+"""add search entries
+
+Revision ID: d3a7c5e1f829
+Revises: b6f1d8e3a527
+Create Date: 2026-10-20 02:15:48.902733
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd3a7c5e1f829'
+down_revision: Union[str, None] = 'b6f1d8e3a527'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Debe coincidir con SEARCH_LANGUAGE de la aplicación
+SEARCH_CONFIG = os.getenv("SEARCH_LANGUAGE", "spanish")
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    # El índice se rellena con `python -m scripts.reindex_search`
+    if 'search_entries' not in tables:
+        op.create_table(
+            'search_entries',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('document_id', sa.Integer(), sa.ForeignKey('documents.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('source', sa.String(length=20), nullable=False),
+            sa.Column('source_id', sa.Integer(), nullable=False),
+            sa.Column('chunk', sa.Integer(), nullable=False),
+            sa.Column('title', sa.String(length=255), nullable=False),
+            sa.Column('body', sa.Text(), nullable=False),
+        )
+        op.create_index('ix_search_entries_document_source', 'search_entries', ['document_id', 'source'])
+        op.create_index('ix_search_entries_user_source', 'search_entries', ['user_id', 'source'])
+
+    if conn.dialect.name == 'postgresql':
+        op.execute(f"""
+            ALTER TABLE search_entries ADD COLUMN IF NOT EXISTS tsv tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'B') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}', body), 'A')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX IF NOT EXISTS ix_search_entries_tsv ON search_entries USING gin (tsv)")
+    elif conn.dialect.name == 'sqlite':
+        # Tabla FTS5 de contenido externo sincronizada con triggers; user_id y source
+        # se indexan como términos para filtrar dentro del índice
+        op.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_entries_fts USING fts5(
+                title, body, user_id, source, content='search_entries', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS search_entries_ai AFTER INSERT ON search_entries BEGIN
+                INSERT INTO search_entries_fts(rowid, title, body, user_id, source)
+                VALUES (new.id, new.title, new.body, new.user_id, new.source);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS search_entries_ad AFTER DELETE ON search_entries BEGIN
+                INSERT INTO search_entries_fts(search_entries_fts, rowid, title, body, user_id, source)
+                VALUES ('delete', old.id, old.title, old.body, old.user_id, old.source);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS search_entries_au AFTER UPDATE ON search_entries BEGIN
+                INSERT INTO search_entries_fts(search_entries_fts, rowid, title, body, user_id, source)
+                VALUES ('delete', old.id, old.title, old.body, old.user_id, old.source);
+                INSERT INTO search_entries_fts(rowid, title, body, user_id, source)
+                VALUES (new.id, new.title, new.body, new.user_id, new.source);
+            END
+        """)
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = inspector.get_table_names()
+
+    if conn.dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS search_entries_au")
+        op.execute("DROP TRIGGER IF EXISTS search_entries_ad")
+        op.execute("DROP TRIGGER IF EXISTS search_entries_ai")
+        op.execute("DROP TABLE IF EXISTS search_entries_fts")
+
+    # En Postgres la columna tsv y su índice GIN se borran con la tabla
+    if 'search_entries' in tables:
+        op.drop_index('ix_search_entries_user_source', table_name='search_entries')
+        op.drop_index('ix_search_entries_document_source', table_name='search_entries')
+        op.drop_table('search_entries')
@@ -0,0 +1,72 @@
+"""add generation keys for get-or-generate artifacts
+
+Revision ID: d4a7e13c9f52
+Revises: b81f4c6e2a90
+Create Date: 2026-10-19 12:20:45.301877
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd4a7e13c9f52'
+down_revision: Union[str, None] = 'b81f4c6e2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabla, índice único)
+KEYED_TABLES = [
+    ('summaries', True),
+    ('flashcards', False),
+    ('quizzes', True),
+    ('custom_study_plans', True),
+]
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    # 1. Hash del contenido del documento (se calcula al vuelo para los antiguos)
+    columns = [col['name'] for col in inspector.get_columns('documents')]
+    if 'content_hash' not in columns:
+        op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    # 2. Clave de generación en cada tabla de artefactos
+    for table, unique in KEYED_TABLES:
+        columns = [col['name'] for col in inspector.get_columns(table)]
+        if 'generation_key' not in columns:
+            op.add_column(table, sa.Column('generation_key', sa.String(length=64), nullable=True))
+        indexes = [ix['name'] for ix in inspector.get_indexes(table)]
+        if f'ix_{table}_generation_key' not in indexes:
+            op.create_index(f'ix_{table}_generation_key', table, ['generation_key'], unique=unique)
+
+    # 3. Quizzes reemplazados que se conservan por tener intentos
+    columns = [col['name'] for col in inspector.get_columns('quizzes')]
+    if 'retired_at' not in columns:
+        op.add_column('quizzes', sa.Column('retired_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    columns = [col['name'] for col in inspector.get_columns('quizzes')]
+    if 'retired_at' in columns:
+        op.drop_column('quizzes', 'retired_at')
+
+    for table, _ in KEYED_TABLES:
+        indexes = [ix['name'] for ix in inspector.get_indexes(table)]
+        if f'ix_{table}_generation_key' in indexes:
+            op.drop_index(f'ix_{table}_generation_key', table_name=table)
+        columns = [col['name'] for col in inspector.get_columns(table)]
+        if 'generation_key' in columns:
+            op.drop_column(table, 'generation_key')
+
+    columns = [col['name'] for col in inspector.get_columns('documents')]
+    if 'content_hash' in columns:
+        op.drop_column('documents', 'content_hash')
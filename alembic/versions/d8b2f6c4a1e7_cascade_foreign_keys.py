@@ -0,0 +1,95 @@
+"""on delete cascade foreign keys
+
+Revision ID: d8b2f6c4a1e7
+Revises: c5f1a8d3e902
+Create Date: 2026-10-19 21:02:33.871245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'd8b2f6c4a1e7'
+down_revision: Union[str, None] = 'c5f1a8d3e902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabla, columna, tabla referenciada, acción ON DELETE)
+FOREIGN_KEYS = [
+    ('subjects', 'user_id', 'users', 'CASCADE'),
+    ('documents', 'subject_id', 'subjects', 'CASCADE'),
+    ('summaries', 'document_id', 'documents', 'CASCADE'),
+    ('flashcards', 'document_id', 'documents', 'CASCADE'),
+    ('quizzes', 'document_id', 'documents', 'CASCADE'),
+    ('questions', 'quiz_id', 'quizzes', 'CASCADE'),
+    ('options', 'question_id', 'questions', 'CASCADE'),
+    ('quiz_attempts', 'quiz_id', 'quizzes', 'CASCADE'),
+    ('quiz_attempts', 'user_id', 'users', 'CASCADE'),
+    ('quiz_answers', 'attempt_id', 'quiz_attempts', 'CASCADE'),
+    ('quiz_answers', 'question_id', 'questions', 'CASCADE'),
+    ('chat_histories', 'user_id', 'users', 'CASCADE'),
+    ('chat_histories', 'document_id', 'documents', 'CASCADE'),
+    ('custom_study_plans', 'user_id', 'users', 'CASCADE'),
+    ('custom_study_plans', 'document_id', 'documents', 'CASCADE'),
+    # Los trabajos se conservan como historial aunque se borre el documento o el usuario
+    ('jobs', 'user_id', 'users', 'SET NULL'),
+    ('jobs', 'document_id', 'documents', 'SET NULL'),
+    ('user_stats_rollups', 'user_id', 'users', 'CASCADE'),
+    ('quiz_stats_rollups', 'quiz_id', 'quizzes', 'CASCADE'),
+    ('subject_stats_rollups', 'subject_id', 'subjects', 'CASCADE'),
+    ('progress_rollups', 'user_id', 'users', 'CASCADE'),
+    ('progress_rollups', 'subject_id', 'subjects', 'CASCADE'),
+    ('progress_rollups', 'document_id', 'documents', 'CASCADE'),
+    ('question_stats', 'question_id', 'questions', 'CASCADE'),
+    ('question_stats', 'quiz_id', 'quizzes', 'CASCADE'),
+]
+
+# SQLite no nombra las claves foráneas: en modo batch se les asigna este nombre al reflejarlas
+SQLITE_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _set_on_delete(cascade: bool) -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+    pending = [fk for fk in FOREIGN_KEYS if fk[0] in tables and fk[2] in tables]
+
+    if conn.dialect.name == 'sqlite':
+        # SQLite no admite ALTER CONSTRAINT: se recrea cada tabla afectada
+        for table in dict.fromkeys(fk[0] for fk in pending):
+            with op.batch_alter_table(table, recreate='always', naming_convention=SQLITE_NAMING) as batch_op:
+                for fk_table, column, referred, action in pending:
+                    if fk_table != table:
+                        continue
+                    name = f"fk_{table}_{column}_{referred}"
+                    batch_op.drop_constraint(name, type_='foreignkey')
+                    batch_op.create_foreign_key(
+                        name, referred, [column], ['id'], ondelete=action if cascade else None
+                    )
+        return
+
+    for table, column, referred, action in pending:
+        existing = [
+            fk for fk in inspector.get_foreign_keys(table)
+            if fk['constrained_columns'] == [column] and fk['referred_table'] == referred
+        ]
+        name = existing[0]['name'] if existing else f"{table}_{column}_fkey"
+        if existing:
+            op.drop_constraint(name, table, type_='foreignkey')
+        # NOT VALID + VALIDATE: la validación no bloquea las escrituras sobre tablas grandes
+        op.create_foreign_key(
+            name, table, referred, [column], ['id'],
+            ondelete=action if cascade else None, postgresql_not_valid=True
+        )
+        op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {name}')
+
+
+def upgrade() -> None:
+    _set_on_delete(cascade=True)
+
+
+def downgrade() -> None:
+    _set_on_delete(cascade=False)
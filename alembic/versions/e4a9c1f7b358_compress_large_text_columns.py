@@ -0,0 +1,64 @@
+"""compress large text columns
+
+Revision ID: e4a9c1f7b358
+Revises: c2e8f4a6d913
+Create Date: 2026-10-19 23:05:42.518930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e4a9c1f7b358'
+down_revision: Union[str, None] = 'c2e8f4a6d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabla, columna, tipo anterior)
+COLUMNS = [
+    ('documents', 'content', 'text'),
+    ('summaries', 'content', 'text'),
+    ('chat_histories', 'response', 'text'),
+    ('custom_study_plans', 'content', 'json'),
+]
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    # SQLite no impone el tipo declarado: las filas existentes siguen siendo texto y
+    # CompressedText las lee tal cual, no hace falta recrear las tablas
+    if conn.dialect.name != 'postgresql':
+        return
+
+    # Los valores se pasan a bytea como UTF-8 sin comprimir (CompressedText los lee igual);
+    # la compresión de las filas existentes se hace por lotes con
+    # `python -m scripts.recompress_text_columns`. ALTER TYPE reescribe la tabla con
+    # bloqueo exclusivo: aplicar en una ventana de mantenimiento
+    for table, column, _ in COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bytea "
+            f"USING convert_to({column}::text, 'UTF8')"
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name != 'postgresql':
+        return
+
+    for table, column, previous in COLUMNS:
+        compressed = conn.execute(
+            sa.text(f"SELECT count(*) FROM {table} WHERE substring({column} FROM 1 FOR 1) = '\\x00'::bytea")
+        ).scalar()
+        if compressed:
+            raise RuntimeError(
+                f"{table}.{column} tiene {compressed} valores comprimidos: ejecuta antes "
+                f"`python -m scripts.recompress_text_columns --decompress`"
+            )
+    for table, column, previous in COLUMNS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {previous} "
+            f"USING convert_from({column}, 'UTF8')::{previous}"
+        )
@@ -0,0 +1,65 @@
+"""add hot path indexes on foreign keys
+
+Revision ID: e5b8f2a7c1d4
+Revises: d4a7e13c9f52
+Create Date: 2026-10-19 18:20:11.402915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = 'e5b8f2a7c1d4'
+down_revision: Union[str, None] = 'd4a7e13c9f52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nombre, tabla, columnas)
+INDEXES = [
+    ('ix_subjects_user_id', 'subjects', ['user_id']),
+    ('ix_documents_subject_id', 'documents', ['subject_id']),
+    ('ix_summaries_document_id', 'summaries', ['document_id']),
+    ('ix_flashcards_document_id', 'flashcards', ['document_id']),
+    ('ix_quizzes_document_id', 'quizzes', ['document_id']),
+    ('ix_questions_quiz_id', 'questions', ['quiz_id']),
+    ('ix_options_question_id', 'options', ['question_id']),
+    ('ix_quiz_attempts_quiz_id', 'quiz_attempts', ['quiz_id']),
+    ('ix_quiz_attempts_user_id', 'quiz_attempts', ['user_id']),
+    ('ix_quiz_answers_attempt_id', 'quiz_answers', ['attempt_id']),
+    ('ix_quiz_answers_question_id', 'quiz_answers', ['question_id']),
+    ('ix_chat_histories_user_document_timestamp', 'chat_histories', ['user_id', 'document_id', 'timestamp']),
+    ('ix_chat_histories_document_id', 'chat_histories', ['document_id']),
+    ('ix_custom_study_plans_document_level', 'custom_study_plans', ['document_id', 'level']),
+    ('ix_custom_study_plans_user_created', 'custom_study_plans', ['user_id', 'created_at']),
+    ('ix_jobs_document_type', 'jobs', ['document_id', 'job_type']),
+]
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+    is_postgres = conn.dialect.name == 'postgresql'
+
+    for name, table, columns in INDEXES:
+        existing = [ix['name'] for ix in inspector.get_indexes(table)]
+        if name in existing:
+            continue
+        if is_postgres:
+            # CONCURRENTLY evita bloquear escrituras en tablas grandes; no admite transacción
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True)
+        else:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    for name, table, _ in reversed(INDEXES):
+        existing = [ix['name'] for ix in inspector.get_indexes(table)]
+        if name in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,47 @@
+"""add user stats rollups
+
+Revision ID: f1c3a9d27b65
+Revises: e5b8f2a7c1d4
+Create Date: 2026-10-19 15:02:11.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f1c3a9d27b65'
+down_revision: Union[str, None] = 'e5b8f2a7c1d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    # Los resúmenes existentes se rellenan con `python -m scripts.backfill_stats_rollups`;
+    # mientras tanto las estadísticas se calculan con agregados en la base de datos
+    if 'user_stats_rollups' not in inspector.get_table_names():
+        op.create_table(
+            'user_stats_rollups',
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+            sa.Column('total_attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('score_sum', sa.Float(), nullable=False, server_default='0'),
+            sa.Column('best_score', sa.Float(), nullable=True),
+            sa.Column('worst_score', sa.Float(), nullable=True),
+            sa.Column('total_time', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('recent_attempts', sa.JSON(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    from sqlalchemy import inspect
+    conn = op.get_bind()
+    inspector = inspect(conn)
+
+    if 'user_stats_rollups' in inspector.get_table_names():
+        op.drop_table('user_stats_rollups')
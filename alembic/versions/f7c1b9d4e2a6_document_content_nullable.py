@@ -0,0 +1,56 @@
+"""document content nullable
+
+Revision ID: f7c1b9d4e2a6
+Revises: a9e2c4f6b813
+Create Date: 2026-10-20 06:12:48.301574
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f7c1b9d4e2a6'
+down_revision: Union[str, None] = 'a9e2c4f6b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite no nombra las claves foráneas: en modo batch se les asigna este nombre al reflejarlas
+SQLITE_NAMING = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _content_nullable() -> bool:
+    from sqlalchemy import inspect
+    inspector = inspect(op.get_bind())
+    return next(c['nullable'] for c in inspector.get_columns('documents') if c['name'] == 'content')
+
+
+def _set_nullable(nullable: bool) -> None:
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        # SQLite no admite ALTER COLUMN: se recrea la tabla
+        with op.batch_alter_table('documents', recreate='always', naming_convention=SQLITE_NAMING) as batch_op:
+            batch_op.alter_column('content', nullable=nullable)
+        return
+    op.execute(f"ALTER TABLE documents ALTER COLUMN content {'DROP' if nullable else 'SET'} NOT NULL")
+
+
+def upgrade() -> None:
+    # El texto de los documentos nuevos solo se guarda como blob (content_hash);
+    # Document.content queda para los documentos que aún no se han migrado con
+    # `python -m scripts.migrate_blob_store`, que además vacía la columna de los migrados
+    if not _content_nullable():
+        _set_nullable(True)
+
+
+def downgrade() -> None:
+    if _content_nullable():
+        conn = op.get_bind()
+        missing = conn.execute(sa.text("SELECT count(*) FROM documents WHERE content IS NULL")).scalar()
+        if missing:
+            raise RuntimeError(
+                f"documents.content está vacío en {missing} documentos cuyo texto solo está en el "
+                f"almacén de blobs: hay que restaurarlo antes de volver a hacerlo obligatorio"
+            )
+        _set_nullable(False)
@@ -0,0 +1,129 @@
+"""
+Benchmark de compresión de columnas de texto sobre el corpus real de Public/.
+
+Extrae el texto de los documentos subidos (PDF / DOCX) con PDFExtractor, como hace
+la subida de documentos, y mide para cada códec y nivel:
+  - ahorro de espacio (tamaño comprimido / original)
+  - velocidad de compresión y descompresión (MB/s de texto original)
+
+Se mide sobre dos formas de valor:
+  - "documento": el texto completo de cada archivo (Document.content)
+  - "fragmento": trozos de --chunk-size bytes, del tamaño de un resumen o una
+    respuesta del chat (Summary.content, ChatHistory.response)
+
+Con zstandard instalado se añade zstd y, como referencia, zstd con un diccionario
+entrenado sobre los fragmentos (mejora los valores pequeños; CompressedText no lo usa).
+
+Uso:
+    python -m benchmarks.bench_compression [--corpus Public] [--chunk-size 2048] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from App.Utils.compression import (  # noqa: E402
+    CODEC_ZLIB, CODEC_ZSTD, compress_bytes, decompress_bytes, zstandard
+)
+from App.Utils.pdf_extract import PDFExtractor  # noqa: E402
+
+EXTENSIONS = (".pdf", ".docx")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="Public", help="directorio con los documentos")
+    parser.add_argument("--chunk-size", type=int, default=2048, help="bytes por fragmento")
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def load_corpus(root: str) -> list:
+    extractor = PDFExtractor()
+    texts = []
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            if not name.lower().endswith(EXTENSIONS):
+                continue
+            text, error, _ = extractor.extract_text(os.path.join(directory, name))
+            if text:
+                texts.append(text.encode("utf-8"))
+            else:
+                print(f"  (omitido {name}: {error})")
+    return texts
+
+
+def chunks(values: list, size: int) -> list:
+    return [value[i:i + size] for value in values for i in range(0, len(value), size)]
+
+
+def measure(values: list, encode, decode, repeat: int) -> tuple:
+    total = sum(len(value) for value in values)
+    encode_times, decode_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encoded = [encode(value) for value in values]
+        encode_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for value in encoded:
+            decode(value)
+        decode_times.append(time.perf_counter() - start)
+    compressed = sum(len(value) for value in encoded)
+    return (
+        compressed / total,
+        total / statistics.median(encode_times) / 1e6,
+        total / statistics.median(decode_times) / 1e6,
+    )
+
+
+def variants(fragments: list) -> list:
+    found = [
+        (f"zlib-{level}", lambda v, level=level: compress_bytes(v, CODEC_ZLIB, level, min_size=0), decompress_bytes)
+        for level in (1, 6, 9)
+    ]
+    if zstandard is None:
+        print("  (zstandard no instalado: solo zlib)")
+        return found
+    found += [
+        (f"zstd-{level}", lambda v, level=level: compress_bytes(v, CODEC_ZSTD, level, min_size=0), decompress_bytes)
+        for level in (3, 10, 19)
+    ]
+    # El diccionario necesita muestras variadas: se entrena con los fragmentos
+    dictionary = zstandard.train_dictionary(112_640, fragments[:5000])
+    compressor = zstandard.ZstdCompressor(level=10, dict_data=dictionary)
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+    found.append(("zstd-10+dict", compressor.compress, decompressor.decompress))
+    return found
+
+
+def main() -> None:
+    args = parse_args()
+    print(f"Corpus: {os.path.abspath(args.corpus)}")
+    documents = load_corpus(args.corpus)
+    if not documents:
+        sys.exit("No se encontró texto en el corpus")
+    fragments = chunks(documents, args.chunk_size)
+    total = sum(len(value) for value in documents)
+    print(f"{len(documents)} documentos, {total / 1e6:.2f} MB de texto, {len(fragments)} fragmentos de "
+          f"{args.chunk_size} B\n")
+
+    print(f"{'códec':<14}{'valor':<11}{'tamaño':>9}{'compr. MB/s':>13}{'descompr. MB/s':>16}")
+    for name, encode, decode in variants(fragments):
+        for label, values in (("documento", documents), ("fragmento", fragments)):
+            ratio, encode_speed, decode_speed = measure(values, encode, decode, args.repeat)
+            print(f"{name:<14}{label:<11}{ratio:>8.1%}{encode_speed:>13.1f}{decode_speed:>16.1f}")
+
+    # Referencia: coste de leer el texto sin comprimir (solo decodificar UTF-8)
+    start = time.perf_counter()
+    for value in documents:
+        value.decode("utf-8")
+    print(f"\nUTF-8 sin comprimir: {total / (time.perf_counter() - start) / 1e6:.1f} MB/s de decodificación")
+    print(f"zlib {zlib.ZLIB_VERSION}" + (f", zstandard {zstandard.__version__}" if zstandard else ""))
+
+
+if __name__ == "__main__":
+    main()
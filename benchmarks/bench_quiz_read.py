@@ -0,0 +1,161 @@
+"""
+Benchmark de lectura de un quiz completo para GET /quiz/get_quiz/{document_id}.
+
+  - "joinedload": la implementación anterior, joinedload(questions).joinedload(options)
+    (una fila por opción: preguntas x opciones que el ORM deduplica) y el dict
+    construido a mano en cada petición
+  - "selectinload": tres consultas (quiz, preguntas, opciones) sin producto cartesiano
+    y el mismo dict construido a mano
+  - "payload": QuizService.get_quiz_snapshot sin caché, una fila de `quizzes` con el
+    JSON guardado al crear el quiz
+  - "payload+caché": lo mismo con la caché de lectura en memoria (App/Core/cache.py)
+
+Cada variante incluye la serialización de la respuesta: jsonable_encoder + JSONResponse
+para los dicts (lo que hace FastAPI) y nada para el payload, que ya es el cuerpo.
+
+Uso:
+    python -m benchmarks.bench_quiz_read [--database-url sqlite:///./bench_quiz_read.sqlite]
+        [--questions 50] [--options 4] [--repeat 300] [--db-latency 0.0005]
+
+Usa una base de datos de pruebas: crea las tablas y datos de ejemplo.
+`--db-latency` añade un retardo por sentencia para emular la red hasta un Postgres remoto.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench_quiz_read.sqlite")
+    parser.add_argument("--questions", type=int, default=50, help="preguntas por quiz")
+    parser.add_argument("--options", type=int, default=4, help="opciones por pregunta")
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--db-latency", type=float, default=0.0, help="segundos de red simulados por sentencia SQL")
+    return parser.parse_args()
+
+
+args = parse_args()
+# Debe fijarse antes de importar la configuración de la aplicación
+os.environ["DATABASE_URL"] = args.database_url
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+from App.Core.cache import cache  # noqa: E402
+from App.Database.database import Base, engine, SessionLocal  # noqa: E402
+from App.Models.models import User, Subject, Document, Quiz, Question  # noqa: E402
+from App.Services.quiz_services import QuizService, quiz_payload  # noqa: E402
+
+statements = {"count": 0}
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    statements["count"] += 1
+    if args.db_latency:
+        time.sleep(args.db_latency)
+
+
+def seed() -> int:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(name="Bench", last_name="User", email="bench@leviatan.local", password="x")
+        db.add(user)
+        db.flush()
+        subject = Subject(name="bench", user_id=user.id)
+        db.add(subject)
+        db.flush()
+        document = Document(title="bench", content="Texto de prueba.", file_path="bench.pdf", subject_id=subject.id)
+        db.add(document)
+        db.commit()
+        document_id = document.id
+        QuizService(db).save_quiz({
+            "title": "Quiz de prueba",
+            "questions": [
+                {
+                    "question_text": f"Pregunta {i}: ¿cuál de las siguientes afirmaciones es correcta?",
+                    "correct_option": "Opción 0",
+                    "options": [f"Opción {j} de la pregunta {i}" for j in range(args.options)]
+                }
+                for i in range(args.questions)
+            ]
+        }, document_id)
+        return document_id
+    finally:
+        db.close()
+
+
+def render(payload: dict) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def read_joinedload(db, document_id: int) -> bytes:
+    return render(quiz_payload(QuizService(db).get_quiz(document_id)))
+
+
+def read_selectinload(db, document_id: int) -> bytes:
+    quiz = (
+        db.query(Quiz)
+        .options(selectinload(Quiz.questions).selectinload(Question.options))
+        .filter(Quiz.document_id == document_id, Quiz.retired_at.is_(None))
+        .order_by(Quiz.id.desc())
+        .first()
+    )
+    return render(quiz_payload(quiz))
+
+
+def read_payload(db, document_id: int) -> bytes:
+    return QuizService(db).get_quiz_snapshot(document_id).payload.encode("utf-8")
+
+
+def run(name: str, operation, document_id: int) -> bytes:
+    timings, counts = [], []
+    body = b""
+    for _ in range(args.repeat):
+        db = SessionLocal()
+        try:
+            statements["count"] = 0
+            start = time.perf_counter()
+            body = operation(db, document_id)
+            timings.append(time.perf_counter() - start)
+            counts.append(statements["count"])
+        finally:
+            db.close()
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"  {name:<15} {statistics.median(timings) * 1000:8.3f} ms  p95 {p95 * 1000:8.3f} ms  "
+          f"{statistics.median(counts):3.0f} sentencias  {len(body)} bytes")
+    return body
+
+
+def main() -> None:
+    document_id = seed()
+    print(f"Base de datos: {engine.url.render_as_string(hide_password=True)}")
+    print(f"Quiz de {args.questions} preguntas x {args.options} opciones "
+          f"({args.questions * args.options} filas con joinedload), {args.repeat} repeticiones, "
+          f"{args.db_latency * 1000:.1f} ms de red por consulta\n")
+
+    cache.enabled = False
+    bodies = [
+        run("joinedload", read_joinedload, document_id),
+        run("selectinload", read_selectinload, document_id),
+        run("payload", read_payload, document_id),
+    ]
+    cache.enabled = True
+    bodies.append(run("payload+caché", read_payload, document_id))
+
+    # Las cuatro variantes deben devolver el mismo JSON (salvo espacios)
+    if any(json.loads(body) != json.loads(bodies[0]) for body in bodies[1:]):
+        sys.exit("❌ Las respuestas no coinciden")
+
+
+if __name__ == "__main__":
+    main()
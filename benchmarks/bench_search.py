@@ -0,0 +1,135 @@
+"""
+Benchmark de latencia de la búsqueda (SearchService) para usuarios con miles de documentos.
+
+Genera --documents documentos por usuario con fragmentos del texto real de Public/
+(extraído con PDFExtractor), los indexa con SearchIndexService como hace la subida
+y mide la latencia de consultas de uno y dos términos tomados del vocabulario del
+corpus. El objetivo es p99 < 50 ms.
+
+Uso:
+    python -m benchmarks.bench_search [--database-url sqlite:///./bench_search.sqlite]
+        [--users 2] [--documents 2000] [--doc-chars 20000] [--queries 500]
+
+Usa una base de datos de pruebas: borra y crea las tablas. Con Postgres
+(--database-url postgresql://...) mide el índice GIN con SEARCH_LANGUAGE.
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench_search.sqlite")
+    parser.add_argument("--corpus", default="Public", help="directorio con los documentos")
+    parser.add_argument("--users", type=int, default=2)
+    parser.add_argument("--documents", type=int, default=2000, help="documentos por usuario")
+    parser.add_argument("--doc-chars", type=int, default=20000, help="caracteres por documento")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+args = parse_args()
+# Debe fijarse antes de importar la configuración de la aplicación
+os.environ["DATABASE_URL"] = args.database_url
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+from App.Database.database import Base, engine, SessionLocal  # noqa: E402
+from App.Models.models import User, Subject, Document, SearchEntry  # noqa: E402
+from App.Services.search_services import SearchIndexService, SearchService  # noqa: E402
+from App.Utils.pdf_extract import PDFExtractor  # noqa: E402
+
+EXTENSIONS = (".pdf", ".docx")
+
+
+def load_corpus(root: str) -> str:
+    extractor = PDFExtractor()
+    texts = []
+    for directory, _, files in os.walk(root):
+        for name in sorted(files):
+            if name.lower().endswith(EXTENSIONS):
+                text, _, _ = extractor.extract_text(os.path.join(directory, name))
+                if text:
+                    texts.append(text)
+    return "\n".join(texts)
+
+
+def make_document(corpus: str, size: int, rng: random.Random) -> str:
+    # Trozos de 500 caracteres de posiciones aleatorias del corpus
+    parts = []
+    while sum(len(part) for part in parts) < size:
+        start = rng.randrange(0, max(len(corpus) - 500, 1))
+        parts.append(corpus[start:start + 500])
+    return " ".join(parts)[:size]
+
+
+def populate(corpus: str, rng: random.Random) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    started = time.perf_counter()
+    try:
+        for user_number in range(args.users):
+            user = User(name="bench", last_name="search", email=f"bench{user_number}@example.com", password="x")
+            db.add(user)
+            db.flush()
+            subject = Subject(name=f"Materia {user_number}", user_id=user.id)
+            db.add(subject)
+            db.flush()
+            index = SearchIndexService(db)
+            for number in range(args.documents):
+                content = make_document(corpus, args.doc_chars, rng)
+                document = Document(title=f"Documento {number}", content=content, file_path="/bench", subject_id=subject.id)
+                db.add(document)
+                index.index_document(document, content)
+                if number % 200 == 199:
+                    db.commit()
+            db.commit()
+        entries = db.scalar(select(func.count()).select_from(SearchEntry))
+    finally:
+        db.close()
+    print(f"{args.users} usuarios x {args.documents} documentos, {entries} fragmentos indexados "
+          f"en {time.perf_counter() - started:.1f} s")
+
+
+def main() -> None:
+    rng = random.Random(args.seed)
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        sys.exit("No se encontró texto en el corpus")
+    words = [word for word in re.findall(r"\w{5,}", corpus.lower()) if not word.isdigit()]
+    print(f"Base de datos: {engine.dialect.name}; corpus de {len(corpus)} caracteres, {len(set(words))} palabras")
+    populate(corpus, rng)
+
+    # Palabras consecutivas del corpus: las frecuentes son el peor caso (muchas coincidencias)
+    queries = []
+    for _ in range(args.queries):
+        position = rng.randrange(len(words) - 1)
+        queries.append(" ".join(words[position:position + rng.choice((1, 2))]))
+    db = SessionLocal()
+    service = SearchService(db)
+    try:
+        service.search(1, queries[0])  # calentamiento
+        timings, hits = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results = service.search(1, query)
+            timings.append((time.perf_counter() - start) * 1000)
+            hits.append(len(results))
+    finally:
+        db.close()
+
+    percentiles = statistics.quantiles(timings, n=100)
+    print(f"{len(queries)} consultas, {statistics.mean(hits):.1f} resultados de media")
+    print(f"p50 {percentiles[49]:.2f} ms  p95 {percentiles[94]:.2f} ms  p99 {percentiles[98]:.2f} ms  "
+          f"máx {max(timings):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
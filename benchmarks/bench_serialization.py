@@ -0,0 +1,164 @@
+"""
+Benchmark de serialización de respuestas grandes: un quiz completo (GET /quiz/get_quiz,
+POST /quiz/create) y una página de historial del chat (GET /chat/history).
+
+Para cada carga se mide el camino de FastAPI desde el valor devuelto por el endpoint
+hasta los bytes del cuerpo:
+  - "jsonable_encoder+json": sin response_model, como estaban los endpoints del quiz
+    (jsonable_encoder recorre el valor en Python y JSONResponse usa json.dumps)
+  - "modelo+json": con response_model (validación y serialización de pydantic-core)
+    y JSONResponse, como estaba el historial del chat
+  - "modelo+orjson": con response_model y FastJSONResponse, la respuesta por defecto
+    de la aplicación (App/Utils/json_responses.py)
+  - "payload": solo para el quiz, el JSON guardado en Quiz.payload, que GET /quiz/get_quiz
+    sirve sin volver a serializar
+
+Sin orjson instalado "modelo+orjson" mide el respaldo de FastJSONResponse (json.dumps).
+
+Uso:
+    python -m benchmarks.bench_serialization [--questions 200] [--options 4]
+        [--messages 100] [--response-chars 1500] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+# Los controladores importan la configuración de la base de datos; aquí no se usa
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from App.Controllers.chat_controller import HistoryResponse  # noqa: E402
+from App.Controllers.quiz_controller import QuizCreatedResponse, QuizResponse  # noqa: E402
+from App.Services.quiz_services import encode_quiz_payload  # noqa: E402
+from App.Utils.json_responses import FastJSONResponse, orjson  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200, help="preguntas del quiz")
+    parser.add_argument("--options", type=int, default=4, help="opciones por pregunta")
+    parser.add_argument("--messages", type=int, default=100, help="mensajes en la página del historial")
+    parser.add_argument("--response-chars", type=int, default=1500, help="caracteres por respuesta del chat")
+    parser.add_argument("--repeat", type=int, default=200)
+    return parser.parse_args()
+
+
+def quiz_data(questions: int, options: int) -> dict:
+    return {
+        "id": 1,
+        "title": "Quiz de prueba: fundamentos de bases de datos",
+        "document_id": 1,
+        "questions": [
+            {
+                "id": i + 1,
+                "question_text": f"Pregunta {i}: ¿cuál de las siguientes afirmaciones sobre índices es correcta?",
+                "correct_option": f"Opción 0 de la pregunta {i}",
+                "options": [f"Opción {j} de la pregunta {i}: un índice acelera las búsquedas" for j in range(options)]
+            }
+            for i in range(questions)
+        ]
+    }
+
+
+def chat_data(messages: int, response_chars: int) -> dict:
+    sentence = "La normalización reduce la redundancia y evita anomalías de actualización. "
+    text = (sentence * (response_chars // len(sentence) + 1))[:response_chars]
+    start = datetime(2026, 1, 1, 9, 0, 0)
+    return {
+        "history": [
+            {
+                "id": i + 1,
+                "message": f"Pregunta {i}: ¿qué es la tercera forma normal?",
+                "response": text,
+                "timestamp": (start + timedelta(minutes=i)).isoformat()
+            }
+            for i in range(messages)
+        ],
+        "document_title": "Apuntes de bases de datos"
+    }
+
+
+def with_model(model, response_class):
+    """
+    Lo que hace FastAPI con response_model (fastapi.routing.serialize_response):
+    validar el valor devuelto y serializarlo en modo JSON.
+    """
+    field = create_response_field(name="response", type_=model)
+
+    def render(content) -> bytes:
+        value, errors = field.validate(content, {}, loc=("response",))
+        if errors:
+            raise ValueError(errors)
+        return response_class(field.serialize(value)).body
+    return render
+
+
+def without_model(content) -> bytes:
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def run(name: str, render, content, repeat: int, baseline: Optional[float] = None) -> float:
+    body = render(content)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(content)
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    speedup = f"  x{baseline / median:.1f}" if baseline else ""
+    print(f"  {name:<24} {median * 1000:8.3f} ms  {len(body) / 1024:8.1f} KiB{speedup}")
+    return median
+
+
+def compare(title: str, content, model, repeat: int, extra=()) -> None:
+    print(title)
+    expected = json.loads(without_model(content))
+    cases = [
+        ("jsonable_encoder+json", without_model),
+        ("modelo+json", with_model(model, JSONResponse)),
+        ("modelo+orjson", with_model(model, FastJSONResponse)),
+        *extra
+    ]
+    baseline = None
+    for name, render in cases:
+        # Todas las variantes deben devolver el mismo JSON
+        if json.loads(render(content)) != expected:
+            sys.exit(f"❌ {name}: la respuesta no coincide")
+        median = run(name, render, content, repeat, baseline)
+        baseline = baseline or median
+    print()
+
+
+def main() -> None:
+    args = parse_args()
+    print(f"orjson: {'sí (' + orjson.__version__ + ')' if orjson else 'no instalado, respaldo con json'}")
+    print("Mediana por respuesta; xN = veces más rápido que jsonable_encoder+json\n")
+
+    quiz = quiz_data(args.questions, args.options)
+    payload = encode_quiz_payload(quiz).payload
+    compare(
+        f"Quiz de {args.questions} preguntas x {args.options} opciones (GET /quiz/get_quiz)",
+        quiz, QuizResponse, args.repeat,
+        extra=[("payload", lambda content: payload.encode("utf-8"))]
+    )
+    compare(
+        "El mismo quiz en POST /quiz/create",
+        {"message": "Quiz created successfully", "cached": False, "quiz": quiz},
+        QuizCreatedResponse, args.repeat
+    )
+    compare(
+        f"Historial del chat: {args.messages} mensajes de {args.response_chars} caracteres",
+        chat_data(args.messages, args.response_chars), HistoryResponse, args.repeat
+    )
+
+
+if __name__ == "__main__":
+    main()
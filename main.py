@@ -9,10 +9,20 @@ from App.Controllers import statistics_controller
 from App.Controllers import chat_controller
 from App.Controllers import user_controller
 from App.Controllers import study_plan_controller
+from App.Controllers import job_controller
+from App.Controllers import metrics_controller
+from App.Controllers import search_controller
 from fastapi import FastAPI
+from typing import Dict
 from fastapi.middleware.cors import CORSMiddleware
-from App.Database.database import engine, Base
+from App.Database.database import engine, async_engine, Base
 from App.Core.logging import setup_logging
+from App.Core.job_queue import job_queue
+from App.Services.generation_services import register_generation_jobs
+from App.Services.attempt_ingestion_services import attempt_writer
+from App.Services.chat_persistence_services import chat_writer
+from App.Utils.pagination import NEXT_CURSOR_HEADER
+from App.Utils.json_responses import FastJSONResponse
 
 # Configurar logging al inicio
 setup_logging()
@@ -20,7 +30,9 @@ setup_logging()
 app = FastAPI(
     title="Leviatan Backend",
     description="API para gestión de documentos y análisis con OpenAI",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson si está instalado (ver App/Utils/json_responses.py)
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -29,6 +41,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cursor de la página siguiente en los listados que devuelven una lista
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 #Base.metadata.drop_all(bind=engine)
 Base.metadata.create_all(bind=engine)
@@ -42,8 +56,34 @@ app.include_router(statistics_controller.router)
 app.include_router(chat_controller.router)
 app.include_router(user_controller.router)
 app.include_router(study_plan_controller.router)
+app.include_router(job_controller.router)
+app.include_router(metrics_controller.router)
+app.include_router(search_controller.router)
 
-@app.get("/")
+register_generation_jobs(job_queue)
+
+@app.on_event("startup")
+async def check_async_engine():
+    # Los endpoints y los escritores en lote usan AsyncSessionLocal: sin él todos fallarían con 500
+    if async_engine is None:
+        raise RuntimeError(
+            "No hay driver asíncrono para DATABASE_URL: instala asyncpg (Postgres) o aiosqlite (SQLite)"
+        )
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_job_queue():
+    await job_queue.stop()
+    # Escribe los intentos y mensajes pendientes antes de cerrar el motor
+    await attempt_writer.stop()
+    await chat_writer.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+@app.get("/", response_model=Dict[str, str])
 def root():
     return {"message": "Welcome to Leviatan Backend API"}
     
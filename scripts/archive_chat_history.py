@@ -0,0 +1,54 @@
+"""
+Archiva los mensajes de chat más antiguos que el periodo de retención.
+
+Mueve los mensajes de ChatHistory con más de CHAT_RETENTION_DAYS días (o --days) a
+ChatArchive, en bloques comprimidos de como mucho --batch-size mensajes por usuario y
+documento. Cada bloque se archiva y se borra en su propia transacción, así que se
+puede ejecutar con la API en marcha y programar como tarea periódica (por ejemplo,
+cron cada noche). Con --dry-run solo cuenta los mensajes que se archivarían.
+
+Uso:
+    python -m scripts.archive_chat_history [--days 180] [--batch-size 500] [--user-id 7] [--dry-run]
+
+Usa DATABASE_URL de la configuración de la aplicación.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from App.Core.config import settings  # noqa: E402
+from App.Database.database import SessionLocal  # noqa: E402
+from App.Services.chat_archive_services import ChatArchiveService, retention_cutoff  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=settings.CHAT_RETENTION_DAYS, help="días de historial que se conservan")
+    parser.add_argument("--batch-size", type=int, default=settings.CHAT_ARCHIVE_BATCH_SIZE, help="mensajes por bloque y transacción")
+    parser.add_argument("--user-id", type=int, help="archiva solo este usuario")
+    parser.add_argument("--dry-run", action="store_true", help="cuenta los mensajes sin archivarlos")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    cutoff = retention_cutoff(args.days)
+    db = SessionLocal()
+    try:
+        service = ChatArchiveService(db)
+        if args.dry_run:
+            print(f"{service.count_expired(cutoff, args.user_id)} mensajes anteriores a {cutoff:%Y-%m-%d %H:%M}")
+            return
+        stats = service.archive_expired(cutoff, args.batch_size, args.user_id)
+        print(
+            f"✅ {stats['messages']} mensajes de {stats['conversations']} conversaciones "
+            f"archivados en {stats['blocks']} bloques"
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Reconstruye UserStatsRollup a partir de los intentos de quiz.
+
+Se ejecuta una vez tras aplicar la migración (los usuarios sin resumen se atienden
+con agregados hasta entonces) y sirve para reparar resúmenes desalineados.
+
+Uso:
+    python -m scripts.backfill_stats_rollups [--user-id 42] [--batch-size 500]
+
+Usa DATABASE_URL de la configuración de la aplicación.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from App.Database.database import SessionLocal  # noqa: E402
+from App.Services.stats_rollup_services import StatsRollupService, rollup_user_ids_query  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, help="reconstruye solo este usuario")
+    parser.add_argument("--batch-size", type=int, default=500, help="usuarios por transacción")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        if args.user_id:
+            user_ids = [args.user_id]
+        else:
+            ids = rollup_user_ids_query().subquery()
+            user_ids = sorted(db.scalars(ids.select()).all())
+
+        service = StatsRollupService(db)
+        for start in range(0, len(user_ids), args.batch_size):
+            batch = user_ids[start:start + args.batch_size]
+            for user_id in batch:
+                service.rebuild(user_id)
+            db.commit()
+            # Libera los objetos del lote para no acumular el identity map
+            db.expunge_all()
+            print(f"✅ {start + len(batch)}/{len(user_ids)} usuarios")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
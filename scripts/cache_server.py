@@ -0,0 +1,199 @@
+"""
+Servidor local compatible con el protocolo de Redis (RESP2) para la caché compartida.
+
+Sustituye a Redis en desarrollo o en una sola máquina con varios workers: todos los
+procesos de la API apuntan a él con CACHE_URL=redis://127.0.0.1:6380/0 y comparten
+la caché de lectura y sus invalidaciones. Implementa los comandos que usa
+App/Core/cache.py (GET, SET con EX/PX, DEL, PING) y algunos de inspección (EXISTS,
+TTL, DBSIZE, FLUSHDB, INFO), con caducidad por clave y expulsión LRU al pasar de
+--max-keys. Los datos viven solo en memoria: al reiniciarlo la caché empieza vacía.
+En producción se usa Redis o Valkey con la misma CACHE_URL.
+
+Uso:
+    python -m scripts.cache_server [--host 127.0.0.1] [--port 6380] [--max-keys 100000]
+"""
+import argparse
+import asyncio
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    parser.add_argument("--max-keys", type=int, default=100000, help="claves máximas antes de expulsar por LRU")
+    return parser.parse_args()
+
+
+class Store:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # clave -> (valor, caducidad monotónica o None)
+        self._data: "OrderedDict[bytes, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _live(self, key: bytes) -> Optional[Tuple[bytes, Optional[float]]]:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        entry = self._live(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: bytes, value: bytes, ttl: Optional[float]) -> None:
+        self._data[key] = (value, time.monotonic() + ttl if ttl is not None else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_keys:
+            self._data.popitem(last=False)
+
+    def delete(self, keys: List[bytes]) -> int:
+        return sum(1 for key in keys if self._live(key) is not None and self._data.pop(key, None) is not None)
+
+    def exists(self, keys: List[bytes]) -> int:
+        return sum(1 for key in keys if self._live(key) is not None)
+
+    def ttl(self, key: bytes) -> int:
+        entry = self._live(key)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else max(int(round(entry[1] - time.monotonic())), 0)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CommandError(Exception):
+    pass
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, CommandError):
+        return b"-ERR " + str(value).encode() + b"\r\n"
+    if isinstance(value, bool):
+        return b"+OK\r\n" if value else b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, str):
+        return b"+" + value.encode() + b"\r\n"
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def execute(store: Store, args: List[bytes]):
+    command = args[0].upper()
+    params = args[1:]
+    if command == b"PING":
+        return params[0] if params else "PONG"
+    if command == b"ECHO" and len(params) == 1:
+        return params[0]
+    if command == b"GET" and len(params) == 1:
+        return store.get(params[0])
+    if command == b"SET" and len(params) >= 2:
+        ttl = None
+        options = [option.upper() for option in params[2:]]
+        if options[:1] in ([b"EX"], [b"PX"]) and len(options) == 2:
+            ttl = float(params[3]) / (1000 if options[0] == b"PX" else 1)
+        elif options:
+            raise CommandError("opciones de SET no soportadas (solo EX o PX)")
+        store.set(params[0], params[1], ttl)
+        return True
+    if command == b"DEL" and params:
+        return store.delete(params)
+    if command == b"EXISTS" and params:
+        return store.exists(params)
+    if command == b"TTL" and len(params) == 1:
+        return store.ttl(params[0])
+    if command == b"DBSIZE":
+        return len(store)
+    if command in (b"FLUSHDB", b"FLUSHALL"):
+        store.clear()
+        return True
+    if command == b"SELECT" and len(params) == 1:
+        # Una sola base de datos: el número se acepta para que sirvan las mismas URLs que con Redis
+        return True
+    if command == b"INFO":
+        return f"keys:{len(store)}\r\nkeyspace_hits:{store.hits}\r\nkeyspace_misses:{store.misses}\r\n".encode()
+    if command == b"COMMAND":
+        return []
+    raise CommandError(f"comando no soportado o argumentos incorrectos: {command.decode(errors='replace')}")
+
+
+async def read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Comando en línea (redis-cli, telnet)
+        return line.split()
+    args = []
+    for _ in range(int(line[1:].strip())):
+        header = await reader.readline()
+        if not header.startswith(b"$"):
+            raise CommandError("se esperaba un bulk string")
+        length = int(header[1:].strip())
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+async def handle(store: Store, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            try:
+                args = await read_command(reader)
+            except (CommandError, ValueError) as e:
+                writer.write(encode(CommandError(str(e))))
+                break
+            if args is None:
+                break
+            if not args:
+                continue
+            if args[0].upper() == b"QUIT":
+                writer.write(encode(True))
+                break
+            try:
+                reply = execute(store, args)
+            except (CommandError, ValueError) as e:
+                reply = CommandError(str(e))
+            writer.write(encode(reply))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(args) -> None:
+    store = Store(args.max_keys)
+    server = await asyncio.start_server(lambda r, w: handle(store, r, w), args.host, args.port)
+    print(f"🗄️ Caché escuchando en redis://{args.host}:{args.port}/0 (máx. {args.max_keys} claves)")
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    args = parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Recalcula los tramos diarios y semanales de progreso (ProgressRollup) desde QuizAttempt.
+
+Se ejecuta tras aplicar la migración para rellenar el historial existente y se puede
+programar como tarea periódica local (por ejemplo, cron cada noche) para corregir
+tramos desalineados tras borrar o importar intentos a mano. Con --dry-run solo
+informa de los usuarios cuyos tramos no cuadran.
+
+Uso:
+    python -m scripts.compact_progress_rollups [--user-id 7] [--batch-size 100] [--dry-run]
+
+Usa DATABASE_URL de la configuración de la aplicación.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select  # noqa: E402
+from App.Database.database import SessionLocal  # noqa: E402
+from App.Models.models import ProgressRollup  # noqa: E402
+from App.Services.progress_services import ProgressRollupService, progress_user_ids_query  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, help="compacta solo este usuario")
+    parser.add_argument("--batch-size", type=int, default=100, help="usuarios por transacción")
+    parser.add_argument("--dry-run", action="store_true", help="informa sin guardar cambios")
+    return parser.parse_args()
+
+
+def snapshot(db, user_id: int) -> set:
+    rows = db.execute(
+        select(
+            ProgressRollup.document_id, ProgressRollup.period, ProgressRollup.period_start,
+            ProgressRollup.attempts, ProgressRollup.score_sum, ProgressRollup.best_score, ProgressRollup.total_time
+        ).where(ProgressRollup.user_id == user_id)
+    ).all()
+    return {(*row[:4], round(row.score_sum, 6), row.best_score, row.total_time) for row in rows}
+
+
+def main() -> None:
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        if args.user_id:
+            user_ids = [args.user_id]
+        else:
+            user_ids = sorted(db.scalars(progress_user_ids_query().subquery().select()).all())
+
+        service = ProgressRollupService(db)
+        drifted = 0
+        for start in range(0, len(user_ids), args.batch_size):
+            batch = user_ids[start:start + args.batch_size]
+            for user_id in batch:
+                before = snapshot(db, user_id)
+                service.compact_user(user_id)
+                db.flush()
+                if snapshot(db, user_id) != before:
+                    drifted += 1
+                    print(f"⚠️ Usuario {user_id}: tramos de progreso desalineados")
+            if args.dry_run:
+                db.rollback()
+            else:
+                db.commit()
+            # Libera los objetos del lote para no acumular el identity map
+            db.expunge_all()
+            print(f"✅ {start + len(batch)}/{len(user_ids)} usuarios")
+
+        action = "detectados" if args.dry_run else "corregidos"
+        print(f"{drifted} usuarios con tramos {action}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
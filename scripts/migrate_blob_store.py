@@ -0,0 +1,242 @@
+"""
+Mueve los archivos subidos a Public/ al almacén por contenido (BLOB_STORE_ROOT).
+
+Tras la migración b6f1d8e3a527 los documentos existentes siguen apuntando a su
+archivo en Public/ (file_hash NULL). Este script, por lotes y en orden de id:
+  - copia cada archivo al almacén con su sha256 como nombre (los duplicados se
+    guardan una vez) y guarda también el texto extraído como blob
+  - actualiza file_path, file_hash, file_name y content_hash del documento y los
+    contadores de referencias, en la misma transacción, y vacía Document.content:
+    el blob pasa a ser la única copia del texto
+  - borra el archivo original de Public/ cuando ya no lo usa ningún documento
+    (con --keep-originals se conserva)
+
+Los documentos cuyo archivo no existe se dejan como están y se informa de ellos.
+Se puede interrumpir y volver a ejecutar: solo procesa documentos sin file_hash.
+También vacía Document.content en los documentos ya migrados que aún lo tienen
+(subidos antes de que el texto se guardara solo como blob) si su blob existe.
+
+Con --recount recalcula los contadores a partir de los documentos y con --gc borra
+los blobs sin referencias y los temporales abandonados (subidas interrumpidas).
+
+Uso:
+    python -m scripts.migrate_blob_store [--batch-size 50] [--dry-run] [--keep-originals] [--recount] [--gc]
+
+Usa DATABASE_URL y BLOB_STORE_ROOT de la configuración de la aplicación.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, update  # noqa: E402
+from sqlalchemy.orm import undefer  # noqa: E402
+from App.Core.cache import invalidate_document  # noqa: E402
+from App.Database.database import SessionLocal  # noqa: E402
+from App.Models.models import Blob, Document  # noqa: E402
+from App.Services.blob_services import BlobService  # noqa: E402
+from App.Services.deletion_services import remove_stored_files  # noqa: E402
+from App.Utils.blob_store import blob_store  # noqa: E402
+
+# Temporales de más de un día: ninguna subida en curso tarda tanto
+STALE_TEMP_SECONDS = 24 * 3600
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50, help="documentos por transacción")
+    parser.add_argument("--dry-run", action="store_true", help="informa sin mover nada")
+    parser.add_argument("--keep-originals", action="store_true", help="no borra los archivos de Public/")
+    parser.add_argument("--recount", action="store_true", help="recalcula ref_count desde los documentos")
+    parser.add_argument("--gc", action="store_true", help="borra blobs sin referencias y temporales abandonados")
+    return parser.parse_args()
+
+
+def _stage_document(document: Document) -> list:
+    with open(document.file_path, "rb") as f:
+        file_blob = blob_store.stage(f)
+    try:
+        text_blob = blob_store.stage_bytes(document.content.encode("utf-8"))
+    except BaseException:
+        blob_store.discard(file_blob)
+        raise
+    return [file_blob, text_blob]
+
+
+def migrate_batch(db, documents: list, args, stats: Counter) -> None:
+    staged, originals, migrated = [], [], []
+    try:
+        for document in documents:
+            if not os.path.exists(document.file_path):
+                print(f"  ⚠️ documento {document.id}: no existe {document.file_path}")
+                stats["missing"] += 1
+                continue
+            if args.dry_run:
+                stats["migrated"] += 1
+                stats["bytes"] += os.path.getsize(document.file_path)
+                continue
+
+            file_blob, text_blob = blobs = _stage_document(document)
+            staged.extend(blobs)
+            originals.append(document.file_path)
+            BlobService(db).acquire(blobs)
+            # Sin rutas: el nombre de la subida era el último componente de file_path
+            document.file_name = os.path.basename(document.file_path)[:255]
+            document.file_path = blob_store.path(file_blob.hash)
+            document.file_hash = file_blob.hash
+            document.content_hash = text_blob.hash
+            document.content = None
+            migrated.append(document.id)
+            stats["migrated"] += 1
+            stats["bytes"] += file_blob.size
+        db.commit()
+    except BaseException:
+        db.rollback()
+        for blob in staged:
+            blob_store.discard(blob)
+        raise
+
+    for blob in staged:
+        blob_store.commit(blob)
+    db.expunge_all()
+    # Con CACHE_URL la API deja de servir las rutas antiguas; sin ella, caducan en CACHE_LOCAL_TTL
+    for document_id in migrated:
+        invalidate_document(document_id)
+
+    if originals and not args.keep_originals:
+        # Varios documentos antiguos pueden compartir archivo (subidas con el mismo nombre)
+        pending = set(db.scalars(
+            select(Document.file_path).where(Document.file_path.in_(originals), Document.file_hash.is_(None))
+        ))
+        db.commit()
+        remove_stored_files([path for path in set(originals) if path not in pending])
+
+
+def migrate(db, args) -> Counter:
+    stats = Counter()
+    last_id = 0
+    while True:
+        documents = db.scalars(
+            select(Document)
+            .options(undefer(Document.content))
+            .where(Document.file_hash.is_(None), Document.id > last_id)
+            .order_by(Document.id)
+            .limit(args.batch_size)
+        ).all()
+        if not documents:
+            db.rollback()
+            break
+        last_id = documents[-1].id
+        migrate_batch(db, documents, args, stats)
+        if args.dry_run:
+            db.rollback()
+            db.expunge_all()
+    return stats
+
+
+def clear_moved_content(db, args) -> int:
+    """
+    Vacía Document.content en los documentos cuyo texto ya está en su blob.
+    Devuelve el número de documentos vaciados.
+    """
+    cleared = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Document.id, Document.content_hash)
+            .where(Document.id > last_id, Document.content_hash.is_not(None), Document.content.is_not(None))
+            .order_by(Document.id)
+            .limit(args.batch_size)
+        ).all()
+        if not rows:
+            db.rollback()
+            break
+        last_id = rows[-1].id
+        # Los documentos antiguos pueden tener content_hash calculado sin blob (get_content_hash)
+        moved = [row.id for row in rows if blob_store.exists(row.content_hash)]
+        cleared += len(moved)
+        if moved and not args.dry_run:
+            db.execute(
+                update(Document).where(Document.id.in_(moved)).values(content=None),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+        else:
+            db.rollback()
+    return cleared
+
+
+def recount(db, dry_run: bool) -> int:
+    """
+    Ajusta ref_count a las referencias reales (archivo y texto de cada documento
+    migrado). Devuelve el número de blobs corregidos.
+    """
+    actual = Counter()
+    for file_hash, content_hash in db.execute(
+        select(Document.file_hash, Document.content_hash).where(Document.file_hash.is_not(None))
+    ):
+        actual.update(blob_hash for blob_hash in (file_hash, content_hash) if blob_hash)
+
+    fixed = 0
+    for blob_hash, ref_count in db.execute(select(Blob.hash, Blob.ref_count)).all():
+        if actual[blob_hash] != ref_count:
+            print(f"  🔧 {blob_hash}: {ref_count} -> {actual[blob_hash]}")
+            fixed += 1
+            if not dry_run:
+                db.execute(
+                    update(Blob).where(Blob.hash == blob_hash).values(ref_count=actual[blob_hash]),
+                    execution_options={"synchronize_session": False}
+                )
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    return fixed
+
+
+def collect_garbage(db, dry_run: bool) -> Counter:
+    stats = Counter()
+    orphans = db.scalars(select(Blob.hash).where(Blob.ref_count <= 0)).all()
+    db.commit()
+    blobs = BlobService(db)
+    for blob_hash in orphans:
+        if dry_run or blobs.remove_unreferenced(blob_hash):
+            stats["blobs"] += 1
+
+    if blob_store.tmp_dir.is_dir():
+        now = time.time()
+        for entry in blob_store.tmp_dir.iterdir():
+            if now - entry.stat().st_mtime > STALE_TEMP_SECONDS:
+                stats["temps"] += 1
+                if not dry_run:
+                    entry.unlink(missing_ok=True)
+    return stats
+
+
+def main() -> None:
+    args = parse_args()
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(f"Almacén: {blob_store.root}")
+    db = SessionLocal()
+    try:
+        stats = migrate(db, args)
+        action = "a migrar" if args.dry_run else "migrados"
+        print(
+            f"✅ {prefix}{stats['migrated']} documentos {action} ({stats['bytes'] / 1e6:.2f} MB), "
+            f"{stats['missing']} sin archivo"
+        )
+        print(f"✅ {prefix}{clear_moved_content(db, args)} documentos con el texto solo en su blob")
+        if args.recount:
+            print(f"✅ {prefix}{recount(db, args.dry_run)} contadores corregidos")
+        if args.gc:
+            garbage = collect_garbage(db, args.dry_run)
+            print(f"✅ {prefix}{garbage['blobs']} blobs sin referencias y {garbage['temps']} temporales borrados")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
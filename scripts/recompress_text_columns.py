@@ -0,0 +1,113 @@
+"""
+Comprime las filas existentes de las columnas CompressedText / CompressedJSON.
+
+Tras la migración e4a9c1f7b358 los valores anteriores siguen guardados como texto
+sin comprimir (se leen igual). Este script los reescribe por lotes con el códec
+configurado (COMPRESSION_CODEC); también sirve para pasar de zlib a zstd. Cada lote
+es una transacción corta, así que se puede ejecutar con la API en marcha.
+
+Con --decompress deja todos los valores sin comprimir (necesario antes de revertir
+la migración). Con --dry-run solo informa del ahorro estimado.
+
+Uso:
+    python -m scripts.recompress_text_columns [--table documents] [--batch-size 200] [--dry-run] [--decompress]
+
+Usa DATABASE_URL de la configuración de la aplicación.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import LargeBinary, bindparam, select, type_coerce, update  # noqa: E402
+from App.Database.database import SessionLocal  # noqa: E402
+from App.Models.models import Document, Summary, ChatHistory, CustomStudyPlan  # noqa: E402
+from App.Utils.compression import compress_bytes, decompress_bytes, default_codec  # noqa: E402
+
+COLUMNS = [
+    (Document, Document.content),
+    (Summary, Summary.content),
+    (ChatHistory, ChatHistory.response),
+    (CustomStudyPlan, CustomStudyPlan.content),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--table", choices=[model.__tablename__ for model, _ in COLUMNS], help="solo esta tabla")
+    parser.add_argument("--batch-size", type=int, default=200, help="filas por transacción")
+    parser.add_argument("--dry-run", action="store_true", help="informa sin guardar cambios")
+    parser.add_argument("--decompress", action="store_true", help="guarda los valores sin comprimir")
+    return parser.parse_args()
+
+
+def _as_bytes(value) -> bytes:
+    # SQLite devuelve como str las filas que aún son texto
+    return value.encode("utf-8") if isinstance(value, str) else bytes(value)
+
+
+def process(db, model, column, args) -> dict:
+    table = model.__table__
+    raw_column = type_coerce(column, LargeBinary).label("raw")
+    statement = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values({column.key: bindparam("payload", type_=LargeBinary)})
+    )
+    stats = {"rows": 0, "rewritten": 0, "before": 0, "after": 0}
+    last_id = 0
+    while True:
+        # Recorrido por id (keyset): cada lote es una lectura acotada por la clave primaria
+        rows = db.execute(
+            select(model.id, raw_column)
+            .where(model.id > last_id, column.is_not(None))
+            .order_by(model.id)
+            .limit(args.batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changes = []
+        for row in rows:
+            stored = _as_bytes(row.raw)
+            plain = decompress_bytes(stored)
+            target = plain if args.decompress else compress_bytes(plain)
+            stats["rows"] += 1
+            stats["before"] += len(stored)
+            stats["after"] += len(target)
+            if target != stored or isinstance(row.raw, str):
+                changes.append({"row_id": row.id, "payload": target})
+
+        stats["rewritten"] += len(changes)
+        if changes and not args.dry_run:
+            db.execute(statement, changes, execution_options={"synchronize_session": False})
+            db.commit()
+        else:
+            db.rollback()
+    return stats
+
+
+def main() -> None:
+    args = parse_args()
+    codec = "sin comprimir" if args.decompress else default_codec()
+    db = SessionLocal()
+    try:
+        for model, column in COLUMNS:
+            if args.table and model.__tablename__ != args.table:
+                continue
+            stats = process(db, model, column, args)
+            ratio = stats["after"] / stats["before"] if stats["before"] else 1.0
+            action = "a reescribir" if args.dry_run else "reescritas"
+            print(
+                f"✅ {model.__tablename__}.{column.key} ({codec}): {stats['rows']} filas, "
+                f"{stats['rewritten']} {action}, {stats['before'] / 1e6:.2f} MB -> "
+                f"{stats['after'] / 1e6:.2f} MB ({ratio:.1%})"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
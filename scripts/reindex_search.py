@@ -0,0 +1,84 @@
+"""
+Reconstruye el índice de búsqueda (search_entries) de los documentos existentes.
+
+Las subidas y las generaciones indexan su contenido al guardarse; este script
+rellena el índice de los documentos anteriores a la migración d3a7c5e1f829 y sirve
+para reconstruirlo tras cambiar SEARCH_CHUNK_CHARS o SEARCH_LANGUAGE. Recorre los
+documentos por id y confirma cada lote en su propia transacción, así que se puede
+ejecutar con la API en marcha.
+
+Uso:
+    python -m scripts.reindex_search [--user-id 7] [--document-id 42] [--batch-size 20] [--missing-only]
+
+Usa DATABASE_URL de la configuración de la aplicación.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import exists, func, select  # noqa: E402
+from sqlalchemy.orm import undefer  # noqa: E402
+from App.Database.database import SessionLocal  # noqa: E402
+from App.Models.models import Document, SearchEntry, Subject  # noqa: E402
+from App.Services.document_services import DocumentService  # noqa: E402
+from App.Services.search_services import SearchIndexService  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, help="solo los documentos de este usuario")
+    parser.add_argument("--document-id", type=int, help="solo este documento")
+    parser.add_argument("--batch-size", type=int, default=20, help="documentos por transacción")
+    parser.add_argument("--missing-only", action="store_true", help="solo documentos sin entradas en el índice")
+    return parser.parse_args()
+
+
+def _documents_query(args, last_id: int):
+    query = (
+        select(Document)
+        # Document.content solo lo tienen los documentos sin blob de texto
+        .options(undefer(Document.content))
+        .where(Document.id > last_id)
+        .order_by(Document.id)
+        .limit(args.batch_size)
+    )
+    if args.user_id is not None:
+        query = query.join(Subject, Document.subject_id == Subject.id).where(Subject.user_id == args.user_id)
+    if args.document_id is not None:
+        query = query.where(Document.id == args.document_id)
+    if args.missing_only:
+        query = query.where(~exists().where(SearchEntry.document_id == Document.id))
+    return query
+
+
+def main() -> None:
+    args = parse_args()
+    db = SessionLocal()
+    started = time.perf_counter()
+    documents = 0
+    last_id = 0
+    try:
+        while True:
+            batch = db.scalars(_documents_query(args, last_id)).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            index = SearchIndexService(db)
+            document_service = DocumentService(db)
+            for document in batch:
+                index.reindex(document, document_service.get_text(document))
+            db.commit()
+            db.expunge_all()
+            documents += len(batch)
+            print(f"  {documents} documentos indexados (hasta id {last_id})")
+        entries = db.scalar(select(func.count()).select_from(SearchEntry))
+        print(f"✅ {documents} documentos reindexados en {time.perf_counter() - started:.1f} s; {entries} entradas en el índice")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Reconstruye QuizStatsRollup, QuestionStats y SubjectStatsRollup a partir de intentos
+y respuestas.
+
+Se ejecuta tras aplicar la migración para rellenar los quizzes existentes y,
+periódicamente, para corregir contadores desalineados (por ejemplo, tras borrar
+intentos a mano). Con --dry-run solo informa de los quizzes que no cuadran.
+
+Uso:
+    python -m scripts.repair_quiz_stats [--quiz-id 7 | --subject-id 3] [--batch-size 200] [--dry-run]
+
+Usa DATABASE_URL de la configuración de la aplicación.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select  # noqa: E402
+from App.Database.database import SessionLocal  # noqa: E402
+from App.Models.models import QuizStatsRollup, QuestionStats, SubjectStatsRollup  # noqa: E402
+from App.Services.stats_rollup_services import (  # noqa: E402
+    QuizStatsRollupService, SubjectStatsRollupService, quiz_rollup_ids_query, subject_rollup_ids_query
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quiz-id", type=int, help="repara solo este quiz")
+    parser.add_argument("--subject-id", type=int, help="repara solo esta materia")
+    parser.add_argument("--batch-size", type=int, default=200, help="quizzes por transacción")
+    parser.add_argument("--dry-run", action="store_true", help="informa sin guardar cambios")
+    return parser.parse_args()
+
+
+def snapshot(db, quiz_id: int) -> tuple:
+    rollup = db.get(QuizStatsRollup, quiz_id)
+    questions = db.execute(
+        select(QuestionStats.question_id, QuestionStats.total_answers, QuestionStats.correct_answers)
+        .where(QuestionStats.quiz_id == quiz_id)
+        .order_by(QuestionStats.question_id)
+    ).all()
+    if rollup is None:
+        return None, tuple(questions)
+    return (rollup.total_attempts, round(rollup.score_sum, 6), tuple(rollup.score_histogram)), tuple(questions)
+
+
+def subject_snapshot(db, subject_id: int):
+    rollup = db.get(SubjectStatsRollup, subject_id)
+    if rollup is None:
+        return None
+    return rollup.total_attempts, round(rollup.score_sum, 6), tuple(rollup.score_histogram)
+
+
+def repair(db, args, label: str, ids: list, rebuild, snapshot_of) -> int:
+    drifted = 0
+    for start in range(0, len(ids), args.batch_size):
+        batch = ids[start:start + args.batch_size]
+        for item_id in batch:
+            before = snapshot_of(db, item_id)
+            rebuild(item_id)
+            db.flush()
+            if snapshot_of(db, item_id) != before:
+                drifted += 1
+                print(f"⚠️ {label} {item_id}: contadores desalineados")
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+        # Libera los objetos del lote para no acumular el identity map
+        db.expunge_all()
+        print(f"✅ {start + len(batch)}/{len(ids)} ({label})")
+    return drifted
+
+
+def main() -> None:
+    args = parse_args()
+    db = SessionLocal()
+    try:
+        quiz_ids, subject_ids = [], []
+        if args.quiz_id:
+            quiz_ids = [args.quiz_id]
+        elif args.subject_id:
+            subject_ids = [args.subject_id]
+        else:
+            quiz_ids = sorted(db.scalars(quiz_rollup_ids_query().subquery().select()).all())
+            subject_ids = sorted(db.scalars(subject_rollup_ids_query().subquery().select()).all())
+
+        action = "detectados" if args.dry_run else "corregidos"
+        if quiz_ids:
+            drifted = repair(db, args, "quiz", quiz_ids, QuizStatsRollupService(db).rebuild, snapshot)
+            print(f"{drifted} quizzes con contadores {action}")
+        if subject_ids:
+            drifted = repair(db, args, "materia", subject_ids, SubjectStatsRollupService(db).rebuild, subject_snapshot)
+            print(f"{drifted} materias con contadores {action}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()